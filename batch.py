@@ -0,0 +1,151 @@
+"""Streamlit olmadan toplu tarama: Finviz -> temel veri -> teknik -> karar -> dosya.
+
+Örnek (gece taraması):
+    python batch.py --limit 100 --exchange NASDAQ --workers 8 --out batch_reports/latest.jsonl
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+import diagnostics
+import finviz
+from decision import classify_frame
+from fundamentals import FundamentalsSnapshot, robust_metrics
+from cross_section import cross_section_summary
+from news import get_news_profile, news_score
+from panel import PanelStore
+from price_store import PriceStore
+from technicals import calculate_ta
+
+DEFAULT_OUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch_reports", "latest.jsonl")
+REPORT_COLUMNS = ['Ticker', 'Company', 'Sector', 'Decision', 'Reason', 'Valuation', 'EV/EBITDA', 'EV/EBITDA Source', 'FCF',
+                  'Close', 'MA200', 'RSI', 'Drawdown', 'Volatility', 'News Score', 'Error', 'Generated At']
+
+
+# --- HİSSE BAŞINA ANALİZ ---
+def analyse_ticker(row, with_news=True):
+    """Finviz satırı (dict) -> tek satırlık rapor girdileri (dict). Hatalar 'Error' alanına yazılır.
+
+    Karar sütunları analyse_universe'de tüm evren için tek geçişte doldurulur.
+    """
+    ticker = row['Ticker']
+    report = dict.fromkeys(REPORT_COLUMNS)
+    report.update({'Ticker': ticker, 'Company': row.get('Company'), 'Sector': row.get('Sector'),
+                   'Generated At': time.strftime('%Y-%m-%dT%H:%M:%S')})
+    try:
+        metrics = robust_metrics(FundamentalsSnapshot.fetch(ticker))
+        report.update({'EV/EBITDA': metrics['EV/EBITDA'], 'EV/EBITDA Source': metrics['Source'], 'FCF': metrics['FCF']})
+        hist = PriceStore().history(ticker)
+        if hist.empty:
+            report['Error'] = "Fiyat verisi yok"
+            return report
+        last = calculate_ta(hist).iloc[-1]
+        report.update({'Close': last['Close'], 'MA200': last['MA200'], 'RSI': last['RSI'], 'Drawdown': last['Drawdown'], 'Volatility': last['Volatility']})
+        if with_news: report['News Score'] = news_score(get_news_profile(ticker, row)['News'])
+    except Exception as e:
+        report['Error'] = f"{type(e).__name__}: {e}"
+    return report
+
+def analyse_universe(rows, workers=8, processes=False, with_news=True, on_done=None):
+    """Satırları iş parçacığı (ya da süreç) havuzunda analiz eder; tarama sırasını korur, kararları toplu verir."""
+    pool_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    reports = {}
+    with pool_cls(max_workers=workers) as pool:
+        futures = {pool.submit(analyse_ticker, row, with_news): i for i, row in enumerate(rows)}
+        for fut in as_completed(futures):
+            reports[futures[fut]] = fut.result()
+            if on_done: on_done(reports[futures[fut]])
+    df = pd.DataFrame([reports[i] for i in sorted(reports)], columns=REPORT_COLUMNS)
+    return classify_frame(df)[REPORT_COLUMNS]
+
+
+# --- ÇIKTI ---
+def write_reports(df, path):
+    """df -> path; Parquet motoru (pyarrow) kurulu değilse yanına .jsonl yazılır. Yazılan yolu döner."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith(".parquet"):
+        try:
+            df.to_parquet(path, index=False)
+            return path
+        except ImportError:
+            path = os.path.splitext(path)[0] + ".jsonl"
+            print(f"Parquet için pyarrow gerekli (pip install pyarrow); JSONL yazılıyor: {path}", file=sys.stderr)
+    df.to_json(path, orient='records', lines=True, force_ascii=False)
+    return path
+
+def write_cross_section(tickers, path):
+    """Evren paneli (memmap) üzerinde kesitsel özet -> path; korelasyon matrisi yanına _corr.csv."""
+    panel = PanelStore().panel(tickers)
+    if len(panel) < 2: return None
+    summary, corr = cross_section_summary(panel)
+    path = write_reports(summary, path)
+    corr.round(4).to_csv(os.path.splitext(path)[0] + "_corr.csv")
+    return summary
+
+# path -> ((mtime, boyut), df): dosya değişmedikçe her yeniden çalıştırmada tekrar okunmaz
+_loaded = {}
+
+def load_reports(path=DEFAULT_OUT):
+    """Toplu rapor; dönen tablo önbellekten paylaşılır, değiştirilmemeli."""
+    try: info = os.stat(path)
+    except OSError: return pd.DataFrame()
+    stamp = (info.st_mtime_ns, info.st_size)
+    cached = _loaded.get(path)
+    if cached and cached[0] == stamp: return cached[1]
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_json(path, orient='records', lines=True)
+    _loaded[path] = (stamp, df)
+    return df
+
+
+# --- KOMUT SATIRI ---
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Finviz evrenini tarayıp her hisse için karar raporu yazar.")
+    p.add_argument("--limit", type=int, default=100, help="Taranacak en fazla hisse (20'lik sayfalar)")
+    p.add_argument("--exchange", default="Any")
+    p.add_argument("--sector", default="Any")
+    p.add_argument("--pe", default="Any")
+    p.add_argument("--peg", default="Any")
+    p.add_argument("--roe", default="Any")
+    p.add_argument("--debt-eq", default="Any")
+    p.add_argument("--rsi", default="Any")
+    p.add_argument("--ma", default="Any")
+    p.add_argument("--tickers", help="Virgülle ayrılmış liste; verilirse Finviz taraması atlanır")
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--processes", action="store_true", help="İş parçacığı yerine süreç havuzu kullan")
+    p.add_argument("--no-news", action="store_true", help="Haber skorunu atla")
+    p.add_argument("--out", default=DEFAULT_OUT, help=".jsonl ya da .parquet")
+    p.add_argument("--cross-section", metavar="PATH", help="Göreli güç/beta/volatilite sırası özetini (.jsonl/.parquet) ve korelasyon matrisini yaz")
+    p.add_argument("--diagnostics", metavar="PATH", help="Süre/sayaç ölçümlerini bu JSONL dosyasına ekle (--processes ile yalnız ana süreç)")
+    return p.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.diagnostics: diagnostics.enable()
+    if args.tickers:
+        rows = [{'Ticker': t.strip().upper()} for t in args.tickers.split(",") if t.strip()]
+    else:
+        df, url = finviz.get_finviz_v48(args.limit, args.exchange, args.sector, args.pe, args.peg, args.roe, args.debt_eq, args.rsi, args.ma)
+        print(f"{len(df)} hisse tarandı: {url}", file=sys.stderr)
+        rows = df.to_dict('records')
+    if not rows:
+        print("Analiz edilecek hisse bulunamadı.", file=sys.stderr)
+        return 1
+    done = []
+    def progress(report):
+        done.append(report['Ticker'])
+        print(f"[{len(done)}/{len(rows)}] {report['Ticker']}: {report['Error'] or 'tamam'}", file=sys.stderr)
+    reports = analyse_universe(rows, workers=args.workers, processes=args.processes, with_news=not args.no_news, on_done=progress)
+    out = write_reports(reports, args.out)
+    print(f"{len(reports)} rapor yazıldı: {out}", file=sys.stderr)
+    if args.cross_section:
+        summary = write_cross_section([r['Ticker'] for r in rows], args.cross_section)
+        print(f"Kesitsel özet yazıldı: {args.cross_section}" if summary is not None else "Evren fiyat paneli alınamadı.", file=sys.stderr)
+    if args.diagnostics: diagnostics.write_jsonl(args.diagnostics)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Finviz tarama sayfası ayrıştırıcısı: eski BeautifulSoup yolu vs lxml/XPath tipli yol.
+
+Kayıtlı sayfalar üzerinde süre (ms/sayfa) ve sonuç tablosunun bellek boyutunu karşılaştırır:
+    python benchmarks/bench_finviz_parser.py
+"""
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from finviz import FINVIZ_HEAD, parse_finviz_table  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "finviz")
+
+
+def parse_finviz_table_bs4(html):
+    """Karşılaştırma için önceki ayrıştırıcının birebir kopyası (tüm sütunlar metin)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    target = None
+    for t in soup.find_all('table'):
+        rows = t.find_all('tr')
+        if len(rows) > 1:
+            txt = rows[0].get_text()
+            if 'No.' in txt and 'Ticker' in txt and 'Price' in txt: target = t; break
+    if target is None: return pd.DataFrame()
+    data = []
+    for row in target.find_all('tr')[1:]:
+        cols = [c.get_text(strip=True) for c in row.find_all('td')]
+        if len(cols) >= 11: data.append(cols[:11])
+    return pd.DataFrame(data, columns=FINVIZ_HEAD)
+
+
+def bench(parse, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        frames = [parse(html) for html in pages]
+    elapsed = (time.perf_counter() - start) / (repeat * len(pages))
+    df = pd.concat(frames, ignore_index=True)
+    return elapsed * 1000, df.memory_usage(deep=True).sum(), len(df)
+
+
+def main(repeat=20):
+    pages = [open(p, encoding="utf-8").read() for p in sorted(glob.glob(os.path.join(FIXTURES, "screener_r*.html")))]
+    if not pages:
+        print(f"Fixture bulunamadı: {FIXTURES}")
+        return 1
+    old_ms, old_mem, old_rows = bench(parse_finviz_table_bs4, pages, repeat)
+    new_ms, new_mem, new_rows = bench(parse_finviz_table, pages, repeat)
+    assert old_rows == new_rows, (old_rows, new_rows)
+    print(f"{len(pages)} sayfa, {new_rows} satır, {repeat} tekrar")
+    print(f"BeautifulSoup : {old_ms:7.2f} ms/sayfa  {old_mem / 1024:8.1f} KiB")
+    print(f"lxml + tipli  : {new_ms:7.2f} ms/sayfa  {new_mem / 1024:8.1f} KiB")
+    print(f"Hızlanma x{old_ms / new_ms:.1f}, bellek x{old_mem / new_mem:.1f} daha küçük")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+"""Çevrimdışı performans ölçümü: kayıtlı fixture'lar + yerel tekrar (replay) HTTP sunucusu.
+
+Finviz, Google News ve çeviri istekleri gerçek HTTP yığınından geçerek yerel sunucuya
+yönlendirilir; yfinance çağrıları fixture tablolarını dönen sahte Ticker/download ile
+değiştirilir. Her iki tarafa da yapılandırılabilir gecikme eklenebilir.
+
+    python benchmarks/run.py                      # baseline ile karşılaştır, gerilemede çıkış kodu 1
+    python benchmarks/run.py --update-baseline    # baseline.json'ı yeniden yaz
+    python benchmarks/run.py --sizes 20,100 --latency 0.05 --stages calculate_ta,news_profile
+
+Her ölçümden önce küçük bir ısınma geçişi (içe aktarma, ilk çağrı maliyeti) yapılır; süre
+--repeat tekrarın medyanıdır.
+"""
+import argparse
+import gc
+import json
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Fiyat deposu ve ortak önbellek geçici dizinde tutulur; modüller içe aktarılmadan önce ayarlanmalı
+STORE_DIR = os.environ["BORSA_STORE_DIR"] = tempfile.mkdtemp(prefix="bench_store_")
+os.environ["BORSA_SHARED_CACHE"] = os.path.join(tempfile.mkdtemp(prefix="bench_cache_"), "shared.sqlite")
+import net  # noqa: E402
+import shared_cache  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures")
+BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_SIZES = [20, 100, 1000]
+# Baseline'a göre bu oranı aşan yavaşlama/bellek artışı gerileme sayılır
+DEFAULT_THRESHOLD = 0.5
+# Gürültü tabanı: fark bu mutlak değerleri ve iki ölçümün tekrarlar arası yayılımını aşmalı
+MIN_DELTA_S = 0.05
+MIN_DELTA_KIB = 256
+DEFAULT_REPEAT = 3
+# Isınma geçişinin boyutu (ölçülmez; Finviz sayfası 20 satır)
+WARMUP_N = 20
+# Fixture sayfalarındaki sentetik ticker'lar (KERW1 gibi)
+TICKER_RE = re.compile(r'\b[A-Z]{1,5}\d+\b')
+
+
+def _read(*parts, mode="r"):
+    with open(os.path.join(FIXTURES, *parts), mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f: return f.read()
+
+
+# --- TEKRAR (REPLAY) HTTP SUNUCUSU ---
+class ReplayServer:
+    """Yolun ilk parçası orijinal sunucu adıdır: /finviz.com/screener.ashx?... gibi."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self.screener_pages = [_read("finviz", f"screener_r{r}.html") for r in range(1, 101, 20)]
+        self.quote = _read("finviz", "quote.html").encode()
+        self.rss = _read("news", "rss.xml", mode="rb")
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+
+            def _reply(self):
+                server.requests += 1
+                if server.latency: time.sleep(server.latency)
+                body, ctype = server.route(self.path)
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                self.wfile.write(body or b"")
+
+            do_GET = do_POST = _reply
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+
+    def route(self, path):
+        parts = urlsplit(path)
+        host, _, rest = parts.path.lstrip("/").partition("/")
+        query = parse_qs(parts.query)
+        if host == "finviz.com" and rest == "screener.ashx":
+            return self.screener_page(int(query.get("r", ["1"])[0])).encode(), "text/html"
+        if host == "finviz.com" and rest == "quote.ashx":
+            return self.quote, "text/html"
+        if host == "news.google.com":
+            return self.rss, "application/xml"
+        return None, "text/plain"
+
+    def screener_page(self, start):
+        """Beş kayıtlı sayfa döngüyle verilir; sonraki turlarda ticker'lar tekilleştirilir."""
+        cycle, page = divmod((start - 1) // 20, len(self.screener_pages))
+        html = self.screener_pages[page]
+        if cycle: html = TICKER_RE.sub(rf'\g<0>X{cycle}', html)
+        return html
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """https://host/yol?sorgu -> http://127.0.0.1:port/host/yol?sorgu"""
+
+    def __init__(self, port, **kwargs):
+        self.port = port
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"http://127.0.0.1:{self.port}/{parts.hostname}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        return super().send(request, **kwargs)
+
+
+# --- SAHTE YFINANCE ---
+class FakeTicker:
+    latency = 0.0
+    _frames = {}
+
+    @classmethod
+    def load_fixtures(cls):
+        for name in ("income_stmt", "balance_sheet", "cashflow"):
+            df = pd.read_csv(os.path.join(FIXTURES, "yfinance", f"{name}.csv"), index_col=0)
+            df.columns = pd.to_datetime(df.columns)
+            cls._frames[name] = df
+        hist = pd.read_csv(os.path.join(FIXTURES, "yfinance", "history.csv"), index_col=0)
+        hist.index = pd.to_datetime(hist.index, utc=True).tz_convert("America/New_York")
+        hist.index.name = "Date"
+        cls._frames["history"] = hist
+        cls._info = json.loads(_read("yfinance", "info.json"))
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def _get(self, name):
+        if self.latency: time.sleep(self.latency)
+        return self._frames[name].copy()
+
+    income_stmt = property(lambda self: self._get("income_stmt"))
+    balance_sheet = property(lambda self: self._get("balance_sheet"))
+    cashflow = property(lambda self: self._get("cashflow"))
+
+    @property
+    def info(self):
+        if self.latency: time.sleep(self.latency)
+        return dict(self._info)
+
+    @property
+    def fast_info(self):
+        return {"market_cap": self._info["marketCap"]}
+
+    def history(self, period=None, start=None, **kwargs):
+        hist = self._get("history")
+        if start is not None: hist = hist[hist.index >= pd.Timestamp(start, tz=hist.index.tz)]
+        return hist
+
+def fake_download(tickers, start=None, **kwargs):
+    if FakeTicker.latency: time.sleep(FakeTicker.latency)
+    hist = FakeTicker._frames["history"]
+    if start is not None: hist = hist[hist.index >= pd.Timestamp(start, tz=hist.index.tz)]
+    return pd.concat({f: pd.DataFrame({t: hist[f] for t in tickers}) for f in ("Close", "Volume")}, axis=1)
+
+
+# --- AŞAMALAR ---
+def stage_finviz_scan(n):
+    import finviz
+    df, _ = finviz.get_finviz_v48(n, "Any", "Any", "Any", "Any", "Any", "Any", "Any", "Any", rate=200, burst=20, workers=8)
+    assert len(df) == n, len(df)
+
+def stage_find_value(n):
+    from fundamentals import find_value_in_df
+    inc = FakeTicker._frames["income_stmt"]
+    for _ in range(n):
+        col = inc.iloc[:, 0]
+        for keys in (['total revenue', 'revenue'], ['gross profit'], ['net income'], ['operating income', 'ebit'], ['ebitda', 'normalized ebitda']):
+            find_value_in_df(col, keys)
+
+def stage_robust_metrics(n):
+    from fundamentals import FundamentalsSnapshot, robust_metrics
+    for i in range(n): robust_metrics(FundamentalsSnapshot.fetch(f"T{i}"))
+
+def stage_calculate_ta(n):
+    from technicals import calculate_ta
+    hist = FakeTicker._frames["history"]
+    for _ in range(n): calculate_ta(hist)
+
+def stage_news_profile(n):
+    import news
+    with news._cache_lock: news._cache.clear()
+    rows = {f"T{i}": {"Sector": "Technology", "Industry": "Semiconductors", "Country": "USA"} for i in range(n)}
+    news.prefetch_news_profiles(rows).join()
+    assert all(news.cached_news_profile(t) for t in rows)
+
+def _translator():
+    # Ağsız çevirmen (metni aynen döner); cümle deposu her ölçümde boş başlar
+    from translation import StubBackend, TranslationStore, Translator
+    return Translator(StubBackend(), TranslationStore(os.path.join(STORE_DIR, "translation.sqlite")))
+
+def stage_news_single(n):
+    # Ön yüklenmemiş hisse seçimi: tek hisse hattı (kira + çekim + çeviri + yazma), n hisse sırayla
+    import news
+    with news._cache_lock: news._cache.clear()
+    translator = _translator()
+    row = {"Sector": "Technology", "Industry": "Semiconductors", "Country": "USA"}
+    for i in range(n):
+        data = news.get_news_profile(f"T{i}", row, translator.translate_many)
+        assert data["News"] and "Errors" not in data, data.get("Errors")
+
+_orchestrator = None
+
+def stage_detail_view(n):
+    # Sayfadaki detay görünümü: aynı kaynaklar (detail_sources) DetailOrchestrator.gather ile, n hisse sırayla
+    global _orchestrator
+    import news
+    from fundamentals import FundamentalsSnapshot
+    from orchestrator import DETAIL_BUDGET, DetailOrchestrator, detail_sources
+    from price_store import PriceStore
+    _orchestrator = _orchestrator or DetailOrchestrator()
+    with news._cache_lock: news._cache.clear()
+    store = PriceStore()
+    # Sayfadaki get_fundamentals'ın ortak katmanı (st.cache_data olmadan)
+    fundamentals = shared_cache.shared("fundamentals:v2", ttl=1800, stale_ttl=6 * 3600, valid=lambda snap: not snap.errors)(FundamentalsSnapshot.fetch)
+    translator = _translator()
+    row = {"Sector": "Technology", "Industry": "Semiconductors", "Country": "USA"}
+    def news_profile(ticker, r):
+        return news.get_news_profile(ticker, r, translator.translate_many, hedge_after=net.HEDGE_AFTER)
+    for i in range(n):
+        detail = _orchestrator.gather(f"T{i}", detail_sources(f"T{i}", row, store.history, fundamentals, news_profile), DETAIL_BUDGET)
+        assert all(r.ok for r in detail.values()), [r.describe() for r in detail.values() if not r.ok]
+
+def stage_analyse_universe(n):
+    import batch
+    import news
+    with news._cache_lock: news._cache.clear()
+    rows = [{"Ticker": f"T{i}", "Sector": "Technology", "Industry": "Semiconductors", "Country": "USA"} for i in range(n)]
+    reports = batch.analyse_universe(rows, workers=8)
+    assert reports['Error'].isna().all(), reports['Error'].dropna().head()
+
+def stage_cross_section(n):
+    from cross_section import cross_section_summary
+    from panel import PanelStore
+    store = PanelStore(root=os.path.join(STORE_DIR, "panel"), min_refresh=0)
+    tickers = [f"T{i}" for i in range(n)]
+    # Soğuk kurulum + artımlı yenileme (yalnız yeni günler) + kesitsel özet
+    store.panel(tickers)
+    summary, _ = cross_section_summary(store.panel(tickers))
+    assert len(summary) == n, len(summary)
+    # Evren değişimi: yalnız panelde olmayan %10 hisse indirilir (sütun eklenir)
+    shifted = tickers[n // 10:] + [f"U{i}" for i in range(n // 10)]
+    assert store.panel(shifted).members == shifted
+
+STAGES = {
+    "finviz_scan": stage_finviz_scan,
+    "find_value_in_df": stage_find_value,
+    "fetch_robust_metrics": stage_robust_metrics,
+    "calculate_ta": stage_calculate_ta,
+    "news_profile": stage_news_profile,
+    "news_single": stage_news_single,
+    "detail_view": stage_detail_view,
+    "analyse_universe": stage_analyse_universe,
+    "cross_section": stage_cross_section,
+}
+
+
+def _reset_store():
+    # Her ölçümde fiyat deposu ve ortak önbellek boş başlar (soğuk görünüm)
+    for d in os.listdir(STORE_DIR):
+        path = os.path.join(STORE_DIR, d)
+        if os.path.isdir(path): shutil.rmtree(path)
+        else: os.remove(path)
+    shared_cache.get_cache().backend.clear()
+
+def measure(fn, n, repeat=DEFAULT_REPEAT):
+    """Isınmadan sonra bellek tracemalloc altında ayrı bir geçişte, süre izlemesiz `repeat` geçişte ölçülür."""
+    _reset_store()
+    fn(min(n, WARMUP_N))
+    _reset_store()
+    gc.collect()
+    tracemalloc.start()
+    fn(n)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    walls = []
+    for _ in range(max(1, repeat)):
+        _reset_store()
+        gc.collect()
+        start = time.perf_counter()
+        fn(n)
+        walls.append(time.perf_counter() - start)
+    return {"wall_s": round(statistics.median(walls), 4), "spread_s": round(max(walls) - min(walls), 4),
+            "peak_kib": round(peak / 1024, 1), "retained_kib": round(current / 1024, 1)}
+
+
+def run(stages, sizes, latency, repeat=DEFAULT_REPEAT):
+    import news
+    FakeTicker.load_fixtures()
+    FakeTicker.latency = latency
+    yf.Ticker, yf.download = FakeTicker, fake_download
+    # Yerel sunucuda Finviz hız sınırı ölçümü bekleme süresine çevirmesin
+    news.HOST_RATES = {host: (200, 20) for host in news.HOST_RATES}
+    net._host_limiters.clear()
+    results = {}
+    with ReplayServer(latency) as server:
+        adapter = ReplayAdapter(server.port, pool_connections=16, pool_maxsize=16)
+        real_get_session = net.get_session
+        def replay_session(pool_size=10):
+            s = real_get_session(pool_size)
+            s.mount("https://", adapter)
+            return s
+        net.get_session = replay_session
+        try:
+            for name in stages:
+                results[name] = {}
+                for n in sizes:
+                    results[name][str(n)] = measure(STAGES[name], n, repeat)
+                    print(f"{name:22s} n={n:<5d} {results[name][str(n)]}", file=sys.stderr)
+        finally:
+            net.get_session = real_get_session
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Eşik aşımlarını liste olarak döner."""
+    failures = []
+    for stage, by_size in results.items():
+        for size, cur in by_size.items():
+            base = baseline.get(stage, {}).get(size)
+            if not base: continue
+            noise = max(MIN_DELTA_S, base.get("spread_s", 0) + cur.get("spread_s", 0))
+            if cur["wall_s"] > base["wall_s"] * (1 + threshold) and cur["wall_s"] - base["wall_s"] > noise:
+                failures.append(f"{stage} n={size}: süre {base['wall_s']}s -> {cur['wall_s']}s")
+            if cur["peak_kib"] > base["peak_kib"] * (1 + threshold) and cur["peak_kib"] - base["peak_kib"] > MIN_DELTA_KIB:
+                failures.append(f"{stage} n={size}: tepe bellek {base['peak_kib']} KiB -> {cur['peak_kib']} KiB")
+    return failures
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    p.add_argument("--stages", default=",".join(STAGES))
+    p.add_argument("--latency", type=float, default=0.0, help="Her yanıta eklenecek gecikme (sn)")
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    p.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Süre için tekrar sayısı (medyan alınır)")
+    p.add_argument("--update-baseline", action="store_true")
+    p.add_argument("--out", help="Sonuçları ayrıca bu JSON dosyasına yaz")
+    args = p.parse_args(argv)
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown: p.error(f"bilinmeyen aşama: {', '.join(sorted(unknown))}")
+    results = run(stages, [int(s) for s in args.sizes.split(",")], args.latency, args.repeat)
+    meta = {"latency": args.latency, "repeat": args.repeat, "python": sys.version.split()[0], "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    if args.out:
+        with open(args.out, "w") as f: json.dump({"meta": meta, "results": results}, f, indent=1)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f: json.dump({"meta": meta, "results": results}, f, indent=1)
+        print(f"Baseline yazıldı: {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("Baseline yok; önce --update-baseline ile oluşturun.", file=sys.stderr)
+        return 0
+    with open(args.baseline) as f: baseline = json.load(f)
+    if baseline.get("meta", {}).get("latency") != args.latency:
+        print("Uyarı: baseline farklı gecikmeyle ölçülmüş.", file=sys.stderr)
+    failures = compare(results, baseline.get("results", {}), args.threshold)
+    for f in failures: print(f"GERİLEME: {f}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,29 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-import requests
-import plotly.graph_objects as go
-from bs4 import BeautifulSoup
+import functools
+import threading
 import time
-import numpy as np
-import re
+import uuid
+from collections import OrderedDict
+import diagnostics
+import finviz
+import shared_cache
+from finviz import FINVIZ_RATE, FINVIZ_BURST, FINVIZ_WORKERS
+from net import HEDGE_AFTER
+from technicals import calculate_ta, universe_ta_summary
+from price_store import PriceStore
+from panel import BENCHMARK, PanelStore
+from cross_section import BETA_WINDOW, beta_series, cross_section_summary
+from prefetch import PrefetchScheduler
+from translation import Translator
+from news import cached_news_profiles, generate_news_summary, get_news_profile, prefetch_news_profiles
+from sentiment import score_universe, tone
+from decision import classify_frame, decision_guide
+from batch import load_reports
+from charts import PERIODS, build_correlation_figure, build_price_figure, slice_period
+from screener import UniverseStore
+from orchestrator import DETAIL_BUDGET, PENDING, SKIPPED, DetailOrchestrator, detail_sources
+from fundamentals import FundamentalsSnapshot, robust_metrics, skeptic_analysis, verbal_financial_analysis
 
 # --- Sayfa Ayarları ---
 st.set_page_config(page_title="Akademik Analiz v48", layout="wide")
@@ -17,483 +34,480 @@ st.markdown("""
 """)
 
 # --- Session State ---
+# Oturum başına tutulan en fazla teknik hesap (hisse); fazlası en uzun süredir açılmayandan silinir
+TA_CACHE_MAX = 32
 if 'scan_data' not in st.session_state:
     st.session_state.scan_data = pd.DataFrame()
+if 'ta_cache' not in st.session_state:
+    st.session_state.ta_cache = OrderedDict()
+if 'decision_inputs' not in st.session_state:
+    st.session_state.decision_inputs = {}
+# Süreç geneli zamanlayıcıda bu oturumun kuyruğunu ayırt eder
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
-# --- YAN MENÜ ---
-st.sidebar.header("🔍 Filtreleme Paneli")
-limit_opts = {20: 1, 40: 2, 60: 3, 100: 5}
-scan_limit = st.sidebar.selectbox("Evren Genişliği", list(limit_opts.keys()), index=2)
-
-exchange = st.sidebar.selectbox("Borsa", ["Any", "AMEX", "NASDAQ", "NYSE"], index=0)
-sector = st.sidebar.selectbox("Sektör", ["Any", "Basic Materials", "Communication Services", "Consumer Cyclical", "Consumer Defensive", "Energy", "Financial", "Healthcare", "Industrials", "Real Estate", "Technology", "Utilities"], index=0)
-
-st.sidebar.markdown("### 1. Temel Filtreler")
-pe_ratio = st.sidebar.selectbox("F/K", ["Any", "Low (<15)", "Profitable (<0)", "High (>50)", "Under 20", "Under 30", "Over 20"], index=0)
-peg_ratio = st.sidebar.selectbox("PEG", ["Any", "Low (<1)", "Under 2", "High (>3)"], index=0)
-roe = st.sidebar.selectbox("ROE", ["Any", "Positive (>0%)", "High (>15%)", "Very High (>20%)"], index=0)
-debt_eq = st.sidebar.selectbox("Borç/Özkaynak", ["Any", "Low (<0.1)", "Under 0.5", "Under 1", "High (>1)"], index=0)
-
-st.sidebar.markdown("### 2. Teknik Filtreler")
-rsi_filter = st.sidebar.selectbox("RSI", ["Any", "Oversold (<30)", "Overbought (>70)", "Neutral (40-60)"], index=0)
-price_ma = st.sidebar.selectbox("Fiyat vs MA200", ["Any", "Above SMA200", "Below SMA200"], index=0)
-
-# --- YARDIMCI: GOOGLE TRANSLATE ---
-@st.cache_data(show_spinner=False)
-def translate_to_turkish(text):
-    if text == "Bulunamadı" or not text: return text
-    try:
-        url = "https://translate.googleapis.com/translate_a/single"
-        params = {"client": "gtx", "sl": "en", "tl": "tr", "dt": "t", "q": text}
-        r = requests.get(url, params=params, timeout=3)
-        if r.status_code == 200:
-            result = r.json()
-            full_translation = ""
-            for sentence in result[0]:
-                if sentence[0]: full_translation += sentence[0]
-            return full_translation
-    except: pass
-    return text
-
-# --- YARDIMCI FONKSİYONLAR ---
-def find_value_in_df(df, keywords):
-    if df is None or df.empty: return None
-    # İndeksleri string'e çevirip küçük harf yap
-    df.index = df.index.map(str).str.lower()
-    for k in keywords:
-        k_lower = k.lower()
-        matches = [idx for idx in df.index if k_lower in idx]
-        if matches:
-            try:
-                val = df.loc[matches[0]]
-                if isinstance(val, pd.Series): return val.iloc[0]
-                return val
-            except: continue
-    return None
-
-def format_currency(val):
-    if val is None: return "-"
-    abs_val = abs(val)
-    if abs_val >= 1e9: return f"${val/1e9:.2f} Milyar"
-    if abs_val >= 1e6: return f"${val/1e6:.2f} Milyon"
-    return f"${val:,.2f}"
-
-# --- ANALİZ MOTORU 1: HABER ÖZETİ ---
-def generate_news_summary(news_list):
-    if not news_list: return "Yorumlanacak güncel haber akışı bulunamadı.", "gray"
-    score = 0
-    pos_keywords = ['beat', 'surge', 'jump', 'gain', 'profit', 'growth', 'positive', 'up', 'high', 'partnership', 'expand', 'launch', 'approve', 'buy', 'dividend', 'strong', 'reaffirm', 'tops', 'broke out', 'climbs']
-    neg_keywords = ['miss', 'fall', 'drop', 'loss', 'down', 'decline', 'negative', 'low', 'lawsuit', 'investigation', 'cut', 'fail', 'weak', 'risk', 'compliance', 'plunges']
-    titles = " ".join([n['Title'].lower() for n in news_list])
-    for word in pos_keywords:
-        if word in titles: score += 1
-    for word in neg_keywords:
-        if word in titles: score -= 1
-    if score > 1: return "Son dönemdeki haber akışı ağırlıklı olarak **POZİTİF**. Büyüme ve beklenti üzeri sonuçlar öne çıkıyor.", "green"
-    elif score < -1: return "Son dönemdeki haber akışı ağırlıklı olarak **NEGATİF**. Düşüş ve risk unsurları dikkat çekiyor.", "red"
-    else: return "Haber akışı **DENGELİ/NÖTR** seyrediyor.", "blue"
-
-# --- ANALİZ MOTORU 2: DEDEKTİF ---
-@st.cache_data(ttl=1800) 
-def generate_skeptic_analysis(ticker):
-    analysis = []
-    # v46/v47 gibi korumalı
-    try:
-        stock = yf.Ticker(ticker)
-        inc = stock.income_stmt
-        if inc is None or inc.empty: return ["Finansal detay verisi sağlanamadı."]
-        if inc.shape[1] > 1:
-            curr_rev = find_value_in_df(inc.iloc[:, 0], ['total revenue', 'revenue'])
-            prev_rev = find_value_in_df(inc.iloc[:, 1], ['total revenue', 'revenue'])
-            curr_net = find_value_in_df(inc.iloc[:, 0], ['net income'])
-            prev_net = find_value_in_df(inc.iloc[:, 1], ['net income'])
-            
-            if curr_rev and prev_rev and curr_rev < prev_rev:
-                if curr_net and prev_net and curr_net > prev_net:
-                    analysis.append("✂️ **Kemer Sıkma:** Ciro düşerken Net Kâr artmış. Küçülerek kâr ediliyor.")
-            
-            if curr_rev and prev_rev and curr_rev > (prev_rev * 1.20):
-                if curr_net and curr_net < 0:
-                    analysis.append("🚀 **Büyüme Sancısı:** Ciro hızla artıyor (%20+) ancak şirket zarar ediyor.")
-    except Exception: return ["Dedektif analizi atlandı."]
-    return analysis
-
-# --- ANALİZ MOTORU 3: SÖZEL FİNANSAL ANALİZ ---
-@st.cache_data(ttl=3600)
-def generate_verbal_financial_analysis(ticker):
-    analysis = []
-    try:
-        stock = yf.Ticker(ticker)
-        inc = stock.income_stmt
-        bs = stock.balance_sheet
-        if not inc.empty and not bs.empty:
-            curr_inc = inc.iloc[:, 0]
-            curr_bs = bs.iloc[:, 0]
-            rev = find_value_in_df(curr_inc, ['total revenue', 'revenue'])
-            gp = find_value_in_df(curr_inc, ['gross profit'])
-            if rev and gp:
-                margin = (gp / rev) * 100
-                desc = "Çok Yüksek" if margin > 70 else ("Sağlıklı" if margin > 40 else "Düşük")
-                analysis.append(f"📊 **Gelir Yapısı:** Ciro **{format_currency(rev)}**, Brüt Kâr **{format_currency(gp)}**. Marj: **%{margin:.1f}** ({desc}).")
-            net = find_value_in_df(curr_inc, ['net income'])
-            if net:
-                if net > 0: analysis.append(f"💰 **Net Kârlılık:** **{format_currency(net)}** net kâr (Pozitif).")
-                else: analysis.append(f"⚠️ **Kârlılık:** **{format_currency(net)}** net zarar.")
-            op_inc = find_value_in_df(curr_inc, ['operating income', 'operating profit', 'ebit'])
-            if op_inc: analysis.append(f"⚙️ **Operasyonel Güç:** Faaliyet Kârı **{format_currency(op_inc)}**.")
-            cash = find_value_in_df(curr_bs, ['cash', 'cash and cash equivalents']) or 0
-            debt = find_value_in_df(curr_bs, ['total debt', 'long term debt']) or 0
-            analysis.append(f"🛡️ **Bilanço:** Nakit: **{format_currency(cash)}** | Borç: **{format_currency(debt)}**.")
-            if cash > debt: analysis.append(f"✅ **Nakit Zengini:** Net Nakit Pozisyonu (**{format_currency(cash-debt)}**).")
-            else: analysis.append(f"⚡ **Borçluluk:** Borçlar nakitten fazla.")
-        else: analysis.append("Finansal veriler eksik.")
-    except Exception: return ["Veri çekilemedi."]
-    return analysis
-
-# --- HABER & PROFİL MOTORU (GOOGLE DESTEKLİ) ---
-@st.cache_data(ttl=1800)
-def get_combined_news_profile(ticker, finviz_row):
-    """Finviz -> Yahoo -> Google News Zinciri"""
-    data = {"Profile": "Bulunamadı", "News": []}
-    
-    # 1. Google News (En Güvenilir Haber Kaynağı - RSS)
-    try:
-        # RSS Feed URL (Engel yemez)
-        rss_url = f"https://news.google.com/rss/search?q={ticker}+stock&hl=en-US&gl=US&ceid=US:en"
-        r = requests.get(rss_url, timeout=3)
-        if r.status_code == 200:
-            soup = BeautifulSoup(r.content, features='xml')
-            items = soup.findAll('item')
-            for item in items[:8]:
-                title = item.title.text
-                link = item.link.text
-                pub_date = item.pubDate.text[:16] # Tarihi kısalt
-                data["News"].append({"Date": pub_date, "Title": title, "Link": link})
-    except: pass
-
-    # 2. Profil Çekme (Finviz)
-    try:
-        url = f"https://finviz.com/quote.ashx?t={ticker}"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        r = requests.get(url, headers=headers, timeout=2)
-        if r.status_code == 200:
-            soup = BeautifulSoup(r.text, 'html.parser')
-            profile_td = soup.find("td", class_="fullview-profile")
-            if profile_td: 
-                raw_profile = profile_td.get_text(strip=True)
-                data["Profile"] = translate_to_turkish(raw_profile)
-    except: pass
-
-    # 3. Profil Bulunamadıysa Manuel Oluştur
-    if data["Profile"] == "Bulunamadı":
-        try:
-            sec = finviz_row['Sector']
-            ind = finviz_row['Industry']
-            cnt = finviz_row['Country']
-            data["Profile"] = f"Bu şirket **{sec}** sektöründe ve **{ind}** endüstrisinde faaliyet göstermektedir. Şirket merkezi **{cnt}** ülkesindedir."
-        except: pass
-        
-    return data
-
-# --- METRİKLER VE TEKNİK (ZORLA HESAPLAMA) ---
-def fetch_robust_metrics(ticker):
-    metrics = {'EV/EBITDA': None, 'FCF': None, 'Source': '-'}
-    ocf = 0
-    try:
-        stock = yf.Ticker(ticker)
-        
-        # 1. FCF (Önceki mantık)
-        try:
-            cf = stock.cashflow
-            if not cf.empty:
-                curr_cf = cf.iloc[:, 0]
-                ocf = find_value_in_df(curr_cf, ['operating', 'operating cash flow']) or 0
-                capex = find_value_in_df(curr_cf, ['capital', 'capital expenditure']) or find_value_in_df(curr_cf, ['purchase', 'property']) or 0
-                if ocf != 0: metrics['FCF'] = ocf - abs(capex)
-        except: pass
-        if metrics['FCF'] is None: 
-            metrics['FCF'] = stock.info.get('freeCashflow')
-            if metrics['FCF'] and ocf == 0: ocf = metrics['FCF']
-
-        # 2. EV/EBITDA (ZORLA HESAPLAMA)
-        
-        # A) Hazır Veri
-        ev_ebitda_info = stock.info.get('enterpriseToEbitda')
-        if ev_ebitda_info and ev_ebitda_info > 0:
-            metrics['EV/EBITDA'] = ev_ebitda_info
-            metrics['Source'] = 'Yahoo Info'
-            return metrics
-
-        # B) Manuel (Boşlukları 0 Kabul Et)
-        mcap = stock.fast_info.get('market_cap')
-        if mcap:
-            ev_calc = mcap
-            debt = 0
-            cash = 0
-            
-            # Borç/Nakit Çek (Hata verirse 0 kalır)
-            try:
-                bs = stock.balance_sheet
-                if not bs.empty:
-                    curr_bs = bs.iloc[:, 0]
-                    debt = find_value_in_df(curr_bs, ['total debt', 'long term debt']) or 0
-                    cash = find_value_in_df(curr_bs, ['cash', 'equivalents']) or 0
-            except: pass
-            
-            ev_calc = mcap + debt - cash
-            
-            # EBITDA Çek
-            ebitda_calc = 0
-            try:
-                inc = stock.income_stmt
-                if not inc.empty:
-                    ebitda_calc = find_value_in_df(inc.iloc[:, 0], ['ebitda', 'normalized ebitda'])
-                    if ebitda_calc is None:
-                        op_inc = find_value_in_df(inc.iloc[:, 0], ['operating income', 'ebit']) or 0
-                        dep = 0 # Amortismanı bulamazsan boşver
-                        ebitda_calc = op_inc + dep
-            except: pass
-            
-            # Son Çare Proxy: OCF
-            if (ebitda_calc is None or ebitda_calc == 0) and ocf != 0:
-                ebitda_calc = ocf
-                metrics['Source'] = 'EV/OCF (Yaklaşık)'
-            elif ebitda_calc:
-                metrics['Source'] = 'Bilanço (Tahmini)'
-
-            # SON HESAP (Sıfıra bölme koruması)
-            if ev_calc > 0 and ebitda_calc and ebitda_calc > 0:
-                metrics['EV/EBITDA'] = ev_calc / ebitda_calc
-            elif ebitda_calc and ebitda_calc < 0:
-                metrics['EV/EBITDA'] = 0
-                metrics['Source'] = 'Zarar (Negatif)'
-            elif ebitda_calc == 0:
-                metrics['EV/EBITDA'] = 0
-                metrics['Source'] = 'Veri Yok'
-                
-    except Exception: pass
-    return metrics
-
-def calculate_ta(df):
-    df = df.copy()
-    df['MA50'] = df['Close'].rolling(50).mean()
-    df['MA200'] = df['Close'].rolling(200).mean()
-    delta = df['Close'].diff(); gain = (delta.where(delta > 0, 0)).rolling(14).mean(); loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-    rs = gain / loss; df['RSI'] = 100 - (100 / (1 + rs))
-    df['Log_Ret'] = np.log(df['Close'] / df['Close'].shift(1))
-    df['Volatility'] = df['Log_Ret'].rolling(30).std() * np.sqrt(252) * 100
-    rolling_max = df['Close'].expanding().max(); df['Drawdown'] = (df['Close'] - rolling_max) / rolling_max * 100
-    return df
-
-def generate_technical_synthesis(hist):
-    if hist.empty: return "Veri Yetersiz."
-    last = hist.iloc[-1]; curr = last['Close']; ma200 = last['MA200']; rsi = last['RSI']; dd = last['Drawdown']
-    trend_txt = "Veri Yetersiz."
-    if pd.notna(ma200):
-        if curr > ma200: trend_txt = "Hisse, uzun vadeli hareketli ortalamasının (MA200) üzerinde seyrederek ana yönün **Yükseliş (Boğa)** trendinde olduğunu teyit etmektedir."
-        else: trend_txt = "Hisse, 200 günlük ortalamasının altında fiyatlanarak **Düşüş (Ayı)** trendi baskısı altındadır."
-    mom_txt = f"Momentum RSI: **{rsi:.0f}**."
-    risk_txt = f" Zirveden düşüş **%{abs(dd):.1f}**."
-    return f"{trend_txt} {mom_txt} {risk_txt}"
-
-def generate_holistic_report(ticker, finviz_row, metrics, hist):
-    last = hist.iloc[-1]; curr = last['Close']; ma200 = last['MA200']; evebitda = metrics.get('EV/EBITDA'); fcf = metrics.get('FCF')
-    is_uptrend = curr > (ma200 if pd.notna(ma200) else 0)
-    valuation = "Bilinmiyor"
-    if evebitda is not None:
-        if evebitda == 0: valuation = "Negatif/Zarar/Bilinmiyor"
-        elif evebitda < 12: valuation = "Ucuz"
-        elif evebitda <= 20: valuation = "Makul"
-        else: valuation = "Pahalı"
-    sentiment = "NÖTR"; color = "blue"; reason = "Veri yetersiz."
-    if is_uptrend:
-        if valuation == "Ucuz": sentiment = "GÜÇLÜ ALIM"; color = "green"; reason = "Trend Yukarı + EV/EBITDA < 12"
-        elif valuation == "Makul": sentiment = "KALİTELİ TREND"; color = "green"; reason = "Trend Yukarı + EV/EBITDA 12-20"
-        elif valuation == "Pahalı": sentiment = "MOMENTUM (Pahalı)"; color = "orange"; reason = "Trend Yukarı + EV/EBITDA > 20"
-        else: sentiment = "SPEKÜLATİF"; color = "blue"; reason = "Trend Yukarı (Değerleme Belirsiz)"
-    else:
-        if valuation == "Ucuz": sentiment = "DEĞER YATIRIMI"; color = "blue"; reason = "Trend Aşağı + EV/EBITDA < 10"
-        elif valuation == "Pahalı": sentiment = "SAT / UZAK DUR"; color = "red"; reason = "Hem düşüşte hem pahalı."
-        else: sentiment = "ZAYIF GÖRÜNÜM"; color = "red"
-    
-    st.markdown(f"#### 🏛️ Yönetici Özeti: :{color}[{sentiment}]")
-    st.info(f"**Gerekçe:** {reason}")
-    
-    st.markdown("---")
-    c1, c2 = st.columns(2)
-    with c1:
-        st.markdown("**📉 Teknik Göstergeler**")
-        st.write(f"• **Trend:** {'Yükseliş (Boğa)' if is_uptrend else 'Düşüş (Ayı)'}")
-        st.write(f"• **RSI (14):** {last['RSI']:.0f}")
-        st.write(f"• **Volatilite:** %{last['Volatility']:.1f}")
-        st.write(f"• **Max Drawdown:** %{last['Drawdown']:.1f}")
-    
-    with c2:
-        st.markdown("**💰 Temel Göstergeler**")
-        val_str = f"{evebitda:.2f}" if evebitda is not None else "-"
-        src_str = f"({metrics['Source']})" if evebitda is not None else ""
-        st.write(f"• **EV/EBITDA:** {val_str} {src_str}")
-        fcf_str = f"${fcf/1e9:.2f}B" if fcf else "-"
-        st.write(f"• **FCF (Nakit):** {fcf_str}")
-        st.write(f"• **F/K:** {finviz_row.get('P/E', '-')}")
-    st.markdown("---")
-
-# --- FİNVİZ TARAYICI ---
-def get_finviz_v48(limit_count, exc, sec, pe, peg, roe_val, de, rsi_val, ma_val):
-    filters = []
-    if exc != "Any": filters.append(f"exch_{exc.lower()}")
-    sec_map = {"Basic Materials": "sec_basicmaterials", "Communication Services": "sec_communicationservices", "Consumer Cyclical": "sec_consumercyclical", "Consumer Defensive": "sec_consumerdefensive", "Energy": "sec_energy", "Financial": "sec_financial", "Healthcare": "sec_healthcare", "Industrials": "sec_industrials", "Real Estate": "sec_realestate", "Technology": "sec_technology", "Utilities": "sec_utilities"}
-    if sec != "Any": filters.append(f"{sec_map[sec]}")
-    pe_map = {"Low (<15)": "fa_pe_u15", "Profitable (<0)": "fa_pe_profitable", "High (>50)": "fa_pe_o50", "Under 20": "fa_pe_u20", "Under 30": "fa_pe_u30", "Over 20": "fa_pe_o20"}
-    if pe in pe_map: filters.append(pe_map[pe])
-    peg_map = {"Low (<1)": "fa_peg_u1", "Under 2": "fa_peg_u2", "High (>3)": "fa_peg_o3"}
-    if peg in peg_map: filters.append(peg_map[peg])
-    roe_map = {"Positive (>0%)": "fa_roe_pos", "High (>15%)": "fa_roe_o15", "Very High (>20%)": "fa_roe_o20"}
-    if roe_val in roe_map: filters.append(roe_map[roe_val])
-    de_map = {"Low (<0.1)": "fa_debteq_u0.1", "Under 0.5": "fa_debteq_u0.5", "Under 1": "fa_debteq_u1", "High (>1)": "fa_debteq_o1"}
-    if de in de_map: filters.append(de_map[de])
-    if rsi_val == "Oversold (<30)": filters.append("ta_rsi_os30")
-    elif rsi_val == "Overbought (>70)": filters.append("ta_rsi_ob70")
-    elif rsi_val == "Neutral (40-60)": filters.append("ta_rsi_n4060")
-    if ma_val == "Above SMA200": filters.append("ta_sma200_pa")
-    elif ma_val == "Below SMA200": filters.append("ta_sma200_pb")
-    
-    base_url = f"https://finviz.com/screener.ashx?v=111&f={','.join(filters)}"
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    all_dfs = []
-    prog_bar = st.progress(0)
-    pages = range(1, limit_count + 1, 20)
-    for i, start_row in enumerate(pages):
-        try:
-            r = requests.get(f"{base_url}&r={start_row}", headers=headers, timeout=10)
-            soup = BeautifulSoup(r.text, 'html.parser')
-            target = None
-            for t in soup.find_all('table'):
-                rows = t.find_all('tr')
-                if len(rows) > 1:
-                    txt = rows[0].get_text()
-                    if 'No.' in txt and 'Ticker' in txt and 'Price' in txt: target = t; break
-            if target:
-                data = []
-                head = ["No.", "Ticker", "Company", "Sector", "Industry", "Country", "Market Cap", "P/E", "Price", "Change", "Volume"]
-                for row in target.find_all('tr')[1:]:
-                    cols = [c.get_text(strip=True) for c in row.find_all('td')]
-                    if len(cols) >= 11: data.append(cols[:11])
-                if data: all_dfs.append(pd.DataFrame(data, columns=head))
-            else: break
-            time.sleep(0.5)
-            prog_bar.progress((i + 1) / len(pages))
-        except: break
-    prog_bar.empty()
-    if all_dfs: return pd.concat(all_dfs).drop_duplicates(subset=['Ticker']).reset_index(drop=True), base_url
-    return pd.DataFrame(), base_url
-
-# --- UI AKIŞI ---
-if st.sidebar.button("Analizi Başlat"):
-    with st.spinner("Piyasa taranıyor..."):
-        df, url = get_finviz_v48(scan_limit, exchange, sector, pe_ratio, peg_ratio, roe, debt_eq, rsi_filter, price_ma)
+# --- TANILAMA (İSTEĞE BAĞLI, SÜREÇ GENELİ) ---
+# Bayrak oturuma değil sürece aittir: sayaçlar arka plan iş parçacıklarını da içerir, oturuma bölünemez
+run_start = time.perf_counter()
+profiler = diagnostics.Profiler().start() if st.session_state.pop('profile_next', False) else None
+# Gövde hata, st.stop ya da st.rerun ile kesilse de profil durdurulur (rapor sonraki çalıştırmada gösterilir)
+try:
+    _cache_tls = threading.local()
+
+    def counted_cache(name, **cache_kwargs):
+        """st.cache_data + isabet/ıska sayacı: sarılan gövde yalnız ıskada çalışır."""
+        def deco(fn):
+            @functools.wraps(fn)
+            def on_miss(*args, **kwargs):
+                _cache_tls.missed = True
+                return fn(*args, **kwargs)
+            cached = st.cache_data(**cache_kwargs)(on_miss)
+            @functools.wraps(fn)
+            def call(*args, **kwargs):
+                if not diagnostics.ENABLED: return cached(*args, **kwargs)
+                _cache_tls.missed = False
+                with diagnostics.span(f"cache.{name}"): result = cached(*args, **kwargs)
+                diagnostics.cache_event(name, "miss" if _cache_tls.missed else "hit")
+                return result
+            call.clear = cached.clear
+            return call
+        return deco
+
+    # --- YAN MENÜ ---
+    st.sidebar.header("🔍 Filtreleme Paneli")
+    local_mode = st.sidebar.toggle("Yerel Tarama (Önbellekli Evren)", value=False, help="Filtreler, tüm evrenin yerel anlık görüntüsü üzerinde ağsız uygulanır.")
+    limit_opts = {20: 1, 40: 2, 60: 3, 100: 5}
+    if local_mode: limit_opts.update({250: None, 500: None, 1000: None})
+    scan_limit = st.sidebar.selectbox("Evren Genişliği", list(limit_opts.keys()), index=2)
+
+    exchange = st.sidebar.selectbox("Borsa", ["Any", "AMEX", "NASDAQ", "NYSE"], index=0)
+    sector = st.sidebar.selectbox("Sektör", ["Any", "Basic Materials", "Communication Services", "Consumer Cyclical", "Consumer Defensive", "Energy", "Financial", "Healthcare", "Industrials", "Real Estate", "Technology", "Utilities"], index=0)
+
+    st.sidebar.markdown("### 1. Temel Filtreler")
+    pe_ratio = st.sidebar.selectbox("F/K", ["Any", "Low (<15)", "Profitable (<0)", "High (>50)", "Under 20", "Under 30", "Over 20"], index=0)
+    peg_ratio = st.sidebar.selectbox("PEG", ["Any", "Low (<1)", "Under 2", "High (>3)"], index=0)
+    roe = st.sidebar.selectbox("ROE", ["Any", "Positive (>0%)", "High (>15%)", "Very High (>20%)"], index=0)
+    debt_eq = st.sidebar.selectbox("Borç/Özkaynak", ["Any", "Low (<0.1)", "Under 0.5", "Under 1", "High (>1)"], index=0)
+
+    st.sidebar.markdown("### 2. Teknik Filtreler")
+    rsi_filter = st.sidebar.selectbox("RSI", ["Any", "Oversold (<30)", "Overbought (>70)", "Neutral (40-60)"], index=0)
+    price_ma = st.sidebar.selectbox("Fiyat vs MA200", ["Any", "Above SMA200", "Below SMA200"], index=0)
+
+    # Yerel modda Finviz kovalarının ötesinde özel eşikler (0 = kapalı)
+    custom_ranges = {}
+    if local_mode:
+        with st.sidebar.expander("Özel Eşikler (Yerel)"):
+            pe_max = st.number_input("F/K üst sınır", min_value=0.0, value=0.0, step=1.0)
+            roe_min = st.number_input("ROE alt sınır (%)", value=0.0, step=1.0)
+            de_max = st.number_input("Borç/Özkaynak üst sınır", min_value=0.0, value=0.0, step=0.1)
+            rsi_lo, rsi_hi = st.slider("RSI aralığı", 0, 100, (0, 100))
+        if pe_max: custom_ranges['P/E'] = (None, pe_max)
+        if roe_min: custom_ranges['ROE'] = (roe_min, None)
+        if de_max: custom_ranges['Debt/Eq'] = (None, de_max)
+        if (rsi_lo, rsi_hi) != (0, 100): custom_ranges['RSI'] = (rsi_lo, rsi_hi)
+
+    detail_budget = st.sidebar.slider("Detay Süre Bütçesi (sn)", 1.0, 15.0, DETAIL_BUDGET, 0.5, help="Detay görünümü en fazla bu kadar bekler; yetişmeyen kaynaklar işaretlenir ve gelince sayfa yenilenir.")
+    diag_box = st.sidebar.container()
+    # Anahtar her çalıştırmada süreç bayrağıyla eşitlenir (başka oturum değiştirmiş olabilir); yalnız kullanıcı değiştirince uygulanır
+    st.session_state.diag_enabled = diagnostics.ENABLED
+    diag_box.toggle("🩺 Tanılama Paneli (tüm oturumlar)", key='diag_enabled', on_change=lambda: diagnostics.enable(st.session_state.diag_enabled),
+                    help="Süreç geneli ayar: aşama süreleri, HTTP ve önbellek sayaçları bu sunucudaki tüm oturumlar için birlikte açılır ve birlikte sayılır. Kapalıyken ölçüm yapılmaz.")
+
+    # --- YARDIMCI: GOOGLE TRANSLATE ---
+    @st.cache_resource
+    def get_translator():
+        """Cümle bazlı, diskte kalıcı çeviri önbelleği; toplu isteklerle çalışır."""
+        return Translator()
+
+    def translate_to_turkish(text):
+        if text == "Bulunamadı" or not text: return text
+        return get_translator().translate(text)
+
+    # --- TEMEL VERİ (TEK ANLIK GÖRÜNTÜ) ---
+    # Süreç içi st.cache_data kısa tutulur; asıl süre ortak katmanda (süreçler arası, bayatken arka planda yenilenir)
+    LOCAL_TTL = 300
+
+    @counted_cache("fundamentals", ttl=LOCAL_TTL, show_spinner=False)
+    # Ad alanı sürümü: FundamentalsSnapshot'a alan eklenince eski pickle'lar (ör. errors'suz) okunmaz
+    @shared_cache.shared("fundamentals:v2", ttl=1800, stale_ttl=6 * 3600, valid=lambda snap: not snap.errors)
+    def get_fundamentals(ticker):
+        """Tablolar + info tek seferde çekilir; üç motor aynı anlık görüntüyü okur."""
+        return FundamentalsSnapshot.fetch(ticker)
+
+    # --- ANALİZ MOTORU 2: DEDEKTİF ---
+    def generate_skeptic_analysis(snap):
+        return skeptic_analysis(snap)
+
+    # --- ANALİZ MOTORU 3: SÖZEL FİNANSAL ANALİZ ---
+    def generate_verbal_financial_analysis(snap):
+        return verbal_financial_analysis(snap)
+
+    # --- HABER & PROFİL MOTORU (GOOGLE DESTEKLİ) ---
+    def get_combined_news_profile(ticker, finviz_row):
+        """Google News RSS + Finviz profil eşzamanlı; tarama sonrası ön yüklenmişse anında döner, yavaş isteğe kopya gönderilir."""
+        return get_news_profile(ticker, finviz_row, get_translator().translate_many, hedge_after=HEDGE_AFTER)
+
+    # --- METRİKLER VE TEKNİK (ZORLA HESAPLAMA) ---
+    def fetch_robust_metrics(snap):
+        return robust_metrics(snap)
+
+    @st.cache_resource
+    def get_price_store():
+        return PriceStore()
+
+    @st.cache_resource
+    def get_prefetcher():
+        """Tarama sonrası ilk hisselerin temel verisi ve fiyat geçmişi arka planda ısıtılır (haber: prefetch_news_profiles).
+
+        İşçiler ve hız sınırı süreçte ortak; kuyruk durumu oturum başına (session_id).
+        """
+        return PrefetchScheduler({'history': lambda t, row: get_price_store().history(t),
+                                  'fundamentals': lambda t, row: get_fundamentals(t)})
+
+    @st.cache_resource
+    def get_panel_store():
+        return PanelStore()
+
+    @shared_cache.shared("universe_ta", ttl=1800, stale_ttl=3600)
+    def fetch_universe_ta(tickers):
+        # Kesitsel analizlerle aynı ortak panel: yalnız panelde olmayan hisseler indirilir, yenilemede yalnız yeni günler
+        panel = get_panel_store().panel(tickers)
+        have = set(panel.tickers)
+        names = [t for t in tickers if t in have]  # indirilemeyen hisse satırsız kalır
+        return universe_ta_summary(names, panel.window('Close', None, names).T)
+
+    @counted_cache("universe_ta", ttl=LOCAL_TTL, show_spinner=False)
+    def get_universe_ta(tickers):
+        """Taranan tüm hisseler için tek yf.download + tek vektörel gösterge geçişi (hata ortak katmana yazılmaz)."""
+        try: return fetch_universe_ta(tickers)
+        except Exception: return pd.DataFrame()
+
+    def get_news_tone(tickers):
+        """Ön yüklenmiş haberlerden ton sütunu; başlık skorları önbellekte, henüz gelmeyenler boş."""
+        # Önbellekte olmayanlar tek sorguda okunur (satır başına bağlantı açılmaz)
+        news = {t: d['News'] for t, d in cached_news_profiles(tickers).items() if d}
+        scores = score_universe(news)
+        return pd.DataFrame({'Ticker': list(tickers), 'Haber Tonu': [tone(scores.get(t))[0] for t in tickers]})
+
+    @counted_cache("cross_section", ttl=LOCAL_TTL, max_entries=8, show_spinner=False)
+    def get_cross_section(tickers):
+        """Evren paneli üzerinde (özet, korelasyon); panel henüz boşsa None."""
+        panel = get_panel_store().panel(tickers)
+        return cross_section_summary(panel) if len(panel) > 1 else None
+
+    @counted_cache("beta_series", ttl=LOCAL_TTL, max_entries=64, show_spinner=False)
+    def get_beta_series(tickers, ticker):
+        return beta_series(get_panel_store().panel(tickers), ticker)
+
+    @counted_cache("chart", max_entries=64, show_spinner=False)
+    def get_price_figure(ticker, period, last_bar, n_bars, last_row_hash, _hist):
+        """(hisse, dönem, son bar) başına bir kez kurulur; yeni bar ya da gün içi güncellenen son bar anahtarı değiştirir."""
+        return build_price_figure(_hist, ticker, period)
+
+    # --- DETAY KAYNAKLARI (SÜRE BÜTÇELİ) ---
+    @st.cache_resource
+    def get_orchestrator():
+        return DetailOrchestrator()
+
+    def gather_detail(ticker, finviz_row, budget):
+        """Fiyat geçmişi, finansal tablolar ve haber/profil paralel; toplam bekleme en fazla `budget` sn."""
+        sources = detail_sources(ticker, finviz_row, get_price_store().history, get_fundamentals, get_combined_news_profile)
+        return get_orchestrator().gather(ticker, sources, budget)
+
+    def detail_notes(ticker, detail):
+        """Eksik parçalar kaynağıyla; kısmi hatalı temel veri bir sonraki çalıştırmada yeniden çekilir."""
+        notes = [r.describe() for r in detail.values() if not r.ok]
+        snap = detail['fundamentals'].value
+        if snap is not None and snap.errors:
+            notes += [f"⚠️ Finansal tablolar (Yahoo) · {part}: alınamadı ({err})" for part, err in snap.errors.items()]
+            get_fundamentals.clear(ticker)
+        news = detail['news'].value
+        if news is not None: notes += [f"⚠️ {src}: alınamadı ({err})" for src, err in news.get('Errors', {}).items()]
+        return notes
+
+    @st.fragment(run_every=1.0)
+    def await_pending(ticker, names):
+        """Bekleyen kaynaklar bitince sayfa yeniden çalışır; eksik parçalar önbellekten dolar."""
+        if get_orchestrator().settled(ticker, names): st.rerun()
+
+    def generate_technical_synthesis(hist):
+        if hist.empty: return "Veri Yetersiz."
+        last = hist.iloc[-1]; curr = last['Close']; ma200 = last['MA200']; rsi = last['RSI']; dd = last['Drawdown']
+        trend_txt = "Veri Yetersiz."
+        if pd.notna(ma200):
+            if curr > ma200: trend_txt = "Hisse, uzun vadeli hareketli ortalamasının (MA200) üzerinde seyrederek ana yönün **Yükseliş (Boğa)** trendinde olduğunu teyit etmektedir."
+            else: trend_txt = "Hisse, 200 günlük ortalamasının altında fiyatlanarak **Düşüş (Ayı)** trendi baskısı altındadır."
+        mom_txt = f"Momentum RSI: **{rsi:.0f}**."
+        risk_txt = f" Zirveden düşüş **%{abs(dd):.1f}**."
+        return f"{trend_txt} {mom_txt} {risk_txt}"
+
+    # --- KARAR TABLOSU (TÜM EVREN) ---
+    DECISION_VIEW_COLUMNS = ['Decision', 'Valuation', 'Reason', 'EV/EBITDA', 'FCF', 'Close', 'MA200', 'RSI']
+
+    def build_decision_table(df, ta_df):
+        """Taranan evren tek geçişte sınıflanır: kapanış/MA200/RSI evren panelinden, EV/EBITDA ve FCF
+        toplu rapordan; bu oturumda detayı açılan hisselerin güncel değerleri bunların üzerine yazılır."""
+        inputs = pd.DataFrame({'Ticker': df['Ticker'].to_numpy()})
+        if not ta_df.empty:
+            panel = ta_df[['Ticker', 'Kapanış', 'MA200 Seviye', 'RSI (14)']].rename(columns={'Kapanış': 'Close', 'MA200 Seviye': 'MA200', 'RSI (14)': 'RSI'})
+            inputs = inputs.merge(panel, on='Ticker', how='left')
+        batch_df = load_reports()
+        if not batch_df.empty:
+            inputs = inputs.merge(batch_df[['Ticker', 'EV/EBITDA', 'FCF']].drop_duplicates('Ticker', keep='last'), on='Ticker', how='left')
+        inputs = inputs.set_index('Ticker').reindex(columns=['Close', 'MA200', 'RSI', 'EV/EBITDA', 'FCF']).astype(float)
+        viewed = pd.DataFrame.from_dict({t: v for t, v in st.session_state.decision_inputs.items() if t in inputs.index}, orient='index')
+        if not viewed.empty: inputs.loc[viewed.index, viewed.columns] = viewed.astype(float)
+        return classify_frame(inputs)
+
+    def generate_holistic_report(ticker, finviz_row, metrics, hist, verdict):
+        """verdict: build_decision_table sonucundaki hisse satırı."""
+        last = hist.iloc[-1]; evebitda = metrics.get('EV/EBITDA'); fcf = metrics.get('FCF')
+        is_uptrend, sentiment, color, reason = verdict['Trend'], verdict['Decision'], verdict['Color'], verdict['Reason']
+
+        st.markdown(f"#### 🏛️ Yönetici Özeti: :{color}[{sentiment}]")
+        st.info(f"**Gerekçe:** {reason}")
+
+        st.markdown("---")
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown("**📉 Teknik Göstergeler**")
+            st.write(f"• **Trend:** {'Yükseliş (Boğa)' if is_uptrend else 'Düşüş (Ayı)'}")
+            st.write(f"• **RSI (14):** {last['RSI']:.0f}")
+            st.write(f"• **Volatilite:** %{last['Volatility']:.1f}")
+            st.write(f"• **Max Drawdown:** %{last['Drawdown']:.1f}")
+
+        with c2:
+            st.markdown("**💰 Temel Göstergeler**")
+            val_str = f"{evebitda:.2f}" if evebitda is not None else "-"
+            src_str = f"({metrics['Source']})" if evebitda is not None else ""
+            st.write(f"• **EV/EBITDA:** {val_str} {src_str}")
+            fcf_str = f"${fcf/1e9:.2f}B" if fcf else "-"
+            st.write(f"• **FCF (Nakit):** {fcf_str}")
+            pe_val = finviz_row.get('P/E')
+            st.write(f"• **F/K:** {f'{pe_val:.2f}' if pd.notna(pe_val) else '-'}")
+        st.markdown("---")
+
+    # --- FİNVİZ TARAYICI ---
+    @st.cache_resource
+    def get_universe_store():
+        return UniverseStore()
+
+    def get_finviz_v48(limit_count, exc, sec, pe, peg, roe_val, de, rsi_val, ma_val, rate=FINVIZ_RATE, burst=FINVIZ_BURST, workers=FINVIZ_WORKERS):
+        """Aynı filtreli tarama süreçler arası paylaşılır; bayat sonuç arka planda (ilerleme çubuksuz) yenilenir."""
+        args = (limit_count, exc, sec, pe, peg, roe_val, de, rsi_val, ma_val)
+        scan = functools.partial(finviz.get_finviz_v48, *args, rate=rate, burst=burst, workers=workers)
+        prog_bar = st.progress(0)
+        cache = shared_cache.get_cache()
+        # Boş sonuç (engellenmiş/erişilemeyen Finviz) paylaşılmaz
+        result = cache.get_or_fetch(cache.key("finviz", *args), lambda: scan(on_progress=prog_bar.progress), ttl=900, stale_ttl=3600,
+                                    refresh=scan, cache_name="finviz", valid=lambda r: not r[0].empty)
+        prog_bar.empty()
+        return result
+
+    # --- UI AKIŞI ---
+    def set_universe(df, url=None):
         st.session_state.scan_data = df
         st.session_state.url = url
+        # Yeni evren eski ön yükleme kuyruğunu iptal eder; haber/profil tüm liste için arka planda ısıtılır
+        get_prefetcher().schedule(dict.fromkeys(df['Ticker']) if not df.empty else {}, session=st.session_state.session_id)
+        if not df.empty:
+            prefetch_news_profiles(df.set_index('Ticker')[['Sector', 'Industry', 'Country']].to_dict('index'), get_translator().translate_many)
+
+    if local_mode:
+        # Her filtre değişiminde yerel sorgu (ağ yok); sonuç kümesi değiştiyse evren güncellenir
+        universe = get_universe_store()
+        snap = universe.get()
+        if snap is None:
+            st.sidebar.info("Evren anlık görüntüsü hazırlanıyor (ilk seferde birkaç dakika sürebilir)...")
+        else:
+            st.sidebar.caption(f"Evren: {len(snap)} hisse · {time.strftime('%d.%m.%Y %H:%M', time.localtime(snap.fetched_at))}" + (" · yenileniyor" if universe.refreshing else ""))
+            try:
+                df = snap.query_options(exchange, sector, pe_ratio, peg_ratio, roe, debt_eq, rsi_filter, price_ma, custom=custom_ranges, limit=scan_limit)
+            except ValueError as e:
+                st.sidebar.warning(str(e))
+            else:
+                if df['Ticker'].tolist() != st.session_state.scan_data.get('Ticker', pd.Series(dtype=str)).tolist():
+                    set_universe(df)
+    elif st.sidebar.button("Analizi Başlat"):
+        with st.spinner("Piyasa taranıyor..."):
+            df, url = get_finviz_v48(scan_limit, exchange, sector, pe_ratio, peg_ratio, roe, debt_eq, rsi_filter, price_ma)
+            set_universe(df, url)
+
+    if not st.session_state.scan_data.empty:
+        df = st.session_state.scan_data
+        st.success(f"✅ {len(df)} Şirket Listelendi")
+        pf = get_prefetcher().status(session=st.session_state.session_id)
+        st.sidebar.caption(f"Ön yükleme: {pf['done']} hazır · {pf['running'] + pf['pending']} sırada" + (f" · {pf['failed']} hata" if pf['failed'] else ""))
+        ta_df = get_universe_ta(tuple(df['Ticker']))
+        table = df.merge(ta_df, on='Ticker', how='left') if not ta_df.empty else df
+        st.dataframe(table.merge(get_news_tone(df['Ticker']), on='Ticker', how='left'), use_container_width=True)
+        st.divider()
+
+        col1, col2 = st.columns([5, 4])
+
+        with col1:
+            c_head, c_opt = st.columns([2, 1])
+            c_head.subheader("📉 Teknik Grafik")
+            time_period = c_opt.selectbox("Süre", list(PERIODS), index=3)
+            tik = st.selectbox("Detaylı Analiz İçin Hisse Seç:", df['Ticker'].tolist())
+            # Seçilen ve tablodaki sonraki hisseler kuyruğun önüne; bir sonraki seçim büyük olasılıkla anında açılır
+            if tik: get_prefetcher().promote(tik, session=st.session_state.session_id)
+
+            # KORUMALI DEĞİŞKENLER
+            hist_long = pd.DataFrame()
+            adv = {}
+
+            if tik:
+                fin_row = df[df['Ticker'] == tik].iloc[0]
+                with st.spinner(f"{tik} detaylı analiz ediliyor..."):
+                    detail = gather_detail(tik, fin_row, detail_budget)
+                snap = detail['fundamentals'].value
+                for note in detail_notes(tik, detail): st.caption(note)
+                waiting = [r.source for r in detail.values() if r.status in (PENDING, SKIPPED)]
+                if waiting: await_pending(tik, waiting)
+                if detail['history'].ok:
+                    try:
+                        adv = fetch_robust_metrics(snap) if snap is not None else {}
+                        hist_long = detail['history'].value
+                        if not hist_long.empty:
+                            # Önceki hesap varsa yalnız yeni barlar hesaplanır
+                            ta_cache = st.session_state.ta_cache
+                            hist_long = calculate_ta(hist_long, prev=ta_cache.pop(tik, None))
+                            ta_cache[tik] = hist_long
+                            while len(ta_cache) > TA_CACHE_MAX: ta_cache.popitem(last=False)
+                            last = hist_long.iloc[-1]
+                            st.session_state.decision_inputs[tik] = {'Close': last['Close'], 'MA200': last['MA200'], 'RSI': last['RSI'],
+                                                                     'EV/EBITDA': adv.get('EV/EBITDA'), 'FCF': adv.get('FCF')}
+                            hist_view = slice_period(hist_long, time_period)
+
+                            if not hist_view.empty:
+                                start_p = hist_view['Close'].iloc[0]
+                                end_p = hist_view['Close'].iloc[-1]
+                                ret_pct = ((end_p - start_p) / start_p) * 100
+                                m1, m2, m3 = st.columns(3)
+                                m1.metric("Dönem Başı", f"${start_p:.2f}")
+                                m2.metric("Dönem Sonu", f"${end_p:.2f}")
+                                m3.metric(f"{time_period} Getirisi", f"%{ret_pct:.1f}", delta=f"{ret_pct:.1f}%")
+
+                            with diagnostics.span("render.chart"):
+                                # Uzun dönemler haftalık/aylık mum + seyreltilmiş MA ile sabit boyutta kalır
+                                # Gün içi son bar aynı zaman damgasıyla yeniden yazılır: satır özeti anahtara girer
+                                last_row_hash = int(pd.util.hash_pandas_object(hist_long.iloc[-1:]).iloc[0])
+                                fig = get_price_figure(tik, time_period, str(hist_long.index[-1]), len(hist_long), last_row_hash, hist_long)
+                                st.plotly_chart(fig, use_container_width=True)
+                        else: st.warning("Grafik verisi bulunamadı.")
+                    except Exception as e: 
+                        st.warning(f"Bağlantı yoğunluğu nedeniyle veriler tam çekilemedi.")
+
+        # Tek geçişte tüm evren; seçili hissenin raporu da bu tablodan okunur
+        decisions = build_decision_table(df, ta_df)
+
+        with col2:
+            if tik:
+                tab_main, tab_news, tab_verbal, tab_cross = st.tabs(["📊 Karar Raporu", "📰 Haber Analizi", "💬 Sözel & Dedektif", "🌐 Evren Kesiti"])
+
+                with tab_main:
+                    st.subheader("🧠 Akademik Karar Raporu")
+                    if hist_long.empty or snap is None:
+                        # Rapor fiyat + temel veriyi birlikte ister; eksik kaynak gelince sayfa yenilenir
+                        st.info(" · ".join(detail[k].describe() for k in ('history', 'fundamentals') if not detail[k].ok) or "Grafik verisi bulunamadı.")
+                    else:
+                        generate_holistic_report(tik, fin_row, adv, hist_long, decisions.loc[tik])
+                        st.markdown("#### 📝 Teknik Görünüm Sentezi")
+                        st.write(generate_technical_synthesis(hist_long))
+                    with st.expander("ℹ️ Karar Kategorileri Kılavuzu"):
+                        st.markdown(decision_guide())
+
+                with tab_news:
+                    st.subheader("Şirket Profili & Haberler")
+                    if not detail['news'].ok: st.info(detail['news'].describe())
+                    else:
+                        finviz_data = detail['news'].value
+                        st.markdown("### 🏢 Şirket Profili (Türkçe)")
+                        st.caption(finviz_data.get('Profile', 'Bulunamadı'))
+
+                        st.markdown("### 🗞️ Haber Akışı Özeti")
+                        summary_text, summary_color = generate_news_summary(finviz_data['News'])
+                        st.markdown(f":{summary_color}-background[{summary_text}]")
+
+                        with st.expander("Orijinal Haber Kaynakları (İngilizce)"):
+                            for n in finviz_data['News']:
+                                st.markdown(f"**{n['Date']}** | [{n['Title']}]({n['Link']})")
+
+                with tab_verbal:
+                    if snap is None: st.info(detail['fundamentals'].describe())
+                    else:
+                        st.subheader("🕵️ Dedektif Modu")
+                        skeptic_comments = generate_skeptic_analysis(snap)
+                        if skeptic_comments:
+                            for s in skeptic_comments: st.warning(s)
+                        else: st.success("Bariz bir olumsuzluk tespit edilmedi.")
+
+                        st.markdown("---")
+                        st.subheader("💬 Sözel Finansal Analiz")
+                        from_v35 = generate_verbal_financial_analysis(snap)
+                        for s in from_v35: st.info(s)
+                        st.caption(f"Temel veri zamanı: {time.strftime('%d.%m.%Y %H:%M', time.localtime(snap.fetched_at))}")
+
+                with tab_cross:
+                    st.subheader("🌐 Evren İçindeki Konum")
+                    try: cross = get_cross_section(tuple(df['Ticker']))
+                    except Exception as e: cross = None; st.warning(f"Evren fiyat paneli alınamadı ({type(e).__name__}).")
+                    if cross is None or tik not in cross[1].index: st.info("Evren fiyat paneli henüz hazır değil.")
+                    else:
+                        summary, corr = cross
+                        row = summary.set_index('Ticker').loc[tik]
+                        # Geçmişi kısa hissede değer NaN: "—" gösterilir
+                        num = lambda v, pattern: "—" if pd.isna(v) else pattern.format(v)
+                        k1, k2, k3 = st.columns(3)
+                        k1.metric("Göreli Güç (3A)", num(row['GG 3A'], "{:+.1f} puan"), help="3 aylık getiri - evren medyanı")
+                        k2.metric(f"Beta ({BENCHMARK})", num(row[f'Beta ({BETA_WINDOW}g)'], "{:.2f}"))
+                        k3.metric("Volatilite Sırası", num(row['Vol Sırası %'], "%{:.0f}"), help="Evrende volatilitesi bundan düşük hisse oranı")
+                        st.line_chart(get_beta_series(tuple(df['Ticker']), tik), height=200)
+                        # Hisse + en çok birlikte hareket eden 14 hisse
+                        peers = corr[tik].drop(tik).dropna().nlargest(14)
+                        st.markdown("**En çok birlikte hareket edenler (1Y günlük getiri korelasyonu)**")
+                        st.dataframe(peers.rename('Korelasyon').round(2).to_frame().T, use_container_width=True)
+                        group = [tik] + list(peers.index)
+                        st.plotly_chart(build_correlation_figure(corr.loc[group, group], f"{tik} ve Eşleri - Korelasyon"), use_container_width=True)
+                        with st.expander(f"Tüm evren ({len(summary)} hisse)"):
+                            st.dataframe(summary, use_container_width=True)
+
+        st.divider()
+        with st.expander(f"🧮 Karar Tablosu ({decisions['Decision'].notna().sum()}/{len(decisions)} hisse sınıflandı)"):
+            picked = st.multiselect("Karar filtresi", sorted(decisions['Decision'].dropna().unique()))
+            view = decisions[decisions['Decision'].isin(picked)] if picked else decisions
+            st.dataframe(view[DECISION_VIEW_COLUMNS], use_container_width=True)
+            st.caption("EV/EBITDA, toplu rapordan ya da bu oturumda detayı açılan hisselerden gelir; eksikse değerleme 'Bilinmiyor' sayılır.")
+
+    elif st.session_state.scan_data.empty:
+        st.info("👈 Analize başlamak için sol menüdeki **'Analizi Başlat'** butonuna basınız.")
+        # batch.py ile önceden üretilmiş toplu rapor varsa göster
+        batch_df = load_reports()
+        if not batch_df.empty:
+            with st.expander(f"🌙 Toplu Tarama Sonuçları ({len(batch_df)} hisse, {batch_df['Generated At'].max()})"):
+                st.dataframe(batch_df, use_container_width=True)
+finally:
+    if profiler: st.session_state.profile_report = profiler.stop()
 
-if not st.session_state.scan_data.empty:
-    df = st.session_state.scan_data
-    st.success(f"✅ {len(df)} Şirket Listelendi")
-    st.dataframe(df, use_container_width=True)
-    st.divider()
-    
-    col1, col2 = st.columns([5, 4])
-    
-    with col1:
-        c_head, c_opt = st.columns([2, 1])
-        c_head.subheader("📉 Teknik Grafik")
-        time_period = c_opt.selectbox("Süre", ["1 Ay", "3 Ay", "6 Ay", "1 Yıl", "3 Yıl", "5 Yıl"], index=3)
-        tik = st.selectbox("Detaylı Analiz İçin Hisse Seç:", df['Ticker'].tolist())
-        
-        # KORUMALI DEĞİŞKENLER
-        hist_long = pd.DataFrame()
-        adv = {}
-        
-        if tik:
-            with st.spinner(f"{tik} detaylı analiz ediliyor..."):
-                try:
-                    adv = fetch_robust_metrics(tik)
-                    stock = yf.Ticker(tik)
-                    hist_long = stock.history(period="5y") 
-                    if not hist_long.empty:
-                        hist_long = calculate_ta(hist_long)
-                        if time_period == "1 Ay": slice_days = 30
-                        elif time_period == "3 Ay": slice_days = 90
-                        elif time_period == "6 Ay": slice_days = 180
-                        elif time_period == "1 Yıl": slice_days = 365
-                        elif time_period == "3 Yıl": slice_days = 365*3
-                        else: slice_days = 365*5
-                        hist_view = hist_long.tail(slice_days)
-                        
-                        if not hist_view.empty:
-                            start_p = hist_view['Close'].iloc[0]
-                            end_p = hist_view['Close'].iloc[-1]
-                            ret_pct = ((end_p - start_p) / start_p) * 100
-                            m1, m2, m3 = st.columns(3)
-                            m1.metric("Dönem Başı", f"${start_p:.2f}")
-                            m2.metric("Dönem Sonu", f"${end_p:.2f}")
-                            m3.metric(f"{time_period} Getirisi", f"%{ret_pct:.1f}", delta=f"{ret_pct:.1f}%")
-                        
-                        fig = go.Figure()
-                        fig.add_trace(go.Candlestick(x=hist_view.index, open=hist_view['Open'], high=hist_view['High'], low=hist_view['Low'], close=hist_view['Close'], name='Fiyat'))
-                        fig.add_trace(go.Scatter(x=hist_view.index, y=hist_view['MA50'], line=dict(color='blue', width=1), name='SMA 50'))
-                        fig.add_trace(go.Scatter(x=hist_view.index, y=hist_view['MA200'], line=dict(color='orange', width=2), name='SMA 200'))
-                        fig.update_layout(title=f"{tik} - {time_period} Grafik", height=500, xaxis_rangeslider_visible=False)
-                        st.plotly_chart(fig, use_container_width=True)
-                    else: st.warning("Grafik verisi bulunamadı.")
-                except Exception as e: 
-                    st.warning(f"Bağlantı yoğunluğu nedeniyle veriler tam çekilemedi.")
-
-    with col2:
-        if tik and not hist_long.empty:
-            tab_main, tab_news, tab_verbal = st.tabs(["📊 Karar Raporu", "📰 Haber Analizi", "💬 Sözel & Dedektif"])
-            fin_row = df[df['Ticker'] == tik].iloc[0]
-            
-            with tab_main:
-                st.subheader("🧠 Akademik Karar Raporu")
-                generate_holistic_report(tik, fin_row, adv, hist_long)
-                st.markdown("#### 📝 Teknik Görünüm Sentezi")
-                st.write(generate_technical_synthesis(hist_long))
-                with st.expander("ℹ️ Karar Kategorileri Kılavuzu"):
-                    st.markdown("""
-                    * 🟢 **GÜÇLÜ ALIM:** Trend Yukarı + EV/EBITDA < 12
-                    * 🟢 **KALİTELİ TREND:** Trend Yukarı + EV/EBITDA 12-20
-                    * 🟠 **MOMENTUM:** Trend Yukarı + EV/EBITDA > 20
-                    * 🔵 **DEĞER YATIRIMI:** Trend Aşağı + EV/EBITDA < 10
-                    * 🔵 **SPEKÜLATİF:** Trend Yukarı (Veri Yok)
-                    """)
-            
-            with tab_news:
-                st.subheader("Şirket Profili & Haberler")
-                with st.spinner("Haberler analiz ediliyor..."):
-                    # YENİ: GOOGLE DESTEKLİ FONKSİYON
-                    finviz_data = get_combined_news_profile(tik, fin_row)
-                    st.markdown("### 🏢 Şirket Profili (Türkçe)")
-                    st.caption(finviz_data.get('Profile', 'Bulunamadı'))
-                    
-                    st.markdown("### 🗞️ Haber Akışı Özeti")
-                    summary_text, summary_color = generate_news_summary(finviz_data['News'])
-                    st.markdown(f":{summary_color}-background[{summary_text}]")
-                    
-                    with st.expander("Orijinal Haber Kaynakları (İngilizce)"):
-                        for n in finviz_data['News']:
-                            st.markdown(f"**{n['Date']}** | [{n['Title']}]({n['Link']})")
-            
-            with tab_verbal:
-                st.subheader("🕵️ Dedektif Modu")
-                skeptic_comments = generate_skeptic_analysis(tik)
-                if skeptic_comments:
-                    for s in skeptic_comments: st.warning(s)
-                else: st.success("Bariz bir olumsuzluk tespit edilmedi.")
-                
-                st.markdown("---")
-                st.subheader("💬 Sözel Finansal Analiz")
-                from_v35 = generate_verbal_financial_analysis(tik)
-                for s in from_v35: st.info(s)
-
-elif st.session_state.scan_data.empty:
-    st.info("👈 Analize başlamak için sol menüdeki **'Analizi Başlat'** butonuna basınız.")
+# --- TANILAMA PANELİ ---
+diagnostics.record("app.rerun", time.perf_counter() - run_start)
+if diagnostics.ENABLED:
+    with diag_box.expander("Ölçümler (süreç geneli)", expanded=True):
+        diag = diagnostics.snapshot()
+        for rows in (diag['spans'], diag['counters']):
+            if not rows: continue
+            diag_df = pd.DataFrame(rows)
+            diag_df['Labels'] = diag_df['Labels'].map(lambda l: ", ".join(f"{k}={v}" for k, v in l.items()))
+            st.dataframe(diag_df.round(1), hide_index=True, use_container_width=True)
+        c1, c2 = st.columns(2)
+        c1.download_button("JSONL", diagnostics.to_jsonl(), "diagnostics.jsonl", mime="application/jsonl")
+        c2.download_button("Prometheus", diagnostics.to_prometheus(), "metrics.prom", mime="text/plain")
+        if st.button("Sayaçları Sıfırla"):
+            diagnostics.reset()
+            st.rerun()
+        if st.button("Sonraki Çalıştırmayı Profille"):
+            st.session_state.profile_next = True
+            st.rerun()
+        if st.session_state.get('profile_report'):
+            st.code(st.session_state.profile_report, language=None)
@@ -0,0 +1,78 @@
+"""Fiyat grafiği veri aşaması: tarih aralığıyla kesme, nokta bütçesine göre OHLC yeniden örnekleme
+ve MA çizgileri için LTTB seyreltme. Dönem uzadıkça tarayıcıya giden yük sabit kalır."""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+PERIODS = {"1 Ay": pd.DateOffset(months=1), "3 Ay": pd.DateOffset(months=3), "6 Ay": pd.DateOffset(months=6),
+           "1 Yıl": pd.DateOffset(years=1), "3 Yıl": pd.DateOffset(years=3), "5 Yıl": pd.DateOffset(years=5)}
+# Bir grafikte en fazla mum sayısı; aşılırsa sırayla haftalık, aylık bar
+CANDLE_BUDGET = 300
+# MA çizgisi başına en fazla nokta
+LINE_BUDGET = 300
+RESAMPLE_RULES = [("W-FRI", "Haftalık"), ("ME", "Aylık")]
+OHLC_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+# --- VERİ AŞAMASI ---
+def slice_period(hist, period):
+    """Son bardan geriye takvim dönemi (işlem günü sayısı değil)."""
+    if hist.empty: return hist
+    start = hist.index[-1] - PERIODS[period]
+    return hist.loc[hist.index > start]
+
+def resample_ohlc(hist, budget=CANDLE_BUDGET):
+    """Bütçeyi aşan seriyi haftalık/aylık mumlara çevirir -> (df, etiket)."""
+    if len(hist) <= budget: return hist, "Günlük"
+    for rule, label in RESAMPLE_RULES:
+        agg = {c: f for c, f in OHLC_AGG.items() if c in hist}
+        bars = hist.resample(rule).agg(agg).dropna(subset=['Close'])
+        if len(bars) <= budget: break
+    return bars, label
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: çizginin şeklini koruyan n_out noktalık alt küme indeksleri.
+
+    NaN değerler (MA ısınma dönemi) atlanır; x artan sayısal eksendir.
+    """
+    idx = np.flatnonzero(~np.isnan(y))
+    if len(idx) <= n_out or n_out < 3: return idx
+    xs, ys = x[idx].astype(float), y[idx]
+    edges = np.linspace(1, len(idx) - 1, n_out - 1).astype(int)
+    out = np.empty(n_out, dtype=np.intp)
+    out[0], out[-1] = 0, len(idx) - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Sonraki kovanın ortalaması üçgenin üçüncü köşesi
+        nlo, nhi = hi, (edges[i + 2] if i + 2 < len(edges) else len(idx))
+        ax, ay = xs[nlo:nhi].mean(), ys[nlo:nhi].mean()
+        area = np.abs((xs[prev] - ax) * (ys[lo:hi] - ys[prev]) - (xs[prev] - xs[lo:hi]) * (ay - ys[prev]))
+        prev = lo + int(np.argmax(area))
+        out[i + 1] = prev
+    return idx[out]
+
+def downsample_line(series, budget=LINE_BUDGET):
+    keep = lttb(series.index.asi8, series.to_numpy(dtype=float), budget)
+    return series.iloc[keep]
+
+
+# --- FİGÜR ---
+def build_price_figure(hist, ticker, period, candle_budget=CANDLE_BUDGET, line_budget=LINE_BUDGET):
+    """calculate_ta çıktısından mum + MA50/MA200 figürü; MA çizgileri WebGL (Scattergl)."""
+    view = slice_period(hist, period)
+    bars, label = resample_ohlc(view, candle_budget)
+    fig = go.Figure()
+    fig.add_trace(go.Candlestick(x=bars.index, open=bars['Open'], high=bars['High'], low=bars['Low'], close=bars['Close'], name='Fiyat'))
+    for col, color, width, name in (('MA50', 'blue', 1, 'SMA 50'), ('MA200', 'orange', 2, 'SMA 200')):
+        line = downsample_line(view[col], line_budget)
+        fig.add_trace(go.Scattergl(x=line.index, y=line.to_numpy(), mode='lines', line=dict(color=color, width=width), name=name))
+    fig.update_layout(title=f"{ticker} - {period} Grafik ({label})", height=500, xaxis_rangeslider_visible=False)
+    return fig
+
+
+def build_correlation_figure(corr, title):
+    """Kare korelasyon alt matrisi (DataFrame) -> ısı haritası; renk ölçeği -1..1 sabit."""
+    fig = go.Figure(go.Heatmap(z=corr.to_numpy(), x=list(corr.columns), y=list(corr.index), zmin=-1, zmax=1, colorscale='RdBu', reversescale=True))
+    fig.update_layout(title=title, height=450, yaxis_autorange='reversed')
+    return fig
@@ -0,0 +1,113 @@
+"""Evren paneli üzerinde kesitsel analizler: getiri korelasyonu, medyana göre göreli güç,
+endekse kayan beta ve volatilite sırası. Girdiler (gün, hisse) dizileridir; yalnız gereken
+son pencere panelden okunur."""
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+CORR_WINDOW = 252
+BETA_WINDOW = 63
+VOL_WINDOW = 63
+# Göreli güç dönemleri (işlem günü)
+RS_LOOKBACKS = {'1A': 21, '3A': 63, '6A': 126, '1Y': 252}
+# Korelasyon/beta için en az ortak gözlem oranı
+MIN_OBS_RATIO = 0.5
+
+
+# --- TEMEL DÖNÜŞÜMLER (gün x hisse) ---
+def log_returns(close):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(np.log(close.astype(np.float64)), axis=0)
+
+def correlation_matrix(returns, min_obs=None):
+    """Pearson korelasyon matrisi; tek matris çarpımıyla.
+
+    Her hisse kendi ortalama/sapmasıyla standartlaştırılır, eksik gün 0 (ortalama) sayılır:
+    tam gözlemde pandas .corr() ile aynı, eksik günlerde yaklaşık. Ortak gözlemi min_obs'un
+    altındaki çiftler NaN.
+    """
+    valid = ~np.isnan(returns)
+    n = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.where(valid, returns - np.nanmean(np.where(valid, returns, np.nan), axis=0), 0.0)
+        z /= np.sqrt((z ** 2).sum(axis=0) / np.maximum(n - 1, 1))
+    z = np.nan_to_num(z).astype(np.float32)
+    pairs = valid.T.astype(np.float32) @ valid.astype(np.float32)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = (z.T @ z) / np.maximum(pairs - 1, 1)
+    corr[pairs < (min_obs if min_obs is not None else MIN_OBS_RATIO * len(returns))] = np.nan
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1, 1)
+
+def relative_strength(close, lookbacks=RS_LOOKBACKS):
+    """Dönem getirisi - evren medyanı (yüzde puan) -> {etiket: hisse başına dizi}."""
+    close = close.astype(np.float64)
+    out = {}
+    for label, k in lookbacks.items():
+        if len(close) <= k:
+            out[label] = np.full(close.shape[1], np.nan); continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ret = (close[-1] / close[-1 - k] - 1) * 100
+        out[label] = ret - np.nanmedian(ret) if np.isfinite(ret).any() else ret
+    return out
+
+def rolling_beta(returns, market, window=BETA_WINDOW):
+    """Kayan pencerede cov(r, m) / var(m); kümülatif toplamlarla O(gün x hisse)."""
+    if len(returns) < window: return np.full(returns.shape, np.nan)
+    market = market.reshape(-1, 1)
+    valid = ~np.isnan(returns) & ~np.isnan(market)
+    x = np.where(valid, returns, 0.0)
+    m = np.where(valid, market, 0.0)
+    def windowed(a):
+        cs = np.cumsum(np.vstack([np.zeros((1, a.shape[1])), a]), axis=0)
+        return cs[window:] - cs[:-window]
+    n, sx, sm, sxm, smm = (windowed(a) for a in (valid.astype(np.float64), x, m, x * m, m * m))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = (sxm - sx * sm / n) / (smm - sm * sm / n)
+    beta[n < MIN_OBS_RATIO * window] = np.nan
+    return np.vstack([np.full((window - 1, returns.shape[1]), np.nan), beta])
+
+def volatility(returns, window=VOL_WINDOW):
+    """Son `window` günün yıllıklandırılmış volatilitesi (%)."""
+    tail = returns[-window:]
+    enough = (~np.isnan(tail)).sum(axis=0) >= MIN_OBS_RATIO * window
+    with np.errstate(invalid='ignore'):
+        vol = np.nanstd(tail, axis=0, ddof=1) * np.sqrt(TRADING_DAYS) * 100
+    return np.where(enough, vol, np.nan)
+
+
+# --- PANEL ÖZETİ ---
+def cross_section_summary(panel, corr_window=CORR_WINDOW, beta_window=BETA_WINDOW, vol_window=VOL_WINDOW):
+    """PricePanel -> (hisse başına özet DataFrame, korelasyon DataFrame).
+
+    Yalnız son max(pencere)+1 gün okunur; 1000+ hisse x 5 yıllık panelde bellek birkaç MB.
+    """
+    members = panel.members
+    days = max(corr_window, beta_window, vol_window, max(RS_LOOKBACKS.values())) + 1
+    close = panel.window('Close', days, members)
+    market = panel.window('Close', days, [panel.benchmark])
+    rets, mret = log_returns(close), log_returns(market)[:, 0]
+    corr = correlation_matrix(rets[-corr_window:])
+    beta = rolling_beta(rets[-beta_window:], mret[-beta_window:], beta_window)[-1]
+    vol = volatility(rets, vol_window)
+    rs = relative_strength(close)
+    # En yakın eş: kendisi hariç en yüksek korelasyon
+    peers = np.where(np.eye(len(members), dtype=bool), np.nan, corr)
+    has_peer = ~np.isnan(peers).all(axis=1)
+    best = np.where(has_peer, np.argmax(np.nan_to_num(peers, nan=-np.inf), axis=1), 0)
+    summary = pd.DataFrame({
+        'Ticker': members,
+        **{f'GG {label}': np.round(v, 1) for label, v in rs.items()},
+        f'Beta ({beta_window}g)': np.round(beta, 2),
+        'Volatilite %': np.round(vol, 1),
+        'Vol Sırası %': (pd.Series(vol).rank(pct=True) * 100).round(0).to_numpy(),
+        'En Yakın Eş': np.where(has_peer, np.asarray(members, dtype=object)[best], None),
+        'Korelasyon': np.round(np.where(has_peer, peers[np.arange(len(members)), best], np.nan), 2),
+    })
+    return summary, pd.DataFrame(corr, index=members, columns=members)
+
+def beta_series(panel, ticker, window=BETA_WINDOW):
+    """Tek hissenin tüm panel boyunca kayan betası (iki sütun okunur)."""
+    close = panel.window('Close', None, [ticker, panel.benchmark])
+    rets = log_returns(close)
+    return pd.Series(rolling_beta(rets[:, :1], rets[:, 1], window)[:, 0], index=panel.dates[1:], name=f"Beta ({window}g)")
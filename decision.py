@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# Tek eşik kaynağı: kurallar, gerekçe metinleri ve arayüzdeki kılavuz buradan üretilir
+DECISION_THRESHOLDS = {'ev_cheap': 12.0, 'ev_expensive': 20.0}
+DECISION_COLUMNS = ['Trend', 'Valuation', 'Decision', 'Color', 'Reason']
+
+
+# --- KARAR KURALLARI ---
+def _rules(th=DECISION_THRESHOLDS):
+    """(koşul anahtarı, karar, renk, gerekçe) — np.select sırasıyla."""
+    cheap, expensive = f"{th['ev_cheap']:g}", f"{th['ev_expensive']:g}"
+    return [
+        ('up_cheap', "GÜÇLÜ ALIM", "green", f"Trend Yukarı + EV/EBITDA < {cheap}"),
+        ('up_fair', "KALİTELİ TREND", "green", f"Trend Yukarı + EV/EBITDA {cheap}-{expensive}"),
+        ('up_expensive', "MOMENTUM (Pahalı)", "orange", f"Trend Yukarı + EV/EBITDA > {expensive}"),
+        ('up_unknown', "SPEKÜLATİF", "blue", "Trend Yukarı (Değerleme Belirsiz)"),
+        ('down_cheap', "DEĞER YATIRIMI", "blue", f"Trend Aşağı + EV/EBITDA < {cheap}"),
+        ('down_expensive', "SAT / UZAK DUR", "red", "Hem düşüşte hem pahalı."),
+        ('down_other', "ZAYIF GÖRÜNÜM", "red", f"Trend Aşağı + EV/EBITDA {cheap}-{expensive}, negatif ya da bilinmiyor"),
+    ]
+
+def classify_frame(df, thresholds=DECISION_THRESHOLDS):
+    """Close, MA200, EV/EBITDA sütunlu tablo -> aynı indeksle Trend/Valuation/Decision/Color/Reason.
+
+    Tüm evren tek geçişte sınıflanır; diğer sütunlar (RSI, FCF ...) olduğu gibi korunur.
+    EV/EBITDA boş -> 'Bilinmiyor', 0 -> 'Negatif/Zarar/Bilinmiyor' (robust_metrics sözleşmesi).
+    Kapanışı olmayan satırlarda (hata, fiyat yok) Decision/Color/Reason boş kalır.
+    """
+    close = pd.to_numeric(df['Close'], errors='coerce').to_numpy(dtype=float)
+    ma200 = pd.to_numeric(df['MA200'], errors='coerce').to_numpy(dtype=float)
+    ev = pd.to_numeric(df['EV/EBITDA'], errors='coerce').to_numpy(dtype=float)
+    # MA200 yoksa (kısa geçmiş) pozitif kapanış yukarı trend sayılır
+    up = close > np.nan_to_num(ma200, nan=0.0)
+    known, zero = ~np.isnan(ev), ev == 0
+    cheap = known & ~zero & (ev < thresholds['ev_cheap'])
+    fair = known & ~zero & (ev >= thresholds['ev_cheap']) & (ev <= thresholds['ev_expensive'])
+    expensive = known & (ev > thresholds['ev_expensive'])
+    valuation = np.select([~known, zero, cheap, fair], ["Bilinmiyor", "Negatif/Zarar/Bilinmiyor", "Ucuz", "Makul"], "Pahalı")
+    conds = {
+        'up_cheap': up & cheap, 'up_fair': up & fair, 'up_expensive': up & expensive, 'up_unknown': up,
+        'down_cheap': ~up & cheap, 'down_expensive': ~up & expensive, 'down_other': ~up,
+    }
+    rules = _rules(thresholds)
+    masks = [conds[k] for k, *_ in rules]
+    out = df.copy()
+    out['Trend'] = up
+    out['Valuation'] = valuation
+    no_price = np.isnan(close)
+    for col, pos in (('Decision', 1), ('Color', 2), ('Reason', 3)):
+        out[col] = np.where(no_price, None, np.select(masks, [r[pos] for r in rules], ""))
+    return out
+
+def classify(curr, ma200, evebitda):
+    """Tek hisse: classify_frame'in tek satırlık sonucu.
+
+    Dönüş: {'Trend', 'Valuation', 'Decision', 'Color', 'Reason'}
+    """
+    row = classify_frame(pd.DataFrame({'Close': [curr], 'MA200': [ma200], 'EV/EBITDA': [evebitda]})).iloc[0]
+    return {c: (bool(row[c]) if c == 'Trend' else row[c]) for c in DECISION_COLUMNS}
+
+def decision_guide(thresholds=DECISION_THRESHOLDS):
+    """Arayüzdeki 'Karar Kategorileri Kılavuzu' metni (markdown)."""
+    icons = {"green": "🟢", "orange": "🟠", "blue": "🔵", "red": "🔴"}
+    return "\n".join(f"* {icons[color]} **{decision}:** {reason}" for _, decision, color, reason in _rules(thresholds))
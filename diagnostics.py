@@ -0,0 +1,181 @@
+"""Hafif ölçüm: süre aralıkları (span), sayaçlar ve tek çalıştırmalık profil kancası.
+
+Kapalıyken span() paylaşılan boş bir bağlam döner, incr() ilk satırda çıkar; maliyet bir bayrak kontrolüdür.
+Açmak için BORSA_DIAGNOSTICS=1 ya da enable().
+"""
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from functools import wraps
+from urllib.parse import urlparse
+
+ENABLED = os.environ.get("BORSA_DIAGNOSTICS", "") not in ("", "0")
+# JSONL dışa aktarımı için tutulan son span kayıtları
+MAX_EVENTS = 5000
+PROM_PREFIX = "borsa_"
+
+_lock = threading.Lock()
+_counters = defaultdict(float)   # (ad, etiketler) -> değer
+_spans = {}                      # (ad, etiketler) -> [adet, toplam, en büyük, son]
+_events = deque(maxlen=MAX_EVENTS)
+_NULL = contextlib.nullcontext()
+
+
+def enable(flag=True):
+    """Süreç geneli: tüm oturumlar ve arka plan iş parçacıkları için açar/kapatır."""
+    global ENABLED
+    ENABLED = bool(flag)
+
+def reset():
+    with _lock:
+        _counters.clear(); _spans.clear(); _events.clear()
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# --- SAYAÇLAR & SÜRE ARALIKLARI ---
+def incr(name, value=1, **labels):
+    if not ENABLED: return
+    with _lock: _counters[_key(name, labels)] += value
+
+def record(name, seconds, **labels):
+    if not ENABLED: return
+    key = _key(name, labels)
+    with _lock:
+        s = _spans.get(key)
+        if s is None: _spans[key] = [1, seconds, seconds, seconds]
+        else: s[0] += 1; s[1] += seconds; s[2] = max(s[2], seconds); s[3] = seconds
+        _events.append((time.time(), name, seconds, key[1]))
+
+class _Span:
+    __slots__ = ('name', 'labels', 'start')
+
+    def __init__(self, name, labels):
+        self.name, self.labels = name, labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None: self.labels['error'] = exc_type.__name__
+        record(self.name, time.perf_counter() - self.start, **self.labels)
+
+def span(name, **labels):
+    """with span('yfinance.history', ticker='AAPL'): ..."""
+    return _Span(name, labels) if ENABLED else _NULL
+
+def timed(name):
+    """Fonksiyonun her çağrısını `name` span'i olarak ölçer."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED: return fn(*args, **kwargs)
+            with _Span(name, {}): return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def observe_http(url, response=None, error=None):
+    """HTTP yanıtı (ya da hatası) için durum, bayt ve hata sayaçları."""
+    if not ENABLED: return
+    host = urlparse(url).hostname
+    if response is not None:
+        incr("http_responses_total", host=host, status=response.status_code)
+        incr("http_bytes_total", len(response.content), host=host)
+    else:
+        incr("http_errors_total", host=host, error=type(error).__name__)
+
+def cache_event(cache, event, n=1):
+    """event: 'hit' | 'miss' | 'eviction'"""
+    if ENABLED: incr(f"cache_{event}_total", n, cache=cache)
+
+
+# --- ANLIK DURUM & DIŞA AKTARIM ---
+def snapshot():
+    """{'spans': [...], 'counters': [...]} — panel tabloları için düz kayıtlar."""
+    with _lock:
+        spans = [{'Span': n, 'Labels': dict(l), 'Count': s[0], 'Total ms': s[1] * 1e3, 'Mean ms': s[1] / s[0] * 1e3,
+                  'Max ms': s[2] * 1e3, 'Last ms': s[3] * 1e3} for (n, l), s in _spans.items()]
+        counters = [{'Counter': n, 'Labels': dict(l), 'Value': v} for (n, l), v in _counters.items()]
+    return {'spans': sorted(spans, key=lambda r: -r['Total ms']), 'counters': sorted(counters, key=lambda r: r['Counter'])}
+
+def to_jsonl():
+    """Her span kaydı ve her sayaç bir JSON satırı."""
+    with _lock:
+        events = list(_events)
+        counters = list(_counters.items())
+    lines = [json.dumps({'type': 'span', 'ts': ts, 'name': n, 'seconds': round(s, 6), 'labels': dict(l)}) for ts, n, s, l in events]
+    lines += [json.dumps({'type': 'counter', 'name': n, 'value': v, 'labels': dict(l)}) for (n, l), v in counters]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+def _prom_name(name):
+    return PROM_PREFIX + re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+def _prom_labels(labels):
+    if not labels: return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+def to_prometheus():
+    """Prometheus metin biçimi: sayaçlar counter, span'ler _seconds_sum/_count/_max."""
+    with _lock:
+        counters = sorted(_counters.items())
+        spans = sorted(_spans.items())
+    out, typed = [], set()
+    for (n, l), v in counters:
+        name = _prom_name(n)
+        if name not in typed: out.append(f"# TYPE {name} counter"); typed.add(name)
+        out.append(f"{name}{_prom_labels(l)} {v:g}")
+    if spans:
+        name = _prom_name("span_seconds")
+        out.append(f"# TYPE {name} summary")
+        for (n, l), s in spans:
+            labels = _prom_labels((('span', n),) + l)
+            out.append(f"{name}_sum{labels} {s[1]:.6f}")
+            out.append(f"{name}_count{labels} {s[0]}")
+        out.append(f"# TYPE {_prom_name('span_seconds_max')} gauge")
+        for (n, l), s in spans:
+            out.append(f"{_prom_name('span_seconds_max')}{_prom_labels((('span', n),) + l)} {s[2]:.6f}")
+    return "\n".join(out) + ("\n" if out else "")
+
+def write_jsonl(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f: f.write(to_jsonl())
+
+
+# --- PROFİL KANCASI ---
+class Profiler:
+    """start()/stop() arası tek çalıştırmayı profiller; pyinstrument kuruluysa onu, değilse cProfile'ı kullanır."""
+
+    def __init__(self, limit=40):
+        self.limit = limit
+        try:
+            from pyinstrument import Profiler as _Pyinstrument
+            self._impl = _Pyinstrument()
+            self.kind = "pyinstrument"
+        except ImportError:
+            self._impl = cProfile.Profile()
+            self.kind = "cProfile"
+
+    def start(self):
+        if self.kind == "pyinstrument": self._impl.start()
+        else: self._impl.enable()
+        return self
+
+    def stop(self):
+        """Profil raporunu metin olarak döner."""
+        if self.kind == "pyinstrument":
+            self._impl.stop()
+            return self._impl.output_text()
+        self._impl.disable()
+        buf = io.StringIO()
+        pstats.Stats(self._impl, stream=buf).sort_stats('cumulative').print_stats(self.limit)
+        return buf.getvalue()
@@ -0,0 +1,146 @@
+import lxml.html
+import numpy as np
+import pandas as pd
+
+import diagnostics
+from net import iter_pages
+
+# Finviz tarama hız sınırı (istek/sn), ani patlama ve eşzamanlı bağlantı sayısı
+FINVIZ_RATE = 2.0
+FINVIZ_BURST = 2
+FINVIZ_WORKERS = 4
+
+FINVIZ_HEAD = ["No.", "Ticker", "Company", "Sector", "Industry", "Country", "Market Cap", "P/E", "Price", "Change", "Volume"]
+
+# --- FİLTRE EŞLEMELERİ (yan menü seçeneği -> Finviz filtre kodu) ---
+sec_map = {"Basic Materials": "sec_basicmaterials", "Communication Services": "sec_communicationservices", "Consumer Cyclical": "sec_consumercyclical", "Consumer Defensive": "sec_consumerdefensive", "Energy": "sec_energy", "Financial": "sec_financial", "Healthcare": "sec_healthcare", "Industrials": "sec_industrials", "Real Estate": "sec_realestate", "Technology": "sec_technology", "Utilities": "sec_utilities"}
+pe_map = {"Low (<15)": "fa_pe_u15", "Profitable (<0)": "fa_pe_profitable", "High (>50)": "fa_pe_o50", "Under 20": "fa_pe_u20", "Under 30": "fa_pe_u30", "Over 20": "fa_pe_o20"}
+peg_map = {"Low (<1)": "fa_peg_u1", "Under 2": "fa_peg_u2", "High (>3)": "fa_peg_o3"}
+roe_map = {"Positive (>0%)": "fa_roe_pos", "High (>15%)": "fa_roe_o15", "Very High (>20%)": "fa_roe_o20"}
+de_map = {"Low (<0.1)": "fa_debteq_u0.1", "Under 0.5": "fa_debteq_u0.5", "Under 1": "fa_debteq_u1", "High (>1)": "fa_debteq_o1"}
+rsi_map = {"Oversold (<30)": "ta_rsi_os30", "Overbought (>70)": "ta_rsi_ob70", "Neutral (40-60)": "ta_rsi_n4060"}
+ma_map = {"Above SMA200": "ta_sma200_pa", "Below SMA200": "ta_sma200_pb"}
+
+def build_filters(exc, sec, pe, peg, roe_val, de, rsi_val, ma_val):
+    filters = []
+    if exc != "Any": filters.append(f"exch_{exc.lower()}")
+    if sec != "Any": filters.append(f"{sec_map[sec]}")
+    for val, mapping in ((pe, pe_map), (peg, peg_map), (roe_val, roe_map), (de, de_map), (rsi_val, rsi_map), (ma_val, ma_map)):
+        if val in mapping: filters.append(mapping[val])
+    return filters
+
+
+# --- SAYFA AYRIŞTIRICI (lxml + XPath, tipli sütunlar) ---
+# Önce sınıf adıyla doğrudan; bulunamazsa başlık metniyle (eski düzen) aranır
+SCREENER_XPATHS = [
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' screener_table ')]",
+    "//table[not(.//table)][(tr|thead/tr|tbody/tr)[1][contains(., 'No.') and contains(., 'Ticker') and contains(., 'Price')]]",
+]
+CATEGORY_COLUMNS = ['Sector', 'Industry', 'Country', 'Exchange']
+TEXT_COLUMNS = ['Ticker', 'Company']
+INT_COLUMNS = ['No.', 'Volume']
+# Geri kalan tüm sütunlar sayısal (float32) kabul edilir
+_SUFFIX = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+
+def _cell_number(txt):
+    """'1.23B' -> 1.23e9, '-1.2%' -> -1.2, '1,234' -> 1234, '-' -> NaN."""
+    txt = txt.replace(',', '').rstrip('%')
+    mult = _SUFFIX.get(txt[-1:], 1.0)
+    if mult != 1.0: txt = txt[:-1]
+    try: return float(txt) * mult
+    except ValueError: return np.nan
+
+def _column(data, pos, dtype):
+    return np.fromiter((_cell_number(r[pos]) for r in data), dtype=dtype, count=len(data))
+
+def build_finviz_frame(data, head=FINVIZ_HEAD):
+    """Ham hücre listesi -> sayısal sütunlar float32/Int64, sektör/endüstri/ülke kategorik."""
+    cols = {}
+    for pos, name in enumerate(head):
+        if name in TEXT_COLUMNS: cols[name] = [r[pos] for r in data]
+        elif name in CATEGORY_COLUMNS: cols[name] = pd.Categorical([r[pos] for r in data])
+        elif name in INT_COLUMNS: cols[name] = pd.array(_column(data, pos, np.float64), dtype='Int64')
+        else: cols[name] = _column(data, pos, np.float32)
+    return pd.DataFrame(cols, columns=head)
+
+def _find_table(html):
+    doc = lxml.html.fromstring(html)
+    for xp in SCREENER_XPATHS:
+        found = doc.xpath(xp)
+        if found: return found[0]
+    return None
+
+@diagnostics.timed("finviz.parse")
+def parse_finviz_table(html):
+    """Sayfadaki tarama tablosunu tipli DataFrame'e çevirir; tablo yoksa boş DataFrame."""
+    target = _find_table(html)
+    if target is None: return pd.DataFrame()
+    data = []
+    for row in target.xpath('./tr | ./thead/tr | ./tbody/tr'):
+        cols = [td.text_content().strip() for td in row.xpath('./td')]
+        # Başlık satırı (eski düzende td ile) atlanır
+        if len(cols) >= 11 and cols[0] != 'No.': data.append(cols[:11])
+    return build_finviz_frame(data)
+
+@diagnostics.timed("finviz.parse")
+def parse_screener_table(html):
+    """Özel görünüm (v=152) sayfası: sütun adları başlık satırından okunur."""
+    target = _find_table(html)
+    if target is None: return pd.DataFrame()
+    rows = target.xpath('./tr | ./thead/tr | ./tbody/tr')
+    if not rows: return pd.DataFrame()
+    head = [c.text_content().strip() for c in rows[0].xpath('./th | ./td')]
+    data = []
+    for row in rows[1:]:
+        cols = [td.text_content().strip() for td in row.xpath('./td')]
+        if len(cols) == len(head): data.append(cols)
+    return build_finviz_frame(data, head)
+
+
+# --- FİNVİZ TARAYICI ---
+@diagnostics.timed("finviz.scan")
+def get_finviz_v48(limit_count, exc, sec, pe, peg, roe_val, de, rsi_val, ma_val, rate=FINVIZ_RATE, burst=FINVIZ_BURST, workers=FINVIZ_WORKERS, on_progress=None):
+    """on_progress(0..1): her sayfa bittiğinde çağrılır (UI ilerleme çubuğu için)."""
+    base_url = f"https://finviz.com/screener.ashx?v=111&f={','.join(build_filters(exc, sec, pe, peg, roe_val, de, rsi_val, ma_val))}"
+    # Sayfalar eşzamanlı çekilir; hız sınırı token bucket ile korunur
+    urls = {start_row: f"{base_url}&r={start_row}" for start_row in range(1, limit_count + 1, 20)}
+    pages = {}
+    for i, (start_row, resp) in enumerate(iter_pages(urls, rate=rate, burst=burst, max_workers=workers)):
+        pages[start_row] = parse_finviz_table(resp.text) if resp is not None else None
+        if on_progress: on_progress((i + 1) / len(urls))
+    # r= ofsetine göre sırala; tablo yoksa sonuçların sonuna gelinmiştir
+    all_dfs = []
+    for start_row in sorted(pages):
+        page_df = pages[start_row]
+        if page_df is None: continue
+        if page_df.empty: break
+        all_dfs.append(page_df)
+    return _concat(all_dfs), base_url
+
+
+# --- TÜM EVREN TARAMASI (sayfa sayısı bilinmeden) ---
+@diagnostics.timed("finviz.scan_all")
+def scan_all_pages(base_url, parse=parse_screener_table, chunk=10, rate=FINVIZ_RATE, burst=FINVIZ_BURST, workers=FINVIZ_WORKERS, max_rows=20000):
+    """Sayfaları `chunk`'lık gruplar halinde çeker; boş/eksik ya da tekrar eden sayfada durur."""
+    frames, seen, start = [], set(), 1
+    while start <= max_rows:
+        urls = {r: f"{base_url}&r={r}" for r in range(start, start + chunk * 20, 20)}
+        pages = {r: parse(resp.text) if resp is not None else None for r, resp in iter_pages(urls, rate=rate, burst=burst, max_workers=workers)}
+        for r in sorted(pages):
+            page_df = pages[r]
+            if page_df is None: continue
+            # Finviz son sayfadan sonra son sayfayı tekrar döner
+            if page_df.empty or set(page_df['Ticker']) <= seen: return _concat(frames)
+            seen.update(page_df['Ticker'])
+            frames.append(page_df)
+            if len(page_df) < 20: return _concat(frames)
+        start += chunk * 20
+    return _concat(frames)
+
+def _concat(frames):
+    """Sayfaları birleştirir; farklı kategori kümeleri concat'ta object'e döndüğü için yeniden kategorik yapar."""
+    if not frames: return pd.DataFrame()
+    df = pd.concat(frames).drop_duplicates(subset=['Ticker']).reset_index(drop=True)
+    for c in CATEGORY_COLUMNS:
+        if c in df: df[c] = df[c].astype('category')
+    return df
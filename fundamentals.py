@@ -0,0 +1,203 @@
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+import yfinance as yf
+
+import diagnostics
+from line_items import LineItemIndex
+
+
+# --- TEMEL VERİ ANLIK GÖRÜNTÜSÜ ---
+SOURCE_LABELS = {'income_stmt': 'Gelir tablosu', 'balance_sheet': 'Bilanço', 'cashflow': 'Nakit akışı',
+                 'info': 'Şirket bilgisi', 'fast_info': 'Piyasa değeri'}
+
+@dataclass
+class FundamentalsSnapshot:
+    """Bir hissenin tablo + info verisi; tek seferde çekilir, tüm motorlar bunu okur."""
+    ticker: str
+    income_stmt: pd.DataFrame = field(default_factory=pd.DataFrame)
+    balance_sheet: pd.DataFrame = field(default_factory=pd.DataFrame)
+    cashflow: pd.DataFrame = field(default_factory=pd.DataFrame)
+    info: dict = field(default_factory=dict)
+    market_cap: float = None
+    fetched_at: float = 0.0
+    # Alınamayan parçalar: {etiket: neden}; boşsa anlık görüntü eksiksizdir
+    errors: dict = field(default_factory=dict)
+
+    @classmethod
+    @diagnostics.timed("yfinance.fundamentals")
+    def fetch(cls, ticker):
+        stock = yf.Ticker(ticker)
+        snap = cls(ticker=ticker, fetched_at=time.time())
+        # Her kaynak ayrı korunur; biri düşerse diğerleri yine kullanılır, hangisinin düştüğü kaydedilir
+        for attr in ('income_stmt', 'balance_sheet', 'cashflow'):
+            try:
+                df = getattr(stock, attr)
+                if df is not None: setattr(snap, attr, df)
+            except Exception as e: snap._failed(attr, e)
+        try: snap.info = stock.info or {}
+        except Exception as e: snap._failed('info', e)
+        try: snap.market_cap = stock.fast_info.get('market_cap')
+        except Exception as e: snap._failed('fast_info', e)
+        return snap
+
+    def _failed(self, attr, exc):
+        self.errors[SOURCE_LABELS[attr]] = f"{type(exc).__name__}: {exc}"[:160]
+
+    # Satır kalemi indeksleri ilk erişimde bir kez kurulur
+    def _index(self, attr):
+        cache = self.__dict__.setdefault('_indexes', {})
+        if attr not in cache: cache[attr] = LineItemIndex(getattr(self, attr))
+        return cache[attr]
+
+    @property
+    def income(self): return self._index('income_stmt')
+
+    @property
+    def balance(self): return self._index('balance_sheet')
+
+    @property
+    def cash_flow(self): return self._index('cashflow')
+
+
+# --- YARDIMCI FONKSİYONLAR ---
+def find_value_in_df(df, keywords):
+    """Tek dönemlik Series/tabloda ilk bulunan kalemi döner (df değiştirilmez)."""
+    if df is None or df.empty: return None
+    return LineItemIndex(df).first(keywords)
+
+def format_currency(val):
+    if val is None: return "-"
+    abs_val = abs(val)
+    if abs_val >= 1e9: return f"${val/1e9:.2f} Milyar"
+    if abs_val >= 1e6: return f"${val/1e6:.2f} Milyon"
+    return f"${val:,.2f}"
+
+
+# --- ANALİZ MOTORU 2: DEDEKTİF ---
+def skeptic_analysis(snap):
+    analysis = []
+    try:
+        inc = snap.income
+        if inc.empty: return ["Finansal detay verisi sağlanamadı."]
+        if inc.n_periods > 1:
+            curr_rev = inc.get('revenue', 0)
+            prev_rev = inc.get('revenue', 1)
+            curr_net = inc.get('net_income', 0)
+            prev_net = inc.get('net_income', 1)
+
+            if curr_rev and prev_rev and curr_rev < prev_rev:
+                if curr_net and prev_net and curr_net > prev_net:
+                    analysis.append("✂️ **Kemer Sıkma:** Ciro düşerken Net Kâr artmış. Küçülerek kâr ediliyor.")
+
+            if curr_rev and prev_rev and curr_rev > (prev_rev * 1.20):
+                if curr_net and curr_net < 0:
+                    analysis.append("🚀 **Büyüme Sancısı:** Ciro hızla artıyor (%20+) ancak şirket zarar ediyor.")
+    except Exception: return ["Dedektif analizi atlandı."]
+    return analysis
+
+
+# --- ANALİZ MOTORU 3: SÖZEL FİNANSAL ANALİZ ---
+def verbal_financial_analysis(snap):
+    analysis = []
+    try:
+        inc = snap.income
+        bs = snap.balance
+        if not inc.empty and not bs.empty:
+            rev = inc.get('revenue')
+            gp = inc.get('gross_profit')
+            if rev and gp:
+                margin = (gp / rev) * 100
+                desc = "Çok Yüksek" if margin > 70 else ("Sağlıklı" if margin > 40 else "Düşük")
+                analysis.append(f"📊 **Gelir Yapısı:** Ciro **{format_currency(rev)}**, Brüt Kâr **{format_currency(gp)}**. Marj: **%{margin:.1f}** ({desc}).")
+            net = inc.get('net_income')
+            if net:
+                if net > 0: analysis.append(f"💰 **Net Kârlılık:** **{format_currency(net)}** net kâr (Pozitif).")
+                else: analysis.append(f"⚠️ **Kârlılık:** **{format_currency(net)}** net zarar.")
+            op_inc = inc.get('operating_income')
+            if op_inc: analysis.append(f"⚙️ **Operasyonel Güç:** Faaliyet Kârı **{format_currency(op_inc)}**.")
+            cash = bs.get('cash') or 0
+            debt = bs.get('total_debt') or 0
+            analysis.append(f"🛡️ **Bilanço:** Nakit: **{format_currency(cash)}** | Borç: **{format_currency(debt)}**.")
+            if cash > debt: analysis.append(f"✅ **Nakit Zengini:** Net Nakit Pozisyonu (**{format_currency(cash-debt)}**).")
+            else: analysis.append(f"⚡ **Borçluluk:** Borçlar nakitten fazla.")
+        else: analysis.append("Finansal veriler eksik.")
+    except Exception: return ["Veri çekilemedi."]
+    return analysis
+
+
+# --- METRİKLER (ZORLA HESAPLAMA) ---
+def robust_metrics(snap):
+    metrics = {'EV/EBITDA': None, 'FCF': None, 'Source': '-'}
+    ocf = 0
+    try:
+        # 1. FCF (Önceki mantık)
+        try:
+            cf = snap.cash_flow
+            if not cf.empty:
+                ocf = cf.get('operating_cash_flow') or 0
+                capex = cf.get('capex') or 0
+                if ocf != 0: metrics['FCF'] = ocf - abs(capex)
+        except: pass
+        if metrics['FCF'] is None:
+            metrics['FCF'] = snap.info.get('freeCashflow')
+            if metrics['FCF'] and ocf == 0: ocf = metrics['FCF']
+
+        # 2. EV/EBITDA (ZORLA HESAPLAMA)
+
+        # A) Hazır Veri
+        ev_ebitda_info = snap.info.get('enterpriseToEbitda')
+        if ev_ebitda_info and ev_ebitda_info > 0:
+            metrics['EV/EBITDA'] = ev_ebitda_info
+            metrics['Source'] = 'Yahoo Info'
+            return metrics
+
+        # B) Manuel (Boşlukları 0 Kabul Et)
+        mcap = snap.market_cap
+        if mcap:
+            ev_calc = mcap
+            debt = 0
+            cash = 0
+
+            # Borç/Nakit Çek (Hata verirse 0 kalır)
+            try:
+                bs = snap.balance
+                if not bs.empty:
+                    debt = bs.get('total_debt') or 0
+                    cash = bs.get('cash') or 0
+            except: pass
+
+            ev_calc = mcap + debt - cash
+
+            # EBITDA Çek
+            ebitda_calc = 0
+            try:
+                inc = snap.income
+                if not inc.empty:
+                    ebitda_calc = inc.get('ebitda')
+                    if ebitda_calc is None:
+                        op_inc = inc.get('operating_income') or 0
+                        dep = 0 # Amortismanı bulamazsan boşver
+                        ebitda_calc = op_inc + dep
+            except: pass
+
+            # Son Çare Proxy: OCF
+            if (ebitda_calc is None or ebitda_calc == 0) and ocf != 0:
+                ebitda_calc = ocf
+                metrics['Source'] = 'EV/OCF (Yaklaşık)'
+            elif ebitda_calc:
+                metrics['Source'] = 'Bilanço (Tahmini)'
+
+            # SON HESAP (Sıfıra bölme koruması)
+            if ev_calc > 0 and ebitda_calc and ebitda_calc > 0:
+                metrics['EV/EBITDA'] = ev_calc / ebitda_calc
+            elif ebitda_calc and ebitda_calc < 0:
+                metrics['EV/EBITDA'] = 0
+                metrics['Source'] = 'Zarar (Negatif)'
+            elif ebitda_calc == 0:
+                metrics['EV/EBITDA'] = 0
+                metrics['Source'] = 'Veri Yok'
+
+    except Exception: pass
+    return metrics
@@ -0,0 +1,90 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Kanonik kalem -> öncelik sırasına göre yfinance satır adları (normalize edilmiş)
+LINE_ITEM_SYNONYMS = {
+    'revenue': ['total revenue', 'operating revenue', 'revenue'],
+    'gross_profit': ['gross profit'],
+    'net_income': ['net income', 'net income common stockholders', 'net income from continuing operation net minority interest'],
+    'operating_income': ['operating income', 'total operating income as reported', 'operating profit', 'ebit'],
+    'ebit': ['ebit'],
+    'ebitda': ['ebitda', 'normalized ebitda'],
+    'cash': ['cash and cash equivalents', 'cash cash equivalents and short term investments', 'cash financial', 'cash'],
+    'total_debt': ['total debt', 'long term debt'],
+    'operating_cash_flow': ['operating cash flow', 'cash flow from continuing operating activities'],
+    'capex': ['capital expenditure', 'capital expenditure reported', 'purchase of ppe'],
+    'free_cash_flow': ['free cash flow'],
+}
+
+def normalize_label(label):
+    """'TotalRevenue', 'Total Revenue', 'total_revenue' -> 'total revenue'."""
+    label = re.sub(r'(?<=[a-z0-9])(?=[A-Z])', ' ', str(label))
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', label.lower()).split())
+
+
+# --- SATIR KALEMİ İNDEKSİ ---
+class LineItemIndex:
+    """Bir finansal tablonun satırları için tek seferlik normalize indeks.
+
+    Arama tam eşleşmedir (alt dize taraması yok): 'cash' asla 'cash flow hedges'
+    satırına düşmez. Değerler tüm dönemler için 2-D float dizide tutulur.
+    """
+
+    def __init__(self, df):
+        if isinstance(df, pd.Series): df = df.to_frame()
+        if df is None or df.empty:
+            self.periods = []
+            self.values = np.empty((0, 0))
+            self._rows = {}
+            self._canon = {}
+            return
+        self.periods = list(df.columns)
+        self.values = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        self._rows = {}
+        for pos, label in enumerate(df.index):
+            self._rows.setdefault(normalize_label(label), pos)
+        # Kanonik anahtarlar eş anlamlı listesindeki ilk mevcut satıra çözülür
+        self._canon = {}
+        for key, synonyms in LINE_ITEM_SYNONYMS.items():
+            for syn in synonyms:
+                if syn in self._rows:
+                    self._canon[key] = self._rows[syn]
+                    break
+
+    @property
+    def empty(self):
+        return not self._rows
+
+    @property
+    def n_periods(self):
+        return len(self.periods)
+
+    def row(self, key):
+        """Kanonik anahtar ya da satır adı -> satır konumu (yoksa None)."""
+        pos = self._canon.get(key)
+        if pos is None: pos = self._rows.get(normalize_label(key))
+        return pos
+
+    def get(self, key, period=0):
+        pos = self.row(key)
+        if pos is None or period >= self.n_periods: return None
+        val = self.values[pos, period]
+        return None if np.isnan(val) else float(val)
+
+    def first(self, keys, period=0):
+        for k in keys:
+            val = self.get(k, period)
+            if val is not None: return val
+        return None
+
+    def series(self, key):
+        pos = self.row(key)
+        if pos is None: return pd.Series(dtype=float)
+        return pd.Series(self.values[pos], index=self.periods, dtype=float)
+
+
+def lookup_many(indexes, key, period=0):
+    """{ticker: LineItemIndex} için tek kalemi toplu okur -> ticker indeksli Series."""
+    return pd.Series({t: idx.get(key, period) for t, idx in indexes.items()}, dtype=float)
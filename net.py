@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import diagnostics
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Yanıt bu süreyi aşarsa aynı istek ikinci kez gönderilir (hedged request)
+HEDGE_AFTER = 1.0
+
+
+# --- HIZ SINIRLAYICI (TOKEN BUCKET) ---
+class TokenBucket:
+    """Saniyede `rate` istek; en fazla `burst` istek art arda geçebilir."""
+
+    def __init__(self, rate, burst=1):
+        if not rate > 0: raise ValueError(f"rate > 0 olmalı: {rate!r}")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # Jeton yoksa sıradaki jetonu rezerve et, beklemeyi kilit dışında yap
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0: time.sleep(wait)
+
+
+_host_limiters = {}
+_host_limiters_lock = threading.Lock()
+
+def host_limiter(host, rate, burst=1):
+    """Sunucu başına süreç içinde tek TokenBucket; aynı sunucuya giden tüm hatlar aynı sınırı paylaşır (ilk çağrının rate/burst değeri geçerli)."""
+    with _host_limiters_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None: limiter = _host_limiters[host] = TokenBucket(rate, burst)
+        return limiter
+
+
+# --- ORTAK OTURUM (CONNECTION POOL) ---
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(pool_size=10):
+    """Aynı havuz boyutu için tek bir requests.Session döner (keep-alive)."""
+    with _sessions_lock:
+        s = _sessions.get(pool_size)
+        if s is None:
+            s = requests.Session()
+            s.headers.update(DEFAULT_HEADERS)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _sessions[pool_size] = s
+        return s
+
+def fetch_with_retry(url, session=None, limiter=None, retries=3, backoff=0.5, timeout=10, **kwargs):
+    """Geçici hatalarda (bağlantı, 429, 5xx) üstel bekleme ile yeniden dener."""
+    session = session or get_session()
+    last_exc = None
+    for attempt in range(retries + 1):
+        if limiter:
+            with diagnostics.span("http.rate_limit_wait"): limiter.acquire()
+        try:
+            with diagnostics.span("http.get", host=urlparse(url).hostname):
+                r = session.get(url, timeout=timeout, **kwargs)
+            diagnostics.observe_http(url, r)
+            if r.status_code not in RETRY_STATUS: return r
+            last_exc = requests.HTTPError(f"HTTP {r.status_code}", response=r)
+        except requests.RequestException as e:
+            diagnostics.observe_http(url, error=e)
+            last_exc = e
+        if attempt < retries:
+            diagnostics.incr("http_retries_total", host=urlparse(url).hostname)
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random() * 0.25))
+    raise last_exc
+
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+def hedged_get(url, session=None, hedge_after=HEDGE_AFTER, timeout=10, **kwargs):
+    """Tek deneme; ilk istek hedge_after sn içinde dönmezse kopyası gönderilir, önce gelen yanıt döner.
+
+    Geç kalan istek arka planda tamamlanır (iptal edilemez), sonucu atılır.
+    """
+    session = session or get_session()
+    first = _hedge_pool.submit(fetch_with_retry, url, session, None, 0, 0, timeout, **kwargs)
+    if wait([first], timeout=hedge_after).done: return first.result()
+    diagnostics.incr("http_hedged_total", host=urlparse(url).hostname)
+    pending = {first, _hedge_pool.submit(fetch_with_retry, url, session, None, 0, 0, timeout, **kwargs)}
+    last_exc = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            try: return fut.result()
+            except requests.RequestException as e: last_exc = e
+    raise last_exc
+
+def iter_pages(urls, rate=2.0, burst=2, max_workers=4, retries=3, backoff=0.5, timeout=10):
+    """{anahtar: url} sözlüğünü eşzamanlı çeker, biten sırayla (anahtar, yanıt) üretir.
+
+    Tüm denemeler başarısız olursa yanıt None döner; sıralama çağırana bırakılır. Hız sınırı sunucu
+    başına ortaktır (host_limiter): eşzamanlı taramalar ve profil sayfaları aynı kovadan jeton alır.
+    """
+    limiters = {host: host_limiter(host, rate, burst) for host in {urlparse(u).hostname for u in urls.values()}}
+    session = get_session(max(max_workers, 1))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch_with_retry, url, session, limiters[urlparse(url).hostname], retries, backoff, timeout): key for key, url in urls.items()}
+        for fut in as_completed(futures):
+            try: resp = fut.result()
+            except requests.RequestException: resp = None
+            yield futures[fut], resp
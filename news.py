@@ -0,0 +1,200 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+import diagnostics
+from finviz import FINVIZ_RATE, FINVIZ_BURST
+from net import fetch_with_retry, hedged_get, host_limiter
+from shared_cache import SharedCache, get_cache
+from sentiment import score_headlines, tone
+
+NEWS_TTL = 1800
+RSS_TIMEOUT = 3
+QUOTE_TIMEOUT = 2
+# Aynı sunucuya aynı anda açılabilecek istek sayısı
+HOST_LIMITS = {'news.google.com': 4, 'finviz.com': 2}
+DEFAULT_HOST_LIMIT = 4
+# Aynı anda çevrilen profil sayısı (çeviri istekleri hisse başına)
+TRANSLATE_SLOTS = 4
+# Ön yüklemede aynı anda işlenen (ve kiralı tutulan) hisse sayısı
+PIPELINE_SLOTS = 6
+# Hız sınırlı sunucular (istek/sn, patlama); bunlara yavaş istekte kopya (hedge) gönderilmez
+HOST_RATES = {'finviz.com': (FINVIZ_RATE, FINVIZ_BURST)}
+
+
+# --- AYRIŞTIRICILAR ---
+def parse_rss(content, limit=8):
+    soup = BeautifulSoup(content, features='xml')
+    news = []
+    for item in soup.find_all('item')[:limit]:
+        news.append({"Date": item.pubDate.text[:16], "Title": item.title.text, "Link": item.link.text})
+    return news
+
+def parse_profile(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    profile_td = soup.find("td", class_="fullview-profile")
+    return profile_td.get_text(strip=True) if profile_td else None
+
+def fallback_profile(row):
+    """Profil bulunamazsa Finviz satırındaki sektör/endüstri/ülkeden üretilir."""
+    try:
+        return f"Bu şirket **{row['Sector']}** sektöründe ve **{row['Industry']}** endüstrisinde faaliyet göstermektedir. Şirket merkezi **{row['Country']}** ülkesindedir."
+    except (KeyError, TypeError): return None
+
+
+# --- ANALİZ MOTORU 1: HABER ÖZETİ ---
+def news_score(news_list):
+    """Başlıklardaki farklı pozitif - negatif sözlük kelimesi sayısı (kelime sınırlı eşleme)."""
+    return score_headlines([n['Title'] for n in news_list])
+
+def generate_news_summary(news_list):
+    if not news_list: return "Yorumlanacak güncel haber akışı bulunamadı.", "gray"
+    label, color = tone(news_score(news_list))
+    if label == "POZİTİF": return "Son dönemdeki haber akışı ağırlıklı olarak **POZİTİF**. Büyüme ve beklenti üzeri sonuçlar öne çıkıyor.", color
+    elif label == "NEGATİF": return "Son dönemdeki haber akışı ağırlıklı olarak **NEGATİF**. Düşüş ve risk unsurları dikkat çekiyor.", color
+    else: return "Haber akışı **DENGELİ/NÖTR** seyrediyor.", color
+
+
+# --- ASENKRON HABER & PROFİL HATTI ---
+async def _get(url, sems, timeout, hedge_after=None):
+    host = urlparse(url).hostname
+    limiter = host_limiter(host, *HOST_RATES[host]) if host in HOST_RATES else None
+    async with sems[host]:
+        if hedge_after and limiter is None: return await asyncio.to_thread(hedged_get, url, None, hedge_after, timeout)
+        return await asyncio.to_thread(fetch_with_retry, url, None, limiter, 0, 0, timeout)
+
+def _failure(resp):
+    if isinstance(resp, Exception): return f"{type(resp).__name__}: {resp}"[:160]
+    return f"HTTP {resp.status_code}"
+
+def _host_semaphores():
+    sems = defaultdict(lambda: asyncio.Semaphore(DEFAULT_HOST_LIMIT))
+    for host, n in HOST_LIMITS.items(): sems[host] = asyncio.Semaphore(n)
+    return sems
+
+async def fetch_news_profile(ticker, row, sems, hedge_after=None):
+    """RSS ve Finviz profil sayfası aynı anda çekilir; en yavaş kaynak kadar sürer.
+
+    Profil ham (İngilizce) döner; çeviri _fetch_and_store içinde hisse başına yapılır. Alınamayan
+    kaynak "Errors" altında {kaynak: neden} olarak işaretlenir.
+    """
+    data = {"Profile": "Bulunamadı", "News": []}
+    errors = {}
+    rss_url = f"https://news.google.com/rss/search?q={ticker}+stock&hl=en-US&gl=US&ceid=US:en"
+    quote_url = f"https://finviz.com/quote.ashx?t={ticker}"
+    rss, quote = await asyncio.gather(_get(rss_url, sems, RSS_TIMEOUT, hedge_after), _get(quote_url, sems, QUOTE_TIMEOUT, hedge_after), return_exceptions=True)
+    if isinstance(rss, requests.Response) and rss.status_code == 200:
+        try: data["News"] = parse_rss(rss.content)
+        except Exception as e: errors["Google News RSS"] = f"ayrıştırma: {e}"[:160]
+    else: errors["Google News RSS"] = _failure(rss)
+    if isinstance(quote, requests.Response) and quote.status_code == 200:
+        data["Profile"] = parse_profile(quote.text) or "Bulunamadı"
+    # 404: Finviz'de sayfası olmayan hisse (hata değil, profil yedekten üretilir)
+    elif not (isinstance(quote, requests.Response) and quote.status_code == 404): errors["Finviz profil"] = _failure(quote)
+    if errors: data["Errors"] = errors
+    return data
+
+
+# --- ÖNBELLEK & ÖN YÜKLEME ---
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _shared_key(ticker):
+    return SharedCache.key("news", ticker)
+
+def cached_news_profile(ticker):
+    with _cache_lock:
+        entry = _cache.get(ticker)
+    if entry and time.time() - entry[0] < NEWS_TTL: return entry[1]
+    if entry: diagnostics.cache_event("news", "eviction")
+    # Başka oturum/süreç çektiyse ortak katmandan (kayıt zamanıyla) alınır
+    entry = get_cache().peek(_shared_key(ticker), NEWS_TTL)
+    if entry is None: return None
+    with _cache_lock: _cache[ticker] = entry
+    return entry[1]
+
+def cached_news_profiles(tickers):
+    """cached_news_profile'ın toplu hâli: süreç içi önbellekte olmayanlar ortak katmandan tek sorguyla okunur."""
+    now, out, missing = time.time(), {}, []
+    with _cache_lock:
+        for t in tickers:
+            entry = _cache.get(t)
+            if entry and now - entry[0] < NEWS_TTL: out[t] = entry[1]
+            else: missing.append(t)
+    if missing:
+        keys = {_shared_key(t): t for t in missing}
+        found = get_cache().peek_many(keys, NEWS_TTL)
+        with _cache_lock:
+            for k, entry in found.items(): _cache[keys[k]] = entry; out[keys[k]] = entry[1]
+    return out
+
+def _store(ticker, data):
+    with _cache_lock: _cache[ticker] = (time.time(), data)
+    get_cache().put(_shared_key(ticker), data)
+
+async def _fetch_many(rows, translate_many=None, hedge_after=None, claim=False):
+    """-> {ticker: veri}; hatasız sonuçlar önbelleğe yazılır.
+
+    claim=True (ön yükleme): her hisse yalnız kendi çekimi süresince kiralanır; önbellekte olan ya da
+    başka oturum/süreçte çekilmekte olan hisse atlanır.
+    """
+    with diagnostics.span("news.fetch_many"):
+        return await _fetch_and_store(rows, translate_many, hedge_after, claim)
+
+async def _fetch_and_store(rows, translate_many, hedge_after=None, claim=False):
+    sems = _host_semaphores()
+    translating = asyncio.Semaphore(TRANSLATE_SLOTS)
+    # Aynı anda işlenen hisse sayısı sınırlı: kira yalnız gerçekten çekilen hisselerde tutulur
+    slots = asyncio.Semaphore(PIPELINE_SLOTS)
+    async def fetch_one(ticker, row):
+        try: data = await fetch_news_profile(ticker, row, sems, hedge_after)
+        except Exception as e: data = {"Profile": "Bulunamadı", "News": [], "Errors": {"Haber hattı": _failure(e)}}
+        # Profil hisse biter bitmez çevrilir (cümle önbelleği tekrarları ağsız çözer) ve hemen yazılır:
+        # ön yüklemedeki bir hisse tüm partinin bitmesini beklemez
+        if translate_many and data["Profile"] != "Bulunamadı":
+            try:
+                async with translating:
+                    with diagnostics.span("news.translate"):
+                        data["Profile"] = (await asyncio.to_thread(translate_many, [data["Profile"]]))[0]
+            except Exception: pass
+        if data["Profile"] == "Bulunamadı": data["Profile"] = fallback_profile(row) or data["Profile"]
+        # Eksik kaynaklı sonuç önbelleğe yazılmaz; bir sonraki istekte yeniden denenir
+        if "Errors" not in data: _store(ticker, data)
+        return ticker, data
+    async def one(ticker, row):
+        if not claim: return await fetch_one(ticker, row)
+        async with slots:
+            key = _shared_key(ticker)
+            if cached_news_profile(ticker) is not None or not get_cache().lease(key): return ticker, None
+            try: return await fetch_one(ticker, row)
+            finally: get_cache().release(key)
+    return {t: d for t, d in await asyncio.gather(*(one(t, r) for t, r in rows.items())) if d is not None}
+
+def get_news_profile(ticker, row, translate_many=None, hedge_after=None):
+    """Ön yüklenmişse anında döner; değilse tek hisse için hattı çalıştırır (hedge_after: yavaş isteğe kopya)."""
+    data = cached_news_profile(ticker)
+    diagnostics.cache_event("news", "miss" if data is None else "hit")
+    if data is None:
+        # Aynı hisse başka oturumda, ön yüklemede ya da başka süreçte çekiliyorsa ikinci istek atılmaz, sonucu beklenir
+        # (kira yalnız o hissenin çekimi süresince tutulur; bekleme en fazla tek çekim kadardır)
+        key = _shared_key(ticker)
+        if get_cache().lease(key) or get_cache().wait(key, NEWS_TTL) is None:
+            try: data = asyncio.run(_fetch_many({ticker: row}, translate_many, hedge_after)).get(ticker)
+            finally: get_cache().release(key)
+        data = data or cached_news_profile(ticker) or {"Profile": fallback_profile(row) or "Bulunamadı", "News": []}
+    return data
+
+def prefetch_news_profiles(rows, translate_many=None):
+    """{ticker: satır} için haber/profili arka planda ısıtır; başlatılan thread'i döner.
+
+    Başka oturumda/süreçte çekilmekte olan hisseler atlanır; sonuçları ortak katmandan okunur.
+    """
+    todo = {t: r for t, r in rows.items() if cached_news_profile(t) is None}
+    thread = threading.Thread(target=lambda: asyncio.run(_fetch_many(todo, translate_many, claim=True)), daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,92 @@
+"""Detay görünümü için süre bütçeli kaynak orkestratörü.
+
+Bağımsız kaynaklar (fiyat geçmişi, finansal tablolar, haber/profil) aynı anda başlatılır; render
+en fazla `budget` saniye bekler. Yetişmeyen kaynak arka planda sürer ve sonucunu kendi önbelleğine
+yazar; bir sonraki çalıştırma taze bir çağrıyla oradan okur (TTL'ler korunur). Henüz başlamamış
+olanlar iptal edilip sonraki çalıştırmaya bırakılır.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import diagnostics
+
+DETAIL_BUDGET = 4.0
+DETAIL_WORKERS = 6
+OK, PENDING, FAILED, SKIPPED = "ok", "pending", "failed", "skipped"
+
+
+class SourceResult:
+    """Kaynak sonucu: status ok | pending | failed | skipped; error yalnız failed'da dolu."""
+
+    def __init__(self, source, label, status, value=None, error=None, elapsed=None):
+        self.source = source
+        self.label = label
+        self.status = status
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    def describe(self):
+        if self.status == PENDING: return f"⏳ {self.label}: bekleniyor (sonraki yenilemede gelecek)"
+        if self.status == SKIPPED: return f"⏭️ {self.label}: süre bütçesi doldu, sıraya alındı"
+        if self.status == FAILED: return f"⚠️ {self.label}: alınamadı ({self.error})"
+        return f"✅ {self.label}"
+
+
+class DetailOrchestrator:
+    def __init__(self, workers=DETAIL_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="detail")
+        self._inflight = {}  # (kaynak, anahtar) -> (future, başlangıç)
+        self._lock = threading.Lock()
+
+    def _submit(self, source, key, fn):
+        with self._lock:
+            entry = self._inflight.get((source, key))
+            # Süren (bütçeyi aşmış) çağrı yeniden başlatılmaz; sonucu beklenir
+            if entry is not None: return entry
+            entry = self._inflight[(source, key)] = (self._pool.submit(fn), time.perf_counter())
+        # Biten/iptal edilen kayıt hemen düşer: sonraki çalıştırma taze çağrıyla önbellekler üzerinden okur
+        entry[0].add_done_callback(lambda fut: self._forget((source, key), fut))
+        return entry
+
+    def _forget(self, slot, fut):
+        with self._lock:
+            if self._inflight.get(slot, (None,))[0] is fut: del self._inflight[slot]
+
+    def gather(self, key, sources, budget=DETAIL_BUDGET):
+        """sources: {ad: (etiket, fn)} -> {ad: SourceResult}; toplam bekleme en fazla `budget` sn."""
+        started = {name: self._submit(name, key, fn) for name, (_, fn) in sources.items()}
+        with diagnostics.span("detail.gather"):
+            wait([f for f, _ in started.values()], timeout=budget)
+        results = {}
+        for name, (fut, t0) in started.items():
+            label = sources[name][0]
+            # Kuyrukta bekleyen (başlamamış) iş iptal edilir; bir sonraki çalıştırmada yeniden gönderilir
+            if not fut.done() and fut.cancel(): status, value, error = SKIPPED, None, None
+            elif not fut.done(): status, value, error = PENDING, None, None
+            elif fut.exception() is not None:
+                exc = fut.exception()
+                status, value, error = FAILED, None, f"{type(exc).__name__}: {exc}"[:160]
+            else: status, value, error = OK, fut.result(), None
+            diagnostics.incr("detail_source_total", source=name, status=status)
+            results[name] = SourceResult(name, label, status, value, error, time.perf_counter() - t0)
+        return results
+
+    def settled(self, key, names):
+        """Bekleyen kaynakların hepsi bitti mi (yeniden çalıştırma tetiklemek için)."""
+        with self._lock:
+            return all((n, key) not in self._inflight for n in names)
+
+
+def detail_sources(ticker, row, history, fundamentals, news):
+    """Detay görünümünün kaynakları (gather girdisi): history(ticker), fundamentals(ticker), news(ticker, row)."""
+    return {
+        'history': ("Fiyat geçmişi (Yahoo)", lambda: history(ticker)),
+        'fundamentals': ("Finansal tablolar (Yahoo)", lambda: fundamentals(ticker)),
+        'news': ("Haber & profil (Google News + Finviz)", lambda: news(ticker, row)),
+    }
@@ -0,0 +1,253 @@
+"""Ortak fiyat paneli: hisse x işlem günü float32 kapanış/hacim, ortak takvimde hizalı.
+
+Tüm evrenler tek paneli paylaşır: yeni hisseler sütun olarak eklenir (yalnız onlar indirilir), yeni
+günler satır olarak sona eklenir; her evren kendi sütun dilimini okur. Dosyalar gün öncelikli
+np.memmap'tir, son pencere bitişik okunur. 1000 hisse x 5 yıl ~ 1260 x 1000 x 4 B x 2 alan ~ 10 MB.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import diagnostics
+from shared_cache import LEASE_TTL, POLL_INTERVAL, get_cache
+
+PANEL_DIR = os.environ.get("BORSA_PANEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".panel"))
+FIELDS = ['Close', 'Volume']
+# Beta ve göreli güç için karşılaştırma endeksi; her panele eklenir
+BENCHMARK = "SPY"
+# float32 kapanışta örtüşen bar bu orandan fazla değişmişse hisse geçmişi yeniden düzeltilmiştir
+ADJUST_TOLERANCE = 1e-4
+# Geçerli panele ait olmayan (çöken yazmadan kalan) dizinler bu kadar eskiyse silinir (sn)
+STALE_TMP = 3600
+
+
+# --- PANEL (SALT OKUNUR GÖRÜNÜM) ---
+class PricePanel:
+    """Ortak panelin bir evrene ait dilimi: tickers (evren + endeks), dates ve alan başına (gün, hisse) memmap."""
+
+    def __init__(self, path, meta, tickers=None):
+        self.path = path
+        self.benchmark = meta['benchmark']
+        self.fetched_at = meta['fetched_at']
+        n, stored = meta['days'], meta['tickers']
+        self.dates = pd.DatetimeIndex(np.fromfile(os.path.join(path, "dates.i8"), dtype='<i8', count=n).view('datetime64[ns]'))
+        self._cols = {t: i for i, t in enumerate(stored)}
+        # Evren verilmezse paneldeki tüm hisseler; endeks her dilimde sondadır
+        self.tickers = stored if tickers is None else [t for t in dict.fromkeys([*tickers, self.benchmark]) if t in self._cols]
+        self._data = {f: np.memmap(os.path.join(path, f"{f}.f4"), dtype='<f4', mode='r', shape=(n, len(stored))) if n else
+                      np.empty((0, len(stored)), dtype='<f4') for f in FIELDS}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def field(self, name):
+        """Tüm panel (evren dilimi değil): (gün, paneldeki hisse)."""
+        return self._data[name]
+
+    def window(self, name, days=None, tickers=None):
+        """Son `days` gün (tümü: None) -> (gün, hisse) dizisi; yalnız bu dilim belleğe okunur. tickers: varsayılan evren."""
+        data = self._data[name]
+        rows = data[-days:] if days else data
+        return np.array(rows[:, self.columns(self.tickers if tickers is None else tickers)])
+
+    def columns(self, tickers):
+        return [self._cols[t] for t in tickers]
+
+    def series(self, ticker, name='Close'):
+        return pd.Series(np.array(self._data[name][:, self._cols[ticker]]), index=self.dates, name=ticker)
+
+    @property
+    def members(self):
+        """Evren hisseleri (endeks hariç)."""
+        return [t for t in self.tickers if t != self.benchmark]
+
+
+# --- DİSK DEPOSU ---
+class PanelStore:
+    """Tek ortak panel: root/panel.json (meta + geçerli veri dizini) ve root/p-*/ veri dosyaları.
+
+    Tazeyse diskten okunur; değilse yalnız yeni günler eklenir. Panelde olmayan hisseler tek indirmeyle
+    yeni sütun olarak eklenir (panel yeni dizine yazılıp meta oraya çevrilir); evren değişimi tüm
+    evreni yeniden indirmez.
+    """
+
+    def __init__(self, root=PANEL_DIR, min_refresh=900, period="5y", benchmark=BENCHMARK):
+        self.root = root
+        self.min_refresh = min_refresh
+        self.period = period
+        self.benchmark = benchmark
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _exclusive(self):
+        """Süreçler arası: paneli aynı anda tek süreç günceller (ortak önbellek kirası).
+
+        Kira LEASE_TTL içinde alınamazsa (takılmış sahip) yine de devam edilir; yazmalar yarışa dayanıklıdır.
+        """
+        cache, lease_key = get_cache(), "panel:shared"
+        deadline = time.time() + LEASE_TTL
+        while not cache.lease(lease_key) and time.time() < deadline: time.sleep(POLL_INTERVAL)
+        try: yield
+        finally: cache.release(lease_key)
+
+    def _fresh(self, meta, force=False):
+        return meta and meta['days'] >= 2 and not force and time.time() - meta['fetched_at'] < self.min_refresh
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.root, "panel.json")) as f: return json.load(f)
+        except (OSError, ValueError): return None
+
+    def _write_meta(self, meta):
+        with open(os.path.join(self.root, "panel.json.tmp"), "w") as f: json.dump(meta, f)
+        os.replace(os.path.join(self.root, "panel.json.tmp"), os.path.join(self.root, "panel.json"))
+
+    def _open(self, tickers, meta=None):
+        """meta'nın gösterdiği dizinden evren dilimi; dizin bu arada değiştirildiyse meta yeniden okunur."""
+        for _ in range(3):
+            meta = meta or self._read_meta()
+            if meta is None: return None
+            try: return PricePanel(os.path.join(self.root, meta['dir']), meta, tickers)
+            except FileNotFoundError: meta = None
+        return None
+
+    def _missing(self, meta, tickers):
+        have = set(meta['tickers']) if meta else set()
+        return [t for t in dict.fromkeys(tickers) if t not in have and t != self.benchmark]
+
+    def load(self, tickers):
+        """Evreni kapsayan paneli ağ olmadan açar (yoksa None)."""
+        meta = self._read_meta()
+        return self._open(tickers, meta) if meta and not self._missing(meta, tickers) else None
+
+    def panel(self, tickers, force=False):
+        tickers = list(tickers)
+        meta = self._read_meta()
+        if self._fresh(meta, force) and not self._missing(meta, tickers):
+            diagnostics.cache_event("panel", "hit")
+            return self._open(tickers, meta)
+        requested_at = time.time()
+        with self._lock, self._exclusive():
+            # Kirayı beklerken başka süreç yenilemiş / sütunları eklemiş olabilir
+            meta = self._read_meta()
+            refreshed = meta and meta['fetched_at'] >= requested_at and self._fresh(meta)
+            missing = self._missing(meta, tickers)
+            if (refreshed or self._fresh(meta, force)) and not missing:
+                diagnostics.cache_event("panel", "hit")
+                return self._open(tickers, meta)
+            diagnostics.cache_event("panel", "miss")
+            if not meta or meta['days'] < 2:
+                meta = self._build(sorted((set(missing) | set(meta['tickers'] if meta else [])) - {self.benchmark}) + [self.benchmark], meta)
+            else:
+                if not refreshed and not self._fresh(meta, force): meta = self._append(meta)
+                if missing: meta = self._add_columns(meta, missing)
+            self._prune(keep=meta['dir'])
+        return self._open(tickers, meta)
+
+    # --- İNDİRME ---
+    def _download(self, tickers, **kwargs):
+        """yf.download -> (tarihler, {alan: (gün, hisse) float32}); eksik hisse/gün NaN."""
+        with diagnostics.span("yfinance.download", mode="full" if 'period' in kwargs else "incremental"):
+            raw = yf.download(tickers, auto_adjust=True, progress=False, group_by='column', threads=True, **kwargs)
+        if raw.empty: return pd.DatetimeIndex([]), {f: np.empty((0, len(tickers)), dtype='<f4') for f in FIELDS}
+        dates = raw.index.tz_localize(None) if raw.index.tz is not None else raw.index
+        data = {}
+        for f in FIELDS:
+            frame = raw[f] if f in raw.columns.get_level_values(0) else pd.DataFrame(index=raw.index)
+            if isinstance(frame, pd.Series): frame = frame.to_frame(tickers[0])
+            data[f] = frame.reindex(columns=tickers).to_numpy(dtype='<f4')
+        return pd.DatetimeIndex(dates).normalize(), data
+
+    # --- YAZMA ---
+    def _write_panel(self, meta, dates, data):
+        """Yeni veri dizinine yazar, meta'yı ona çevirir, eskisini siler (açık memmap'ler eski dosyalarda geçerli kalır)."""
+        os.makedirs(self.root, exist_ok=True)
+        # Benzersiz dizin: aynı anda yazan başka süreçle çakışmaz
+        path = tempfile.mkdtemp(dir=self.root, prefix="p-")
+        np.asarray(dates, dtype='datetime64[ns]').view('<i8').tofile(os.path.join(path, "dates.i8"))
+        for f in FIELDS: np.ascontiguousarray(data[f]).tofile(os.path.join(path, f"{f}.f4"))
+        old = meta.get('dir')
+        meta = {**meta, 'dir': os.path.basename(path), 'days': len(dates), 'fetched_at': time.time()}
+        self._write_meta(meta)
+        if old: shutil.rmtree(os.path.join(self.root, old), ignore_errors=True)
+        return meta
+
+    def _build(self, tickers, meta=None):
+        dates, data = self._download(tickers, period=self.period)
+        return self._write_panel({**(meta or {}), 'tickers': tickers, 'benchmark': self.benchmark}, dates, data)
+
+    def _add_columns(self, meta, tickers):
+        """Panelde olmayan hisseler tek indirmeyle eklenir; mevcut takvime hizalanır (eksik gün NaN)."""
+        dates, data = self._download(tickers, period=self.period)
+        # İndirme tamamen başarısızsa sütun eklenmez: sonraki istekte yeniden denenir
+        if len(dates) == 0: return meta
+        current = PricePanel(os.path.join(self.root, meta['dir']), meta)
+        pos = current.dates.get_indexer(dates)
+        merged = {}
+        for f in FIELDS:
+            block = np.full((len(current), len(tickers)), np.nan, dtype='<f4')
+            block[pos[pos >= 0]] = data[f][pos >= 0]
+            merged[f] = np.concatenate([current.field(f), block], axis=1)
+        return self._write_panel({**meta, 'tickers': meta['tickers'] + list(tickers)}, current.dates, merged)
+
+    def _append(self, meta):
+        """Son kesinleşmiş günden itibaren çeker: örtüşen gün kontrol, son gün yeniden yazılır, yeniler eklenir."""
+        path = os.path.join(self.root, meta['dir'])
+        panel = PricePanel(path, meta)
+        tickers, n = meta['tickers'], meta['days']
+        anchor = panel.dates[-2]
+        dates, data = self._download(tickers, start=anchor.strftime('%Y-%m-%d'))
+        if len(dates) == 0 or dates[0] != anchor:
+            # Kaynak örtüşmeyi döndürmedi (tatil/hata): mevcut panel kalır
+            meta = {**meta, 'fetched_at': time.time()}; self._write_meta(meta)
+            return meta
+        old, new = panel.field('Close')[-2], data['Close'][0]
+        both = ~np.isnan(old) & ~np.isnan(new)
+        adjusted = [tickers[i] for i in np.flatnonzero(both & (np.abs(new - old) > ADJUST_TOLERANCE * np.abs(old)))]
+        # Son satır (gün içi olabilir) üzerine yazılır, sonrası eklenir; dosya hiç kısalmaz (açık memmap'ler geçerli kalır)
+        keep = n - 1
+        _write_at(os.path.join(path, "dates.i8"), keep * 8, np.asarray(dates[1:], dtype='datetime64[ns]').view('<i8'))
+        for f in FIELDS: _write_at(os.path.join(path, f"{f}.f4"), keep * len(tickers) * 4, data[f][1:])
+        meta = {**meta, 'days': keep + len(dates) - 1, 'fetched_at': time.time()}
+        if adjusted: self._rewrite_columns(path, meta, adjusted)
+        self._write_meta(meta)
+        return meta
+
+    def _rewrite_columns(self, path, meta, tickers):
+        """Bölünme/temettü düzeltmesi gelen hisselerin tüm sütunu yeniden çekilir (panelin kalanı korunur)."""
+        diagnostics.cache_event("panel", "eviction", len(tickers))
+        dates, data = self._download(tickers, period=self.period)
+        stored = pd.DatetimeIndex(np.fromfile(os.path.join(path, "dates.i8"), dtype='<i8', count=meta['days']).view('datetime64[ns]'))
+        pos = stored.get_indexer(dates)
+        cols = [meta['tickers'].index(t) for t in tickers]
+        for f in FIELDS:
+            mm = np.memmap(os.path.join(path, f"{f}.f4"), dtype='<f4', mode='r+', shape=(meta['days'], len(meta['tickers'])))
+            block = np.full((meta['days'], len(cols)), np.nan, dtype='<f4')
+            block[pos[pos >= 0]] = data[f][pos >= 0]
+            mm[:, cols] = block
+            mm.flush()
+
+    def _prune(self, keep):
+        """Geçerli dizin dışındaki eski dizinler (çöken yazmalar, eski evren başına paneller) silinir."""
+        try: names = os.listdir(self.root)
+        except OSError: return
+        for d in names:
+            full = os.path.join(self.root, d)
+            if d == keep or not os.path.isdir(full): continue
+            try:
+                if time.time() - os.path.getmtime(full) > STALE_TMP: shutil.rmtree(full, ignore_errors=True)
+            except OSError: pass
+
+
+def _write_at(path, offset, arr):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(np.ascontiguousarray(arr).tobytes())
@@ -0,0 +1,130 @@
+"""Olası sonraki hisseler için arka plan ön yükleme zamanlayıcısı.
+
+Öncelik kuyruğu + sabit sayıda işçi: tarama sırasındaki ilk N hisse için fiyat geçmişi ve temel veri
+ısıtılır (haber/profil ayrı hatta: news.prefetch_news_profiles). Durum oturum başınadır: seçilen hisse
+o oturumun işlerinin başına alınır, yeni tarama yalnız aynı oturumun kuyruktaki eski işlerini iptal
+eder. İşçiler ve Yahoo hız sınırı tüm oturumlarda ortaktır.
+"""
+import itertools
+import queue
+import threading
+from collections import OrderedDict
+
+import diagnostics
+from net import TokenBucket
+
+PREFETCH_WORKERS = 3
+PREFETCH_TOP_N = 20
+# Yahoo (temel veri + geçmiş) istek sınırı
+YAHOO_RATE = 2.0
+YAHOO_BURST = 4
+# Aynı hissede iş sırası: önce fiyat (grafik), sonra temel veri
+KIND_ORDER = {'history': 0, 'fundamentals': 1}
+RATE_LIMITED = {'history', 'fundamentals'}
+# Seçilen hisseden sonra öne alınan tablo komşusu sayısı (olası sonraki seçim)
+PROMOTE_NEIGHBORS = 2
+# Bellekte tutulan en fazla oturum durumu; fazlası en eski boştaki oturumdan silinir
+MAX_SESSIONS = 64
+
+
+class _Session:
+    def __init__(self):
+        self.generation = 0
+        self.rows = {}
+        self.done = set()      # (hisse, tür)
+        self.queued = set()
+        self.running = set()
+        self.failed = set()
+
+
+class PrefetchScheduler:
+    """loaders={'history': f(ticker, row), 'fundamentals': ...}; sonuçlar loader'ın kendi önbelleğine yazılır."""
+
+    def __init__(self, loaders, workers=PREFETCH_WORKERS, rate=YAHOO_RATE, burst=YAHOO_BURST):
+        self.loaders = loaders
+        self.limiter = TokenBucket(rate, burst)
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"prefetch-{i}", daemon=True).start()
+
+    # --- OTURUM DURUMU ---
+    def _state(self, session):
+        state = self._sessions.get(session)
+        if state is None:
+            state = self._sessions[session] = _Session()
+            idle = [s for s, other in self._sessions.items() if not other.queued and not other.running and s != session]
+            for s in idle[:max(0, len(self._sessions) - MAX_SESSIONS)]: del self._sessions[s]
+        self._sessions.move_to_end(session)
+        return state
+
+    # --- KUYRUK ---
+    def _put(self, session, state, priority, ticker, kinds):
+        for kind in kinds:
+            task = (ticker, kind)
+            # Öne alınan iş yeniden kuyruğa girer; eski kaydı işçi atlar
+            if task in state.done or task in state.running: continue
+            state.queued.add(task)
+            self._queue.put(((priority, KIND_ORDER[kind]), next(self._seq), (session, state.generation, ticker, kind)))
+
+    def schedule(self, rows, top_n=PREFETCH_TOP_N, session=None):
+        """Oturumun yeni evreni: oturumun kuyruktaki eski işleri iptal edilir, ilk top_n hisse sırayla kuyruğa alınır.
+
+        rows: {ticker: satır} tarama sırasıyla (dict sırası korunur).
+        """
+        with self._lock:
+            state = self._state(session)
+            # Eski nesil kayıtlar kuyrukta kalır, işçi alınca atlar
+            diagnostics.incr("prefetch_cancelled_total", len(state.queued))
+            state.generation += 1
+            state.rows = dict(rows)
+            state.done.clear(); state.queued.clear(); state.running.clear(); state.failed.clear()
+            for rank, ticker in enumerate(list(state.rows)[:top_n]):
+                self._put(session, state, rank, ticker, self.loaders)
+
+    def promote(self, ticker, neighbors=PROMOTE_NEIGHBORS, session=None):
+        """Seçilen hisse ve tablodaki sonraki komşuları (bitmemiş işleriyle) kuyruğun başına alınır."""
+        with self._lock:
+            state = self._state(session)
+            order = list(state.rows)
+            if ticker not in state.rows: return
+            i = order.index(ticker)
+            picked = order[i:i + 1 + neighbors]
+            # Negatif öncelik tarama sırasındaki tüm işlerin (0, 1, ...) önüne geçer
+            for k, t in enumerate(picked): self._put(session, state, k - len(picked), t, self.loaders)
+
+    def status(self, session=None):
+        with self._lock:
+            state = self._sessions.get(session) or _Session()
+            return {'done': len(state.done), 'running': len(state.running), 'pending': len(state.queued), 'failed': len(state.failed)}
+
+    def is_warm(self, ticker, session=None):
+        with self._lock:
+            state = self._sessions.get(session)
+            return state is not None and all((ticker, k) in state.done for k in self.loaders)
+
+    # --- İŞÇİ ---
+    def _worker(self):
+        while True:
+            _, _, (session, gen, ticker, kind) = self._queue.get()
+            task = (ticker, kind)
+            with self._lock:
+                state = self._sessions.get(session)
+                # Eski nesil, silinmiş oturum ya da öne alınmış kopyası zaten alınmış iş
+                if state is None or gen != state.generation or task not in state.queued: continue
+                state.queued.discard(task); state.running.add(task)
+                row = state.rows.get(ticker)
+            if kind in RATE_LIMITED: self.limiter.acquire()
+            failed = False
+            try:
+                with diagnostics.span("prefetch.task", kind=kind):
+                    self.loaders[kind](ticker, row)
+            except Exception:
+                failed = True
+            diagnostics.incr("prefetch_tasks_total", kind=kind, status="error" if failed else "ok")
+            with self._lock:
+                if gen != state.generation: continue
+                state.running.discard(task); state.done.add(task)
+                if failed: state.failed.add(task)
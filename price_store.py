@@ -0,0 +1,118 @@
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import diagnostics
+
+STORE_DIR = os.environ.get("BORSA_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".price_store"))
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+# Örtüşen bar bu orandan fazla değişmişse geçmiş yeniden düzeltilmiştir (bölünme/temettü)
+ADJUST_TOLERANCE = 1e-6
+
+
+# --- YEREL FİYAT DEPOSU (SÜTUN BAZLI, YALNIZ EKLEME) ---
+class PriceStore:
+    """Hisse başına sütun dosyaları: Date.i8 + OHLCV .f8, np.memmap ile okunur.
+
+    Güncellemede yalnız son kayıtlı tarihten sonraki barlar çekilir. Son bar
+    (gün içi olabilir) her güncellemede yeniden yazılır; örtüşen bar farklı
+    gelirse ya da yeni barlarda bölünme/temettü varsa tüm geçmiş yeniden çekilir.
+    """
+
+    def __init__(self, root=STORE_DIR, min_refresh=900, period="5y"):
+        self.root = root
+        self.min_refresh = min_refresh
+        self.period = period
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, ticker):
+        return os.path.join(self.root, re.sub(r'[^A-Za-z0-9._-]', '_', ticker.upper()))
+
+    def _lock(self, ticker):
+        with self._locks_guard:
+            return self._locks.setdefault(ticker.upper(), threading.Lock())
+
+    def _read_meta(self, ticker):
+        try:
+            with open(os.path.join(self._dir(ticker), "meta.json")) as f: return json.load(f)
+        except (OSError, ValueError): return None
+
+    def _write_meta(self, ticker, meta):
+        path = os.path.join(self._dir(ticker), "meta.json")
+        with open(path + ".tmp", "w") as f: json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+
+    def load(self, ticker):
+        """Diskteki geçmişi ağ olmadan okur (yoksa boş DataFrame)."""
+        meta = self._read_meta(ticker)
+        if not meta or not meta.get('rows'): return pd.DataFrame(columns=OHLCV)
+        d, n = self._dir(ticker), meta['rows']
+        try:
+            dates = np.memmap(os.path.join(d, "Date.i8"), dtype='<i8', mode='r', shape=(n,))
+            data = {c: np.asarray(np.memmap(os.path.join(d, f"{c}.f8"), dtype='<f8', mode='r', shape=(n,))) for c in OHLCV}
+        except (OSError, ValueError):
+            # Yarım kalmış yazma: boş dön, history() baştan çeker
+            return pd.DataFrame(columns=OHLCV)
+        index = pd.DatetimeIndex(np.asarray(dates).view('datetime64[ns]'), name='Date').tz_localize('UTC')
+        if meta.get('tz'): index = index.tz_convert(meta['tz'])
+        return pd.DataFrame(data, index=index)
+
+    def _write(self, ticker, df, keep_rows=0):
+        """İlk keep_rows satırı koruyup df'i sona ekler."""
+        d = self._dir(ticker)
+        os.makedirs(d, exist_ok=True)
+        naive = df.index.tz_convert('UTC').tz_localize(None) if df.index.tz is not None else df.index
+        cols = {'Date': ('i8', np.asarray(naive, dtype='datetime64[ns]').view('<i8'))}
+        cols.update({c: ('f8', df[c].to_numpy(dtype='<f8')) for c in OHLCV})
+        for name, (kind, arr) in cols.items():
+            path = os.path.join(d, f"{name}.{kind}")
+            with open(path, "ab") as f:
+                f.truncate(keep_rows * 8)
+                f.write(np.ascontiguousarray(arr, dtype=f'<{kind}').tobytes())
+        tz = str(df.index.tz) if df.index.tz is not None else None
+        self._write_meta(ticker, {'rows': keep_rows + len(df), 'tz': tz, 'fetched_at': time.time()})
+
+    def _fetch(self, ticker, **kwargs):
+        with diagnostics.span("yfinance.history", mode="full" if 'period' in kwargs else "incremental"):
+            hist = yf.Ticker(ticker).history(**kwargs)
+        if hist.empty: return hist
+        return hist[[c for c in hist.columns if c in OHLCV + ['Dividends', 'Stock Splits']]]
+
+    def history(self, ticker, force=False):
+        """Güncel geçmiş: taze ise diskten, değilse yalnız eksik barlar çekilerek."""
+        with self._lock(ticker):
+            meta = self._read_meta(ticker)
+            if meta and not force and time.time() - meta.get('fetched_at', 0) < self.min_refresh:
+                diagnostics.cache_event("price_store", "hit")
+                return self.load(ticker)
+            diagnostics.cache_event("price_store", "miss")
+            stored = self.load(ticker) if meta else pd.DataFrame()
+            if len(stored) < 2:
+                return self._refetch(ticker)
+            # Son kesinleşmiş bardan itibaren çek: ilk bar örtüşme kontrolü, sonrası yeni veri
+            anchor = stored.index[-2]
+            fresh = self._fetch(ticker, start=anchor.strftime('%Y-%m-%d'))
+            if fresh.empty or fresh.index[0] != anchor:
+                return self._refetch(ticker) if not fresh.empty else stored
+            old_close = stored['Close'].iloc[-2]
+            new_bars = fresh.iloc[1:]
+            if abs(fresh['Close'].iloc[0] - old_close) > ADJUST_TOLERANCE * abs(old_close) or \
+                    new_bars.reindex(columns=['Dividends', 'Stock Splits']).fillna(0).to_numpy().any():
+                # Düzeltilmiş geçmiş değişti: kayıtlı seri geçersiz
+                diagnostics.cache_event("price_store", "eviction")
+                return self._refetch(ticker)
+            self._write(ticker, new_bars, keep_rows=len(stored) - 1)
+            return self.load(ticker)
+
+    def _refetch(self, ticker):
+        hist = self._fetch(ticker, period=self.period)
+        if hist.empty: return self.load(ticker)
+        self._write(ticker, hist)
+        return self.load(ticker)
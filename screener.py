@@ -0,0 +1,216 @@
+"""Yerel tarama motoru: tüm evrenin Finviz anlık görüntüsü üzerinde ağsız filtreleme.
+
+Anlık görüntü zamanlanmış olarak yenilenebilir (ör. cron):
+    python screener.py --refresh
+"""
+import json
+import os
+import sys
+import threading
+import time
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+import diagnostics
+import finviz
+
+UNIVERSE_DIR = os.environ.get("BORSA_UNIVERSE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".universe"))
+UNIVERSE_TTL = 24 * 3600
+EXCHANGES = ["AMEX", "NASDAQ", "NYSE"]
+# Özel görünüm (v=152) sütun kimliği -> Finviz başlık adı (54: 200-Day SMA; 56 ise 50-Day Low'dur)
+SNAPSHOT_FIELDS = {0: 'No.', 1: 'Ticker', 2: 'Company', 3: 'Sector', 4: 'Industry', 5: 'Country', 6: 'Market Cap', 7: 'P/E',
+                   9: 'PEG', 33: 'ROE', 38: 'Debt/Eq', 54: 'SMA200', 59: 'RSI', 65: 'Price', 66: 'Change', 67: 'Volume'}
+SNAPSHOT_COLUMNS = ",".join(map(str, SNAPSHOT_FIELDS))
+RANGE_FIELDS = ['Market Cap', 'P/E', 'PEG', 'ROE', 'Debt/Eq', 'SMA200', 'RSI', 'Price', 'Change', 'Volume']
+EQUAL_FIELDS = ['Exchange', 'Sector', 'Industry', 'Country']
+
+# Yan menü seçeneği -> (alt, üst) açık aralık; None = sınırsız. Anahtarlar finviz.*_map ile aynıdır.
+# Finviz negatif kazançta F/K göstermez ('-' -> NaN), bu yüzden F/K üst sınırları pozitif değerleri kapsar.
+OPTION_RANGES = {
+    'P/E': {"Low (<15)": (None, 15), "Profitable (<0)": (0, None), "High (>50)": (50, None), "Under 20": (None, 20), "Under 30": (None, 30), "Over 20": (20, None)},
+    'PEG': {"Low (<1)": (None, 1), "Under 2": (None, 2), "High (>3)": (3, None)},
+    'ROE': {"Positive (>0%)": (0, None), "High (>15%)": (15, None), "Very High (>20%)": (20, None)},
+    'Debt/Eq': {"Low (<0.1)": (None, 0.1), "Under 0.5": (None, 0.5), "Under 1": (None, 1), "High (>1)": (1, None)},
+    'RSI': {"Oversold (<30)": (None, 30), "Overbought (>70)": (70, None), "Neutral (40-60)": (40, 60)},
+    # SMA200 sütunu fiyatın SMA200'e yüzde uzaklığıdır
+    'SMA200': {"Above SMA200": (0, None), "Below SMA200": (None, 0)},
+}
+
+
+# --- SÜTUN BAZLI ANLIK GÖRÜNTÜ + İNDEKSLER ---
+class UniverseSnapshot:
+    """Kategorik alanlar için değer -> satır kimlikleri, aralık alanları için sıralı diziler.
+
+    Her filtre bir kimlik dizisi üretir; birleşik filtre dizilerin kesişimidir.
+    """
+
+    def __init__(self, df, fetched_at=None):
+        self.df = df.reset_index(drop=True)
+        self.fetched_at = fetched_at or time.time()
+        self._equal = {}
+        self._sorted = {}
+        for c in EQUAL_FIELDS:
+            if c not in self.df: continue
+            codes = pd.Categorical(self.df[c])
+            order = np.argsort(codes.codes, kind='stable')
+            bounds = np.searchsorted(codes.codes[order], np.arange(len(codes.categories) + 1))
+            self._equal[c] = {v: order[bounds[i]:bounds[i + 1]] for i, v in enumerate(codes.categories)}
+        for c in RANGE_FIELDS:
+            if c not in self.df: continue
+            vals = pd.to_numeric(self.df[c], errors='coerce').to_numpy(dtype=float)
+            ids = np.flatnonzero(~np.isnan(vals))
+            order = np.argsort(vals[ids], kind='stable')
+            self._sorted[c] = (vals[ids][order], ids[order])
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def missing(self):
+        """Anlık görüntüde olmayan filtre alanları (eski ya da hatalı sütun kimlikleriyle çekilmiş görüntü)."""
+        return [c for c in EQUAL_FIELDS + RANGE_FIELDS if c not in self.df]
+
+    def _require(self, field, index):
+        # Eksik sütun boş sonuç gibi görünmesin: filtre sessizce 0 satır döndürmez
+        if field not in index: raise ValueError(f"Evren anlık görüntüsünde '{field}' sütunu yok; filtre uygulanamıyor (görüntüyü yenileyin).")
+
+    def ids_equal(self, field, value):
+        self._require(field, self._equal)
+        return self._equal[field].get(value, np.empty(0, dtype=np.intp))
+
+    def ids_range(self, field, lo=None, hi=None):
+        """lo < değer < hi (açık aralık); sütun yoksa ValueError."""
+        self._require(field, self._sorted)
+        vals, ids = self._sorted[field]
+        i = np.searchsorted(vals, lo, side='right') if lo is not None else 0
+        j = np.searchsorted(vals, hi, side='left') if hi is not None else len(vals)
+        return ids[i:j]
+
+    @diagnostics.timed("screener.query")
+    def query(self, equals=None, ranges=None, limit=None, sort_by='Market Cap'):
+        """equals={alan: değer}, ranges={alan: (alt, üst)} -> eşleşen satırlar (büyükten küçüğe sort_by)."""
+        sets = [self.ids_equal(f, v) for f, v in (equals or {}).items()]
+        sets += [self.ids_range(f, lo, hi) for f, (lo, hi) in (ranges or {}).items()]
+        if sets:
+            # Küçük kümeden başlayarak kesiştir
+            ids = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), sorted(sets, key=len))
+        else:
+            ids = np.arange(len(self.df))
+        out = self.df.iloc[np.sort(ids)]
+        if sort_by in out: out = out.sort_values(sort_by, ascending=False, kind='stable')
+        return (out.head(limit) if limit else out).reset_index(drop=True)
+
+    def query_options(self, exc, sec, pe, peg, roe_val, de, rsi_val, ma_val, custom=None, limit=None):
+        """Yan menü seçenekleriyle (get_finviz_v48 ile aynı anlam) sorgu; custom={alan: (alt, üst)} ekler."""
+        equals = {}
+        if exc != "Any": equals['Exchange'] = exc
+        if sec != "Any": equals['Sector'] = sec
+        ranges = {}
+        for field, val in (('P/E', pe), ('PEG', peg), ('ROE', roe_val), ('Debt/Eq', de), ('RSI', rsi_val), ('SMA200', ma_val)):
+            if val in OPTION_RANGES[field]: ranges[field] = OPTION_RANGES[field][val]
+        for field, (lo, hi) in (custom or {}).items():
+            # Özel eşik, seçenek aralığıyla birlikte daraltır
+            old_lo, old_hi = ranges.get(field, (None, None))
+            lo = lo if old_lo is None else (old_lo if lo is None else max(lo, old_lo))
+            hi = hi if old_hi is None else (old_hi if hi is None else min(hi, old_hi))
+            ranges[field] = (lo, hi)
+        return self.query(equals, ranges, limit=limit)
+
+
+# --- ANLIK GÖRÜNTÜ ÇEKME / SAKLAMA ---
+def fetch_universe():
+    """Her borsa için tüm sayfalar özel görünümle çekilir, 'Exchange' sütunu eklenir."""
+    frames = []
+    for exc in EXCHANGES:
+        base_url = f"https://finviz.com/screener.ashx?v=152&f={','.join(finviz.build_filters(exc, 'Any', 'Any', 'Any', 'Any', 'Any', 'Any', 'Any'))}&c={SNAPSHOT_COLUMNS}"
+        df = finviz.scan_all_pages(base_url)
+        if not df.empty:
+            df['Exchange'] = exc
+            frames.append(df)
+    if not frames: return pd.DataFrame()
+    df = finviz._concat(frames)
+    # Başlıklar beklenen adlarla gelmediyse (sütun kimliği değişmiş) eksik görüntü kaydedilmez
+    missing = [c for c in SNAPSHOT_FIELDS.values() if c not in df]
+    if missing: raise ValueError(f"Finviz v=152 başlıkları beklenenden farklı, eksik: {missing}")
+    return df.drop(columns=['No.'], errors='ignore')
+
+class UniverseStore:
+    """Anlık görüntüyü sütun dizileri olarak .npz'de tutar; bayatsa arka planda yeniler."""
+
+    def __init__(self, root=UNIVERSE_DIR, ttl=UNIVERSE_TTL):
+        self.root = root
+        self.ttl = ttl
+        self._snap = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @property
+    def refreshing(self):
+        return self._refreshing
+
+    def save(self, df, fetched_at=None):
+        os.makedirs(self.root, exist_ok=True)
+        arrays, kinds = {}, {}
+        for i, c in enumerate(df.columns):
+            col = df[c]
+            if isinstance(col.dtype, pd.CategoricalDtype):
+                arrays[f"c{i}"] = col.cat.codes.to_numpy()
+                arrays[f"c{i}_cats"] = col.cat.categories.to_numpy(dtype=str)
+                kinds[c] = 'category'
+            elif c in finviz.TEXT_COLUMNS:
+                arrays[f"c{i}"] = col.to_numpy(dtype=str)
+                kinds[c] = 'text'
+            else:
+                arrays[f"c{i}"] = pd.to_numeric(col, errors='coerce').to_numpy(dtype='float64' if c in finviz.INT_COLUMNS else 'float32', na_value=np.nan)
+                kinds[c] = 'int' if c in finviz.INT_COLUMNS else 'float'
+        np.savez(os.path.join(self.root, "universe.tmp.npz"), **arrays)
+        os.replace(os.path.join(self.root, "universe.tmp.npz"), os.path.join(self.root, "universe.npz"))
+        with open(os.path.join(self.root, "meta.json"), "w") as f:
+            json.dump({'columns': list(df.columns), 'kinds': kinds, 'fetched_at': fetched_at or time.time()}, f)
+
+    def load(self):
+        try:
+            with open(os.path.join(self.root, "meta.json")) as f: meta = json.load(f)
+            arrays = np.load(os.path.join(self.root, "universe.npz"), allow_pickle=False)
+        except (OSError, ValueError): return None
+        cols = {}
+        for i, c in enumerate(meta['columns']):
+            kind = meta['kinds'][c]
+            if kind == 'category': cols[c] = pd.Categorical.from_codes(arrays[f"c{i}"], arrays[f"c{i}_cats"])
+            elif kind == 'int': cols[c] = pd.array(arrays[f"c{i}"], dtype='Int64')
+            else: cols[c] = arrays[f"c{i}"]
+        return UniverseSnapshot(pd.DataFrame(cols), meta['fetched_at'])
+
+    def refresh(self):
+        df = fetch_universe()
+        if df.empty: return self._snap
+        fetched_at = time.time()
+        self.save(df, fetched_at)
+        self._snap = UniverseSnapshot(df, fetched_at)
+        return self._snap
+
+    def _refresh_background(self):
+        try: self.refresh()
+        except Exception: pass
+        finally: self._refreshing = False
+
+    def get(self, refresh_if_stale=True):
+        """Bellekteki/diskteki anlık görüntü (yoksa None); bayatsa yenileme arka planda başlar."""
+        with self._lock:
+            if self._snap is None: self._snap = self.load()
+            # Eksik sütunlu (eski kimliklerle çekilmiş) görüntü de bayat sayılır
+            stale = self._snap is None or bool(self._snap.missing) or time.time() - self._snap.fetched_at > self.ttl
+            if refresh_if_stale and stale and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_background, daemon=True).start()
+            return self._snap
+
+
+if __name__ == "__main__":
+    if "--refresh" in sys.argv:
+        snap = UniverseStore().refresh()
+        print(f"{len(snap) if snap else 0} hisse kaydedildi: {UNIVERSE_DIR}")
+    else:
+        print(__doc__)
@@ -0,0 +1,79 @@
+"""Başlık duygu skoru: sözlük tek bir kelime-sınırlı düzenli ifadeye derlenir.
+
+Tüm evrenin başlıkları tek geçişte taranır; aynı (sendikasyon) başlık hisseler arasında
+bir kez eşlenir ve sonucu başlık özetine göre önbellekte tutulur.
+"""
+import hashlib
+import re
+import threading
+
+import pandas as pd
+
+POSITIVE = ['beat', 'surge', 'jump', 'gain', 'profit', 'growth', 'positive', 'up', 'high', 'partnership', 'expand', 'launch', 'approve', 'buy', 'dividend', 'strong', 'reaffirm', 'tops', 'broke out', 'climbs']
+NEGATIVE = ['miss', 'fall', 'drop', 'loss', 'down', 'decline', 'negative', 'low', 'lawsuit', 'investigation', 'cut', 'fail', 'weak', 'risk', 'compliance', 'plunges']
+# Skor eşikleri: > POSITIVE_THRESHOLD pozitif, < NEGATIVE_THRESHOLD negatif
+POSITIVE_THRESHOLD = 1
+NEGATIVE_THRESHOLD = -1
+# Kök + basit çekim ekleri ("gains", "dropped", "cutting"); "up" artık "update"i, "low" "follow"u eşlemez
+SUFFIXES = r'(?:[a-z]?(?:s|es|ed|d|ing))?'
+MAX_CACHE = 50000
+
+POLARITY = {**{w: 1 for w in POSITIVE}, **{w: -1 for w in NEGATIVE}}
+LEXICON_RE = re.compile(r'\b(' + '|'.join(re.escape(w) for w in sorted(POLARITY, key=len, reverse=True)) + r')' + SUFFIXES + r'\b')
+# Girdi normalize (küçük harf, tek boşluk) başlıktır
+# Google News başlıkları " - Yayıncı" ile biter; sendikasyon kopyaları bu ekle ayrışır
+SOURCE_SUFFIX = re.compile(r'\s+[-–|]\s+[^-–|]{1,60}$')
+
+_terms = {}   # başlık özeti -> eşleşen sözlük kelimeleri (frozenset)
+_terms_lock = threading.Lock()
+
+
+# --- BAŞLIK EŞLEME ---
+def normalize_headline(title):
+    return " ".join(SOURCE_SUFFIX.sub("", title or "").lower().split())
+
+def headline_key(normalized):
+    return hashlib.sha1(normalized.encode("utf-8")).digest()
+
+def match_headlines(normalized):
+    """Normalize başlık listesi -> her başlık için eşleşen sözlük kelimeleri (frozenset)."""
+    return [frozenset(LEXICON_RE.findall(t)) for t in normalized]
+
+def headline_terms(titles):
+    """Önbellekli eşleme: yalnız daha önce görülmemiş (normalize) başlıklar taranır."""
+    normalized = [normalize_headline(t) for t in titles]
+    keys = [headline_key(n) for n in normalized]
+    with _terms_lock:
+        known = {k: _terms[k] for k in set(keys) if k in _terms}
+    todo = {k: n for k, n in zip(keys, normalized) if k not in known}
+    if todo:
+        fresh = dict(zip(todo, match_headlines(list(todo.values()))))
+        with _terms_lock:
+            if len(_terms) + len(fresh) > MAX_CACHE: _terms.clear()
+            _terms.update(fresh)
+        known.update(fresh)
+    return [known[k] for k in keys]
+
+
+# --- SKORLAMA ---
+def _score(terms):
+    # Her sözlük kelimesi hisse başına bir kez sayılır (önceki davranış)
+    return sum(POLARITY[w] for w in frozenset().union(*terms)) if terms else 0
+
+def score_headlines(titles):
+    return _score(headline_terms(titles))
+
+def score_universe(news_by_ticker):
+    """{ticker: haber listesi} -> ticker indeksli skor Series'i; tüm başlıklar tek toplu eşlemede."""
+    titles = [n['Title'] for news in news_by_ticker.values() for n in news]
+    terms = headline_terms(list(dict.fromkeys(titles)))
+    by_title = dict(zip(dict.fromkeys(titles), terms))
+    scores = {t: _score([by_title[n['Title']] for n in news]) for t, news in news_by_ticker.items()}
+    return pd.Series(scores, dtype='Int64', name='News Score')
+
+def tone(score):
+    """Skor -> ('POZİTİF' | 'NEGATİF' | 'NÖTR', renk)"""
+    if score is None or pd.isna(score): return None, "gray"
+    if score > POSITIVE_THRESHOLD: return "POZİTİF", "green"
+    if score < NEGATIVE_THRESHOLD: return "NEGATİF", "red"
+    return "NÖTR", "blue"
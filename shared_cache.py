@@ -0,0 +1,352 @@
+"""Süreçler arası ortak önbellek katmanı (yerel disk).
+
+Aynı anahtar için eşzamanlı ıskalar tek bir kaynak çağrısında birleşir (single-flight): süreç
+içinde Event ile, süreçler arasında arka uçtaki kira (lease) kaydıyla. Süresi dolan kayıt
+`stale_ttl` boyunca hemen döner ve arka planda yenilenir (stale-while-revalidate).
+Arka uç takılabilir: CacheBackend arayüzü; varsayılan SQLite, testler için bellek.
+"""
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import diagnostics
+
+SHARED_CACHE_DB = os.environ.get("BORSA_SHARED_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".shared_cache.sqlite"))
+# LRU sınırı: toplam değer boyutu (bayt); aşılırsa en uzun süredir okunmayanlar silinir
+MAX_BYTES = 512 * 1024 * 1024
+# Başka süreç kirayı tutarken bekleme üst sınırı ve yoklama aralığı
+LEASE_TTL = 60
+POLL_INTERVAL = 0.1
+# Okuma zamanı her okumada değil, bu kadar eskiyse yazılır (yazma çekişmesini azaltır)
+TOUCH_INTERVAL = 60
+
+
+# --- ARKA UÇLAR ---
+class CacheBackend:
+    """get(key) -> (stored_at, value) | None; put(key, value); kira: acquire(key, owner, ttl) -> bool."""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        """{key: (stored_at, value)}; bulunmayanlar yok."""
+        return {k: e for k, e in ((k, self.get(k)) for k in keys) if e is not None}
+
+    def put(self, key, value):
+        raise NotImplementedError
+
+    def acquire(self, key, owner, ttl=LEASE_TTL):
+        raise NotImplementedError
+
+    def acquire_many(self, keys, owner, ttl=LEASE_TTL):
+        return [k for k in keys if self.acquire(k, owner, ttl)]
+
+    def release(self, key, owner):
+        raise NotImplementedError
+
+    def release_many(self, keys, owner):
+        for k in keys: self.release(k, owner)
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Tek süreçlik LRU (çevrimdışı testler, SQLite kullanılamayan ortamlar)."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (stored_at, blob)
+        self._leases = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None: return None
+            self._data.move_to_end(key)
+        return entry[0], pickle.loads(entry[1])
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old: self._size -= len(old[1])
+            self._data[key] = (time.time(), blob); self._size += len(blob)
+            evicted = 0
+            while self._size > self.max_bytes and len(self._data) > 1:
+                _, (_, b) = self._data.popitem(last=False); self._size -= len(b); evicted += 1
+        if evicted: diagnostics.cache_event("shared", "eviction", evicted)
+
+    def acquire(self, key, owner, ttl=LEASE_TTL):
+        now = time.time()
+        with self._lock:
+            holder = self._leases.get(key)
+            if holder and holder[1] > now and holder[0] != owner: return False
+            self._leases[key] = (owner, now + ttl)
+            return True
+
+    def release(self, key, owner):
+        with self._lock:
+            if self._leases.get(key, (None,))[0] == owner: del self._leases[key]
+
+    def clear(self):
+        with self._lock: self._data.clear(); self._leases.clear(); self._size = 0
+
+
+class SQLiteBackend(CacheBackend):
+    """Tüm süreçlerin paylaştığı SQLite dosyası (WAL); değerler pickle BLOB."""
+
+    def __init__(self, path=SHARED_CACHE_DB, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            # BLOB en sonda: SUM(size) ve LRU taraması taşma sayfalarını okumaz
+            con.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, stored_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL, value BLOB NOT NULL)")
+            con.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at)")
+            con.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=10)
+        try:
+            with con: yield con
+        finally: con.close()
+
+    def get(self, key):
+        with self._connect() as con:
+            row = con.execute("SELECT stored_at, accessed_at, value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None: return None
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL: con.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0], pickle.loads(row[2])
+
+    def get_many(self, keys):
+        # Tek bağlantı, 500'lük IN sorguları
+        keys, rows = list(keys), []
+        now = time.time()
+        with self._connect() as con:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows += con.execute(f"SELECT key, stored_at, accessed_at, value FROM entries WHERE key IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+            stale = [(now, k) for k, _, accessed, _ in rows if now - accessed > TOUCH_INTERVAL]
+            if stale: con.executemany("UPDATE entries SET accessed_at = ? WHERE key = ?", stale)
+        return {k: (stored_at, pickle.loads(blob)) for k, stored_at, _, blob in rows}
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._connect() as con:
+            con.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", (key, now, now, len(blob), blob))
+            total = con.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            evicted = 0
+            # En eski okunanlardan başlayarak sınırın altına inilir; yeni yazılan kayıt korunur
+            for k, size in con.execute("SELECT key, size FROM entries WHERE key != ? ORDER BY accessed_at", (key,)).fetchall():
+                if total <= self.max_bytes: break
+                con.execute("DELETE FROM entries WHERE key = ?", (k,)); total -= size; evicted += 1
+        if evicted: diagnostics.cache_event("shared", "eviction", evicted)
+
+    LEASE_SQL = ("INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                 "WHERE leases.expires_at < ? OR leases.owner = excluded.owner")
+
+    def acquire(self, key, owner, ttl=LEASE_TTL):
+        return bool(self.acquire_many([key], owner, ttl))
+
+    def acquire_many(self, keys, owner, ttl=LEASE_TTL):
+        # Tek işlemde; süresi dolmuş kira (çöken süreç) devralınabilir
+        now = time.time()
+        with self._connect() as con:
+            return [k for k in keys if con.execute(self.LEASE_SQL, (k, owner, now + ttl, now)).rowcount > 0]
+
+    def release(self, key, owner):
+        self.release_many([key], owner)
+
+    def release_many(self, keys, owner):
+        with self._connect() as con:
+            con.executemany("DELETE FROM leases WHERE key = ? AND owner = ?", [(k, owner) for k in keys])
+
+    def clear(self):
+        with self._connect() as con:
+            con.execute("DELETE FROM entries"); con.execute("DELETE FROM leases")
+
+
+# --- ORTAK ÖNBELLEK ---
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SharedCache:
+    def __init__(self, backend=None):
+        self.backend = backend or SQLiteBackend()
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._flights = {}
+        self._leased = set()  # Bu süreçte lease ile tutulan anahtarlar (arka uç kirası süreç başına)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(namespace, *args, **kwargs):
+        return f"{namespace}:" + hashlib.sha1(repr((args, sorted(kwargs.items()))).encode("utf-8")).hexdigest()
+
+    def peek(self, key, max_age):
+        """Ağ çağrısı yapmadan yalnız taze kayıt: (stored_at, value) | None."""
+        entry = self._get(key)
+        return entry if entry and time.time() - entry[0] < max_age else None
+
+    def peek_many(self, keys, max_age):
+        """peek'in toplu hâli (tek sorgu): {key: (stored_at, value)} yalnız taze kayıtlar."""
+        try: found = self.backend.get_many(keys)
+        except Exception: return {}
+        now = time.time()
+        return {k: e for k, e in found.items() if now - e[0] < max_age}
+
+    # Toplu hatlar (haber) için kira: anahtarı alan çeker, diğerleri wait ile sonucu bekler.
+    # Arka uç kirası süreç sahibine yeniden verilir; süreç içi tekillik _leased ile sağlanır.
+    def lease(self, key):
+        return bool(self.lease_many([key]))
+
+    def lease_many(self, keys):
+        with self._lock:
+            local = [k for k in dict.fromkeys(keys) if k not in self._leased]
+            self._leased.update(local)
+        try: got = self.backend.acquire_many(local, self.owner)
+        except Exception: got = local
+        with self._lock: self._leased.difference_update(set(local) - set(got))
+        return got
+
+    def release(self, key):
+        self.release_many([key])
+
+    def release_many(self, keys):
+        """Yalnız bu süreçte tutulan kiralar bırakılır."""
+        with self._lock:
+            held = [k for k in dict.fromkeys(keys) if k in self._leased]
+        try: self.backend.release_many(held, self.owner)
+        except Exception: pass
+        with self._lock: self._leased.difference_update(held)
+
+    def wait(self, key, max_age, timeout=LEASE_TTL):
+        """Başka oturum/süreçteki çekimin sonucunu bekler -> (stored_at, value).
+
+        Kira sonuç yazılmadan boşalırsa (çekim başarısız) kira alınır ve None döner: çağıran çeker
+        ve release ile bırakır. Süre dolarsa kirasız None.
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            entry = self.peek(key, max_age)
+            if entry: return entry
+            if self.lease(key):
+                # Kira boşalırken sonuç yazılmış olabilir
+                entry = self.peek(key, max_age)
+                if entry: self.release(key)
+                return entry
+            time.sleep(POLL_INTERVAL)
+        return None
+
+    def put(self, key, value):
+        try: self.backend.put(key, value)
+        except Exception: pass  # Ortak katman düşerse süreç içi önbellekler çalışmaya devam eder
+
+    def get_or_fetch(self, key, fetch, ttl, stale_ttl=0, refresh=None, cache_name="shared", valid=None):
+        """Taze kayıt -> hemen; bayat (ttl..ttl+stale_ttl) -> hemen + arka planda `refresh or fetch`;
+        yok -> tek uçuşlu `fetch`. fetch hatası yayılır; valid(değer) False ise değer döner ama yazılmaz."""
+        entry = self._get(key)
+        age = time.time() - entry[0] if entry else None
+        if entry and age < ttl:
+            diagnostics.cache_event(cache_name, "hit")
+            return entry[1]
+        if entry and age < ttl + stale_ttl:
+            diagnostics.cache_event(cache_name, "hit")
+            diagnostics.incr("shared_cache_stale_total", cache=cache_name)
+            self._revalidate(key, refresh or fetch, entry[0], valid)
+            return entry[1]
+        diagnostics.cache_event(cache_name, "miss")
+        return self._single_flight(key, fetch, entry[0] if entry else 0.0, valid)
+
+    def _revalidate(self, key, fetch, stored_at, valid=None):
+        with self._lock:
+            if key in self._flights: return
+        threading.Thread(target=self._background, args=(key, fetch, stored_at, valid), daemon=True).start()
+
+    def _background(self, key, fetch, stored_at, valid):
+        try: self._single_flight(key, fetch, stored_at, valid)
+        except Exception: pass  # Yenileme düşerse bayat kayıt bir sonraki denemeye kadar kalır
+
+    def _single_flight(self, key, fetch, stored_at, valid=None):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader: flight = self._flights[key] = _Flight()
+        if not leader:
+            # Aynı süreçte aynı anahtar zaten çekiliyor
+            flight.done.wait()
+            if flight.error: raise flight.error
+            return flight.value
+        try:
+            flight.value = self._fetch_once(key, fetch, stored_at, valid)
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock: self._flights.pop(key, None)
+            flight.done.set()
+        return flight.value
+
+    def _fetch_once(self, key, fetch, stored_at, valid=None):
+        """Kirayı alan süreç çeker; diğerleri kayıt yenilenene ya da kira süresi bitene kadar bekler."""
+        deadline = time.time() + LEASE_TTL
+        waited = False
+        # Kira lease/release ile: _leased kaydı tutulmazsa release kirayı bırakmaz
+        while not self.lease(key):
+            if not waited: diagnostics.incr("shared_cache_coalesced_total"); waited = True
+            if time.time() >= deadline: break  # Kira sahibi takıldı; kendimiz çekeriz
+            time.sleep(POLL_INTERVAL)
+            entry = self._get(key)
+            if entry and entry[0] > stored_at: return entry[1]
+        try:
+            # Iskadan sonra kira alınana kadar önceki sahip yazıp bırakmış olabilir: ikinci çekim yapılmaz
+            entry = self._get(key)
+            if entry and entry[0] > stored_at: return entry[1]
+            value = fetch()
+            if valid is None or valid(value): self.put(key, value)
+            return value
+        finally: self.release(key)
+
+    def _get(self, key):
+        try: return self.backend.get(key)
+        except Exception: return None
+
+
+_default = None
+_default_lock = threading.Lock()
+
+def get_cache():
+    """Süreç başına tek SharedCache; SQLite açılamazsa bellek arka ucuna düşer."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            try: backend = SQLiteBackend()
+            except sqlite3.Error: backend = MemoryBackend()
+            _default = SharedCache(backend)
+        return _default
+
+def shared(namespace, ttl, stale_ttl=0, valid=None):
+    """Fonksiyon sonucunu ortak katmanda tutar; anahtar (namespace, argümanlar)."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            cache = get_cache()
+            return cache.get_or_fetch(cache.key(namespace, *args, **kwargs), lambda: fn(*args, **kwargs), ttl, stale_ttl, cache_name=namespace, valid=valid)
+        return call
+    return deco
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import diagnostics
+
+RSI_PERIOD = 14
+VOL_WINDOW = 30
+TA_COLUMNS = ['MA50', 'MA200', 'RSI', 'Log_Ret', 'Volatility', 'Drawdown']
+
+
+# --- VEKTÖREL GÖSTERGE MOTORU (hisse x gün) ---
+def rolling_mean(x, window):
+    """Satır bazlı kayan ortalama; pencerede NaN varsa sonuç NaN (pandas rolling ile aynı)."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= window: out[:, window - 1:] = sliding_window_view(x, window, axis=1).mean(axis=-1)
+    return out
+
+def rolling_std(x, window):
+    """Satır bazlı kayan örneklem std'si; pandas rolling tek geçişte hesaplar (hisse x gün x pencere ara dizisi yok)."""
+    return pd.DataFrame(x.T).rolling(window).std().to_numpy().T
+
+def wilder_smooth(values, period=RSI_PERIOD, init=None):
+    """Wilder ortalaması: ilk değer `period` değerin basit ortalaması, sonrası (önceki*(n-1)+yeni)/n.
+
+    Özyineleme ewm(alpha=1/n, adjust=False) ile C'de yürür; NaN boşluğundan sonra yeniden tohumlanır.
+    init verilirse ilk sütunun değeri kabul edilir ve ortalama oradan sürer.
+    """
+    seed = rolling_mean(values, period)
+    # Tohum noktası: koşunun ilk tam penceresi (ya da init); kapsanan: aynı koşuda tohumdan sonraki günler
+    start = ~np.isnan(seed)
+    start[:, 1:] &= np.isnan(seed[:, :-1])
+    run = np.cumsum(np.isnan(values), axis=1)
+    if init is not None:
+        seed[:, 0] = init
+        start[:, 0] = ~np.isnan(seed[:, 0])
+        # init'in sürdüğü koşu yeniden tohumlanmaz
+        start[:, 1:] &= ~(start[:, :1] & (run[:, 1:] == run[:, :1]))
+    seeded_run = np.maximum.accumulate(np.where(start, run, -1), axis=1)
+    covered = start | ((seeded_run == run) & ~np.isnan(values))
+    x = np.where(start, seed, np.where(covered, values, np.nan))
+    out = np.full(values.shape, np.nan)
+    single = start.sum(axis=1) == 1
+    if single.any():
+        out[single] = pd.DataFrame(x[single].T).ewm(alpha=1 / period, adjust=False).mean().to_numpy().T
+    # Birden çok koşusu olan (iç boşluklu) hisseler koşu koşu
+    for i in np.flatnonzero(start.sum(axis=1) > 1):
+        bounds = list(np.flatnonzero(start[i])) + [values.shape[1]]
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            out[i, a:b] = pd.Series(x[i, a:b]).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+    return np.where(covered, out, np.nan)
+
+def wilder_averages(close, period=RSI_PERIOD, init=None):
+    """Wilder ortalama kazanç/kayıp; init=(avg_gain, avg_loss) ilk sütunun durumudur."""
+    delta = np.full(close.shape, np.nan)
+    delta[:, 1:] = np.diff(close, axis=1)
+    gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+    loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+    if init is None: return wilder_smooth(gain, period), wilder_smooth(loss, period)
+    init_g, init_l = (np.array(v, dtype=float).reshape(-1) for v in init)
+    return wilder_smooth(gain, period, init_g), wilder_smooth(loss, period, init_l)
+
+def rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+def wilder_rsi(close, period=RSI_PERIOD):
+    return rsi_from_averages(*wilder_averages(close, period))
+
+def log_returns(close):
+    out = np.full(close.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:, 1:] = np.log(close[:, 1:] / close[:, :-1])
+    return out
+
+def drawdown(close, running_max=None):
+    """running_max verilirse (hisse başına) önceki zirve olarak kullanılır."""
+    if running_max is not None:
+        close = np.concatenate([np.reshape(running_max, (-1, 1)), close], axis=1)
+    peak = np.fmax.accumulate(close, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dd = (close - peak) / peak * 100
+    return dd[:, 1:] if running_max is not None else dd
+
+def compute_indicators(close):
+    """close: (hisse, gün) float dizisi -> {gösterge: aynı şekilde dizi}."""
+    close = np.atleast_2d(np.asarray(close, dtype=float))
+    log_ret = log_returns(close)
+    avg_gain, avg_loss = wilder_averages(close)
+    return {
+        'MA50': rolling_mean(close, 50),
+        'MA200': rolling_mean(close, 200),
+        'RSI': rsi_from_averages(avg_gain, avg_loss),
+        'Log_Ret': log_ret,
+        'Volatility': rolling_std(log_ret, VOL_WINDOW) * np.sqrt(252) * 100,
+        'Drawdown': drawdown(close),
+        '_avg_gain': avg_gain,
+        '_avg_loss': avg_loss,
+    }
+
+# Artımlı hesapta pencereli göstergeler için geriye bakılacak satır sayısı
+TA_LOOKBACK = max(200, VOL_WINDOW + 1)
+TA_STATE_COLUMNS = ['_avg_gain', '_avg_loss']
+
+def _reusable_rows(prev, df):
+    """prev ile df'in tarih ve kapanışı aynı olan baştaki satır sayısı."""
+    if prev is None or prev.empty or not set(TA_STATE_COLUMNS).issubset(prev.columns): return 0
+    m = min(len(prev), len(df))
+    same = (prev.index[:m] == df.index[:m]) & (prev['Close'].to_numpy()[:m] == df['Close'].to_numpy()[:m])
+    return m if same.all() else int(np.argmin(same))
+
+@diagnostics.timed("ta.calculate")
+def calculate_ta(df, prev=None):
+    """prev: aynı hissenin önceki calculate_ta çıktısı; verilirse yalnız yeni barlar hesaplanır."""
+    df = df.copy()
+    close = df['Close'].to_numpy(dtype=float)[None, :]
+    k = _reusable_rows(prev, df)
+    if prev is not None: diagnostics.cache_event("ta_incremental", "hit" if k >= TA_LOOKBACK else "miss")
+    if k < TA_LOOKBACK:
+        # Tek hisse = tek satırlık panel; toplu motorla birebir aynı sonuç
+        ind = compute_indicators(close)
+        for col in TA_COLUMNS + TA_STATE_COLUMNS: df[col] = ind[col][0]
+        return df
+    # Artımlı yol: pencereler son TA_LOOKBACK bardan, RSI/zirve önceki durumdan devam eder
+    tail = close[:, k - TA_LOOKBACK:]
+    new = slice(TA_LOOKBACK, None)
+    log_ret = log_returns(tail)
+    avg_gain, avg_loss = wilder_averages(close[:, k - 1:], init=(prev['_avg_gain'].iloc[k - 1], prev['_avg_loss'].iloc[k - 1]))
+    fresh = {
+        'MA50': rolling_mean(tail, 50)[0, new],
+        'MA200': rolling_mean(tail, 200)[0, new],
+        'RSI': rsi_from_averages(avg_gain, avg_loss)[0, 1:],
+        'Log_Ret': log_ret[0, new],
+        'Volatility': (rolling_std(log_ret, VOL_WINDOW) * np.sqrt(252) * 100)[0, new],
+        'Drawdown': drawdown(close[:, k:], running_max=np.nanmax(close[:, :k], axis=1))[0],
+        '_avg_gain': avg_gain[0, 1:],
+        '_avg_loss': avg_loss[0, 1:],
+    }
+    for col in TA_COLUMNS + TA_STATE_COLUMNS:
+        df[col] = np.concatenate([prev[col].to_numpy(dtype=float)[:k], fresh[col]])
+    return df
+
+
+# --- EVREN ÖZETİ (fiyat paneli: panel.PanelStore) ---
+def universe_ta_summary(tickers, close):
+    """Her hisse için son geçerli gündeki kapanış, RSI, MA200 (ilişki + seviye), drawdown ve volatilite."""
+    close = np.atleast_2d(np.asarray(close, dtype=float))
+    ind = compute_indicators(close)
+    valid = ~np.isnan(close)
+    has_data = valid.any(axis=1)
+    last = np.where(has_data, close.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1), 0)
+    rows = np.arange(close.shape[0])
+    pick = lambda a: np.where(has_data, a[rows, last], np.nan)
+    last_close, ma200 = pick(close), pick(ind['MA200'])
+    ma_rel = np.where(last_close > ma200, "Üstünde", "Altında").astype(object)
+    ma_rel[np.isnan(ma200)] = None
+    return pd.DataFrame({
+        'Ticker': tickers,
+        'Kapanış': last_close,
+        'RSI (14)': pick(ind['RSI']).round(1),
+        'MA200': ma_rel,
+        'MA200 Seviye': ma200,
+        'Drawdown %': pick(ind['Drawdown']).round(1),
+        'Volatilite %': pick(ind['Volatility']).round(1),
+    })
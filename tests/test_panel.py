@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+import panel
+import shared_cache
+
+DAYS = pd.bdate_range("2021-01-01", periods=300)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, "_default", shared_cache.SharedCache(shared_cache.MemoryBackend()))
+    calls, upto = [], [250]
+    def download(tickers, start=None, period=None, **kwargs):
+        calls.append((list(tickers), "full" if period else "incremental"))
+        idx = DAYS[:upto[0]]
+        if start is not None: idx = idx[idx >= pd.Timestamp(start)]
+        pos = DAYS.get_indexer(idx)
+        return pd.concat({f: pd.DataFrame({t: pos + len(t) * 1000.0 for t in tickers}, index=idx) for f in panel.FIELDS}, axis=1)
+    monkeypatch.setattr(panel.yf, "download", download)
+    s = panel.PanelStore(root=str(tmp_path))
+    s.calls, s.upto = calls, upto
+    return s
+
+
+def test_new_universe_downloads_only_new_tickers(store):
+    first = store.panel(["AAA", "BB"])
+    second = store.panel(["BB", "CCCC"])
+    assert store.calls == [(["AAA", "BB", "SPY"], "full"), (["CCCC"], "full")]
+    assert second.members == ["BB", "CCCC"] and second.tickers[-1] == "SPY"
+    assert second.window("Close", 1).tolist() == [[2249.0, 4249.0, 3249.0]]
+    # Önceki dilim eski dosyalarda okunabilir kalır
+    assert first.window("Close", 1, ["AAA"]).tolist() == [[3249.0]]
+    store.panel(["AAA", "CCCC"])
+    assert len(store.calls) == 2
+
+
+def test_refresh_appends_days_for_all_columns(store):
+    store.panel(["AAA"]); store.panel(["BB"])
+    store.upto[0], store.min_refresh = 255, 0
+    p = store.panel(["AAA", "BB"])
+    assert store.calls[-1] == (["AAA", "SPY", "BB"], "incremental")
+    assert len(p) == 255 and p.series("BB").iloc[-1] == 2254.0
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+import finviz
+import screener
+from screener import SNAPSHOT_FIELDS, UniverseSnapshot
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "screener_v152.html")
+
+
+@pytest.fixture
+def frame():
+    with open(FIXTURE, encoding="utf-8") as f: return finviz.parse_screener_table(f.read())
+
+
+def test_snapshot_ids_match_v152_headers(frame):
+    # Fixture başlıkları c= sırasıyla: kimlik -> ad eşlemesi sabitlenir
+    assert list(frame.columns) == list(SNAPSHOT_FIELDS.values())
+    assert screener.SNAPSHOT_COLUMNS.split(",")[list(SNAPSHOT_FIELDS.values()).index('SMA200')] == "54"
+
+
+def test_sma200_option_filters(frame):
+    snap = UniverseSnapshot(frame)
+    above = snap.query_options("Any", "Any", "Any", "Any", "Any", "Any", "Any", "Above SMA200")
+    below = snap.query_options("Any", "Any", "Any", "Any", "Any", "Any", "Any", "Below SMA200")
+    assert sorted(above['Ticker']) == ["AAPL", "KO"]
+    assert below['Ticker'].tolist() == ["INTC"]
+
+
+def test_missing_field_raises_instead_of_empty(frame):
+    snap = UniverseSnapshot(frame.drop(columns=['SMA200']))
+    assert 'SMA200' in snap.missing
+    with pytest.raises(ValueError, match="SMA200"):
+        snap.query_options("Any", "Any", "Any", "Any", "Any", "Any", "Any", "Above SMA200")
+    assert len(snap.query_options("Any", "Any", "Any", "Any", "Any", "Any", "Any", "Any")) == len(frame)
+
+
+def test_fetch_universe_rejects_unexpected_headers(frame, monkeypatch):
+    renamed = frame.rename(columns={'SMA200': '50D Low'})
+    monkeypatch.setattr(finviz, "scan_all_pages", lambda url: renamed.copy())
+    with pytest.raises(ValueError, match="SMA200"): screener.fetch_universe()
+    monkeypatch.setattr(finviz, "scan_all_pages", lambda url: frame.copy())
+    assert isinstance(screener.fetch_universe(), pd.DataFrame)
@@ -0,0 +1,68 @@
+"""Ortak önbellek: iki SharedCache örneği (iki süreç gibi) tek SQLite dosyasında."""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import shared_cache  # noqa: E402
+from shared_cache import SharedCache, SQLiteBackend  # noqa: E402
+
+
+@pytest.fixture
+def pair(tmp_path, monkeypatch):
+    # Takılı kira testi 60 sn beklemesin: bekleme üst sınırı kısaltılır, kira kaydı yine kalıcıdır
+    monkeypatch.setattr(shared_cache, "LEASE_TTL", 3)
+    path = str(tmp_path / "shared.sqlite")
+    return SharedCache(SQLiteBackend(path)), SharedCache(SQLiteBackend(path))
+
+def _leases(cache):
+    with cache.backend._connect() as con:
+        return con.execute("SELECT key FROM leases").fetchall()
+
+def test_invalid_result_releases_lease(pair):
+    a, b = pair
+    key = a.key("t", 1)
+    assert a.get_or_fetch(key, lambda: "bad", ttl=60, valid=lambda v: False) == "bad"
+    assert _leases(a) == []
+    start = time.time()
+    assert b.get_or_fetch(key, lambda: "good", ttl=60) == "good"
+    assert time.time() - start < 1
+
+def test_raising_fetch_releases_lease(pair):
+    a, b = pair
+    key = a.key("t", 2)
+    def boom(): raise RuntimeError("upstream")
+    with pytest.raises(RuntimeError): a.get_or_fetch(key, boom, ttl=60)
+    assert _leases(a) == []
+    start = time.time()
+    assert b.get_or_fetch(key, lambda: "ok", ttl=60) == "ok"
+    assert time.time() - start < 1
+
+def test_concurrent_miss_single_upstream_call(pair):
+    a, b = pair
+    key = a.key("t", 3)
+    calls = []
+    def fetch():
+        calls.append(1); time.sleep(0.3); return "v"
+    out = []
+    threads = [threading.Thread(target=lambda c=c: out.append(c.get_or_fetch(key, fetch, ttl=60))) for c in (a, b, a, b)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert out == ["v"] * 4 and len(calls) == 1
+
+def test_lease_exclusive_within_process(pair):
+    a, _ = pair
+    assert a.lease_many(["k"]) == ["k"]
+    assert a.lease_many(["k"]) == []
+    a.release("k")
+    assert a.lease("k")
+
+
+def test_peek_many_reads_fresh_entries_in_one_call(pair):
+    a, b = pair
+    a.backend.put("k1", 1); a.backend.put("k2", 2)
+    assert {k: v for k, (_, v) in b.peek_many(["k1", "k2", "k3"], 60).items()} == {"k1": 1, "k2": 2}
+    assert b.peek_many(["k1"], 0) == {}
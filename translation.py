@@ -0,0 +1,152 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import diagnostics
+from net import get_session
+
+TRANSLATION_DB = os.environ.get("BORSA_TRANSLATION_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".translation_cache.sqlite"))
+# Tek istekte gönderilecek en fazla karakter (gtx uç noktası ~5000 sınırı)
+MAX_BATCH_CHARS = 4500
+# Satır hizası bozulan toplu istekte ikiye bölerek yeniden deneme için en fazla ek istek
+MAX_FALLBACK_REQUESTS = 8
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"“(])')
+
+
+# --- ÇEVİRİ ARKA UÇLARI ---
+class TranslationBackend:
+    """translate_batch(list[str]) -> list[str]; sıra ve uzunluk korunmalı."""
+    source = "en"
+    target = "tr"
+
+    def translate_batch(self, texts):
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslationBackend):
+    url = "https://translate.googleapis.com/translate_a/single"
+
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+
+    def _request(self, text):
+        params = {"client": "gtx", "sl": self.source, "tl": self.target, "dt": "t"}
+        with diagnostics.span("http.post", host="translate.googleapis.com"):
+            r = get_session().post(self.url, params=params, data={"q": text}, timeout=self.timeout)
+        diagnostics.observe_http(self.url, r)
+        r.raise_for_status()
+        return "".join(seg[0] for seg in r.json()[0] if seg[0])
+
+    def translate_batch(self, texts):
+        # Parçalar satır sonuyla birleştirilip tek istekte gönderilir
+        return self._aligned(texts, [MAX_FALLBACK_REQUESTS])
+
+    def _aligned(self, texts, budget):
+        out = self._request("\n".join(texts)).split("\n")
+        if len(out) == len(texts): return [o.strip() for o in out]
+        if len(texts) == 1: return [" ".join(o.strip() for o in out)]
+        # Satır hizası bozuldu: ikiye bölünerek yeniden denenir; ek istek bütçesi biterse kalanlar
+        # çevrilmeden ("") döner, Translator orijinali kullanır ve depoya yazmaz
+        if budget[0] < 2: return [""] * len(texts)
+        budget[0] -= 2
+        mid = len(texts) // 2
+        return self._aligned(texts[:mid], budget) + self._aligned(texts[mid:], budget)
+
+
+class StubBackend(TranslationBackend):
+    """Çevrimdışı testler için: metni `prefix` ile aynen döner, çağrıları sayar."""
+
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self.calls = 0
+
+    def translate_batch(self, texts):
+        self.calls += 1
+        return [self.prefix + t for t in texts]
+
+
+# --- KALICI ÇEVİRİ DEPOSU ---
+class TranslationStore:
+    """İçerik özeti (sha1) anahtarlı SQLite deposu; süreçler ve yeniden başlatmalar arasında ortak."""
+
+    def __init__(self, path=TRANSLATION_DB):
+        self.path = path
+        with self._connect() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translated TEXT NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=10)
+        try:
+            with con: yield con
+        finally: con.close()
+
+    @staticmethod
+    def key(text, source, target):
+        return hashlib.sha1(f"{source}>{target}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self._connect() as con:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                q = f"SELECT key, translated FROM translations WHERE key IN ({','.join('?' * len(chunk))})"
+                found.update(con.execute(q, chunk).fetchall())
+        return found
+
+    def put_many(self, items):
+        with self._connect() as con:
+            con.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?)", list(items.items()))
+
+
+# --- ÇEVİRMEN ---
+def split_sentences(text):
+    return [s for s in SENTENCE_SPLIT.split(" ".join(text.split())) if s]
+
+def pack_batches(texts, max_chars=MAX_BATCH_CHARS):
+    """Metinleri sırayı bozmadan max_chars sınırına sığan gruplara böler."""
+    batches, cur, size = [], [], 0
+    for t in texts:
+        if cur and size + len(t) + 1 > max_chars:
+            batches.append(cur); cur, size = [], 0
+        cur.append(t); size += len(t) + 1
+    if cur: batches.append(cur)
+    return batches
+
+class Translator:
+    def __init__(self, backend=None, store=None, max_chars=MAX_BATCH_CHARS):
+        self.backend = backend or GoogleBackend()
+        self.store = store or TranslationStore()
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+
+    def translate_many(self, texts):
+        """Her farklı cümle yalnız bir kez çevrilir; eksikler toplu isteklerle gönderilir."""
+        src, tgt = self.backend.source, self.backend.target
+        split = [split_sentences(t) if t and t != "Bulunamadı" else [] for t in texts]
+        unique = list(dict.fromkeys(s for sents in split for s in sents))
+        keys = {s: self.store.key(s, src, tgt) for s in unique}
+        # Kilit yalnız depo okuma/yazmada; ağ çağrıları eşzamanlı çevirileri sıraya sokmaz
+        with self._lock: known = self.store.get_many(keys.values())
+        missing = [s for s in unique if keys[s] not in known]
+        diagnostics.cache_event("translation", "hit", len(unique) - len(missing))
+        diagnostics.cache_event("translation", "miss", len(missing))
+        for batch in pack_batches(missing, self.max_chars):
+            try:
+                with diagnostics.span("translate.batch", backend=type(self.backend).__name__):
+                    translated = self.backend.translate_batch(batch)
+            except Exception: continue  # Çevrilemeyen cümle orijinal kalır, depoya yazılmaz
+            fresh = {keys[s]: t for s, t in zip(batch, translated) if t}
+            with self._lock: self.store.put_many(fresh)
+            known.update(fresh)
+        out = []
+        for text, sents in zip(texts, split):
+            out.append(" ".join(known.get(keys[s], s) for s in sents) if sents else text)
+        return out
+
+    def translate(self, text):
+        return self.translate_many([text])[0]